@@ -0,0 +1,63 @@
+"""
+Conditional-GET benchmark: bytes transferred and wall-clock time of a warm
+crawl with and without ETag / Last-Modified revalidation.
+
+Runs against the local fixture site and the MongoDB at MONGO_URI
+(database MONGO_DB, default `books_crawler_bench`, which is wiped first):
+
+    python -m benchmarks.bench_conditional_get --pages 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import wipe
+from benchmarks.fixture_site import FixtureSite, serve
+
+
+async def run(site: FixtureSite):
+    from src.crawler.crawler import Crawler
+    from src.crawler.http_client import close_http_client
+
+    class UnconditionalCrawler(Crawler):
+        async def load_known_books(self):
+            await super().load_known_books()
+            self.validators = {}
+
+    await wipe()
+
+    rows = []
+    for label, crawler_cls in [
+        ("cold", Crawler),
+        ("warm, unconditional", UnconditionalCrawler),
+        ("warm, conditional", Crawler),
+    ]:
+        site.reset_stats()
+        started = time.perf_counter()
+        await crawler_cls().run()
+        elapsed = time.perf_counter() - started
+        rows.append((label, site.stats["requests"], site.stats["not_modified"], site.stats["bytes"], elapsed))
+    await close_http_client()
+
+    print(f"{'run':<22}{'requests':>10}{'304s':>8}{'bytes':>14}{'seconds':>10}")
+    for label, requests, not_modified, nbytes, elapsed in rows:
+        print(f"{label:<22}{requests:>10}{not_modified:>8}{nbytes:>14}{elapsed:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    site = FixtureSite(pages=args.pages, latency=args.latency)
+    with serve(site) as base_url:
+        # Settings are read at import time, so point the crawler at the fixture first
+        os.environ["START_URL"] = base_url
+        os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+        asyncio.run(run(site))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+End-to-end crawl benchmark: full `Crawler.run()`s against the fixture
+catalogue, with the results written as JSON so runs can be compared.
+
+Serves `--pages` listing pages of `--per-page` books, each response delayed
+by `--latency` and `--error-rate` of them answered with a 503, and runs
+`--runs` crawls from an empty database, each in a fresh process, against
+the MongoDB at MONGO_URI (database MONGO_DB, default `books_crawler_bench`,
+wiped before every run) or, with `--db mongomock`, an in-memory database
+(`pip install mongomock-motor`; the stored books then count towards the
+peak RSS). The politeness throttle is lifted unless CRAWL_RATE /
+CRAWL_MAX_RATE are set in the environment.
+
+Reports books per second, p50/p99 fetch latency (estimated from the
+`crawler_fetch_seconds` buckets), CPU time per book and the crawl process's
+peak RSS, and writes them with the configuration to `--output` (default
+reports/bench_crawl_<timestamp>.json). `--compare` takes an earlier results
+file, prints how each figure's median moved and exits with status 1 if any
+got worse by more than `--tolerance`:
+
+    python -m benchmarks.bench_crawl --pages 50 --latency 0.01 --error-rate 0.02 --runs 3
+    python -m benchmarks.bench_crawl --pages 50 --latency 0.01 --error-rate 0.02 --runs 3 \\
+        --compare reports/bench_crawl_20250101_120000.json
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.common import wipe
+from benchmarks.fixture_site import FixtureSite, serve
+
+CHILD = "import sys; from benchmarks.bench_crawl import child; child(sys.argv[1], sys.argv[2])"
+# Figure -> +1 if higher is better, -1 if lower is better
+FIGURES = {"books_per_sec": 1, "fetch_p50_ms": -1, "fetch_p99_ms": -1, "cpu_ms_per_book": -1, "peak_rss_mb": -1}
+# Settings that change what a run measures, recorded next to the results
+RECORDED_SETTINGS = ["CRAWL_CONCURRENCY", "CRAWL_MAX_CONCURRENCY", "CRAWL_RATE", "CRAWL_MAX_RATE", "HTTP2",
+                     "PARSE_EXECUTOR", "PARSE_WORKERS", "PARSER_ENGINE", "WRITE_BATCH_SIZE", "METRICS_ENABLED"]
+
+
+def use_mongomock():
+    """Point every loaded `src` module at an in-memory database instead of Motor's."""
+    from mongomock.collection import BulkOperationBuilder
+    from mongomock_motor import AsyncMongoMockClient
+
+    import src.db
+    from src.utils.config import settings
+
+    # pymongo 4.11+ queues bulk updates and replaces with a `sort` mongomock
+    # 4.3 does not know; the crawler never sets it
+    for name in ("add_update", "add_replace"):
+        method = getattr(BulkOperationBuilder, name)
+        if "sort" not in inspect.signature(method).parameters:
+            def without_sort(self, *args, sort=None, _method=method, **kwargs):
+                return _method(self, *args, **kwargs)
+            setattr(BulkOperationBuilder, name, without_sort)
+
+    motor_db = src.db.db
+    mock = AsyncMongoMockClient()[settings.MONGO_DB]
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src") and getattr(module, "db", None) is motor_db:
+            module.db = mock
+
+
+def child(backend: str, output: str):
+    """One crawl, in its own process so its CPU time and peak RSS are its own."""
+    from src.crawler.crawler import Crawler
+    from src.crawler.http_client import close_http_client
+    from src.utils.config import settings
+    from src.utils.metrics import FETCH_SECONDS
+
+    if backend == "mongomock":
+        use_mongomock()
+    from src.db import db
+
+    async def discard(change):
+        pass
+
+    async def crawl():
+        wall, cpu = time.perf_counter(), time.process_time()
+        await Crawler().run(on_change=discard)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        await close_http_client()
+        return await db.books.count_documents({}), wall, cpu
+
+    books, wall, cpu = asyncio.run(crawl())
+    # KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    # None when no fetch was timed (nothing fetched, or METRICS_ENABLED=false)
+    timed = () in FETCH_SECONDS.values
+    Path(output).write_text(json.dumps({
+        "books": books,
+        "seconds": wall,
+        "books_per_sec": books / wall,
+        "fetch_p50_ms": FETCH_SECONDS.quantile(0.5) * 1000 if timed else None,
+        "fetch_p99_ms": FETCH_SECONDS.quantile(0.99) * 1000 if timed else None,
+        "cpu_ms_per_book": cpu / max(books, 1) * 1000,
+        "peak_rss_mb": peak_rss,
+        "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+    }))
+
+
+async def crawl(backend: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "result.json"
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", CHILD, backend, str(output),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise SystemExit(f"crawl exited with {proc.returncode}:\n{stderr.decode(errors='replace')[-3000:]}")
+        return json.loads(output.read_text())
+
+
+def _cell(value: Optional[float], width: int, precision: int = 2) -> str:
+    return f"{value:>{width}.{precision}f}" if value is not None else f"{'-':>{width}}"
+
+
+def _median(values) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+async def run(site: FixtureSite, backend: str, runs: int) -> list:
+    results = []
+    print(f"{'run':>4}{'books':>8}{'requests':>10}{'503s':>6}{'books/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'CPU ms/book':>13}{'peak RSS MB':>13}")
+    for i in range(runs):
+        if backend == "mongo":
+            await wipe()
+        site.reset_stats()
+        result = await crawl(backend)
+        result.update(requests=site.stats["requests"], errors=site.stats["errors"])
+        results.append(result)
+        print(f"{i + 1:>4}{result['books']:>8}{result['requests']:>10}{result['errors']:>6}"
+              f"{result['books_per_sec']:>10.1f}{_cell(result['fetch_p50_ms'], 9)}{_cell(result['fetch_p99_ms'], 9)}"
+              f"{result['cpu_ms_per_book']:>13.2f}{result['peak_rss_mb']:>13.1f}")
+        if result["books"] != site.total_books:
+            print(f"     ⚠️ {site.total_books - result['books']} books missing (retries exhausted?)")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Print how each figure moved; returns the figures worse by more than `tolerance`."""
+    for key in ("config", "settings"):
+        if baseline.get(key) != current.get(key):
+            print(f"⚠️ {key} differ from the baseline: {baseline.get(key)} -> {current.get(key)}")
+    print(f"\nvs {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}), medians:")
+    print(f"{'figure':<18}{'baseline':>12}{'current':>12}{'change':>9}")
+    regressions = []
+    for figure, direction in FIGURES.items():
+        old, new = baseline["summary"].get(figure), current["summary"][figure]
+        if old is None or new is None:
+            print(f"{figure:<18}{_cell(old, 12)}{_cell(new, 12)}{'-':>9}")
+            continue
+        change = new / old - 1 if old else 0.0
+        worse = -change * direction > tolerance
+        if worse:
+            regressions.append(figure)
+        print(f"{figure:<18}{old:>12.2f}{new:>12.2f}{change:>+9.1%}{'  ❌ regression' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of responses that are 503s")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--db", choices=["mongo", "mongomock"], default="mongo")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative worsening (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    # Measure the crawler, not the politeness throttle
+    os.environ.setdefault("CRAWL_RATE", "100000")
+    os.environ.setdefault("CRAWL_MAX_RATE", "100000")
+    site = FixtureSite(pages=args.pages, per_page=args.per_page, latency=args.latency,
+                       error_rate=args.error_rate, seed=args.seed)
+    with serve(site) as base:
+        # Settings are read at import time, so point the crawler at the fixture first
+        os.environ["START_URL"] = base
+        results = asyncio.run(run(site, args.db, args.runs))
+
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    report = {
+        "timestamp": timestamp,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"pages": args.pages, "per_page": args.per_page, "latency": args.latency,
+                   "error_rate": args.error_rate, "db": args.db, "seed": args.seed},
+        "settings": results[0].pop("settings"),
+        "summary": {figure: _median(r[figure] for r in results) for figure in FIGURES},
+        "runs": [{k: v for k, v in r.items() if k != "settings"} for r in results],
+    }
+    output = args.output or Path("reports") / f"bench_crawl_{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results written to {output}")
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.tolerance)
+        if regressions:
+            raise SystemExit(f"regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Distributed crawl scaling: throughput of 1, 2, 4, ... `src.crawler.worker`
+processes sharing one frontier.
+
+Serves a fixture catalogue with a fixed per-response `--latency` (so a
+worker is bound by its `--concurrency` URLs in flight, like against a real
+site), and for each worker count wipes the crawl collections of the MongoDB
+at MONGO_URI (database MONGO_DB, default `books_crawler_bench`), opens a
+run and starts that many worker processes on it. Reports wall time, URLs
+per second, speed-up over one worker and duplicate fetches (requests the
+site served beyond one per URL):
+
+    python -m benchmarks.bench_distributed --pages 50 --workers 1 2 4 8 --concurrency 4 --latency 0.1
+
+The per-host rate limit is raised for the run so that it measures the
+frontier rather than the throttle; in production every worker applies
+CRAWL_RATE on its own, so divide it by the number of workers.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+from benchmarks.common import wipe
+from benchmarks.fixture_site import FixtureSite, serve
+
+
+async def open_run(base: str):
+    from src.crawler.frontier import Frontier
+    await wipe()
+    await Frontier.start_run([urljoin(base, "catalogue/page-1.html")])
+
+
+async def crawl(workers: int, concurrency: int, env: dict, verbose: bool) -> float:
+    output = None if verbose else asyncio.subprocess.DEVNULL
+    started = time.perf_counter()
+    procs = [
+        await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "src.crawler.worker", "--concurrency", str(concurrency),
+            env=env, stdout=output, stderr=output,
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        if await proc.wait() != 0:
+            raise SystemExit(f"worker exited with {proc.returncode}")
+    return time.perf_counter() - started
+
+
+async def run(site: FixtureSite, base: str, worker_counts: list, concurrency: int, verbose: bool):
+    env = {
+        **os.environ,
+        "START_URL": base,
+        "CRAWL_CONCURRENCY": str(concurrency),
+        "CRAWL_RATE": "10000",
+        "CRAWL_MAX_RATE": "10000",
+        "FRONTIER_POLL_INTERVAL": "0.1",
+    }
+    urls = site.pages + site.total_books
+    print(f"{urls} URLs, {site.latency * 1000:.0f} ms per response, {concurrency} in flight per worker")
+    print(f"{'workers':>8}{'seconds':>9}{'URLs/s':>9}{'speed-up':>10}{'dup fetches':>13}")
+    baseline = None
+    for workers in worker_counts:
+        await open_run(base)
+        site.reset_stats()
+        elapsed = await crawl(workers, concurrency, env, verbose)
+        rate = urls / elapsed
+        baseline = baseline or rate
+        duplicates = site.stats["requests"] - urls
+        print(f"{workers:>8}{elapsed:>9.1f}{rate:>9.0f}{rate / baseline:>9.1f}x{duplicates:>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=4, help="URLs in flight per worker")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds added to every response")
+    parser.add_argument("--verbose", action="store_true", help="show the workers' logs")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    site = FixtureSite(pages=args.pages, latency=args.latency)
+    with serve(site) as base:
+        os.environ["START_URL"] = base
+        asyncio.run(run(site, base, args.workers, args.concurrency, args.verbose))
+
+
+if __name__ == "__main__":
+    main()
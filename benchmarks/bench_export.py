@@ -0,0 +1,124 @@
+"""
+Full-catalogue export: GET /books/export vs paging through GET /books.
+
+Seeds `--books` synthetic books (default 1M) into the MongoDB at MONGO_URI
+(database MONGO_DB, default `books_crawler_bench`), serves the app with
+uvicorn on a local port (rate limiting and the response cache off) and
+downloads everything over real HTTP: once per export format, and once by
+following `next_cursor` through /books in pages of `--page`. For each run
+it reports wall time, documents per second, bytes received and how far the
+server's resident memory rose above where it started (sampled from
+/proc, so Linux only).
+
+    python -m benchmarks.bench_export --books 1000000 --page 1000
+"""
+import argparse
+import asyncio
+import os
+import time
+import zlib
+
+from benchmarks.bench_pagination import seed
+
+PORT = 8765
+RUNS = [
+    ("export ndjson", "/books/export?format=ndjson"),
+    ("export csv", "/books/export?format=csv"),
+    ("export ndjson gzip", "/books/export?format=ndjson&gzip=true"),
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def sample_rss(peak: list, stop: asyncio.Event):
+    while not stop.is_set():
+        peak[0] = max(peak[0], rss_mb())
+        await asyncio.sleep(0.05)
+
+
+async def download(client, path: str) -> tuple:
+    """Stream `path` to nowhere; returns (documents, bytes)."""
+    docs = size = 0
+    inflate = zlib.decompressobj(31) if "gzip=true" in path else None
+    async with client.stream("GET", path) as res:
+        res.raise_for_status()
+        async for chunk in res.aiter_raw():
+            size += len(chunk)
+            docs += (inflate.decompress(chunk) if inflate else chunk).count(b"\n")
+    # The CSV header is a line too
+    return docs - ("csv" in path), size
+
+
+async def page_through(client, page: int) -> tuple:
+    docs = size = 0
+    token = None
+    while True:
+        res = await client.get("/books", params={"limit": page, "fields": "all", **({"cursor": token} if token else {})})
+        res.raise_for_status()
+        body = res.json()
+        docs += len(body["data"])
+        size += len(res.content)
+        token = body.get("next_cursor")
+        if not token:
+            return docs, size
+
+
+async def run(books: int, page: int, reuse: bool):
+    import httpx
+    import uvicorn
+    from src.api.main import app
+    from src.api.dependencies import limiter
+    from src.db import db, ensure_indexes
+    from src.api.cache import response_cache
+    from src.utils.config import settings
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+    limiter.enabled = False
+    response_cache.enabled = False
+
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    headers = {"X-API-Key": settings.API_KEY}
+    timeout = httpx.Timeout(None)
+    print(f"{books} books, export batch_size {settings.EXPORT_BATCH_SIZE}")
+    print(f"{'run':<24}{'seconds':>9}{'docs/s':>10}{'MB':>9}{'RSS +MB':>9}")
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", headers=headers, timeout=timeout) as client:
+        runs = [(label, download(client, path)) for label, path in RUNS]
+        runs.append((f"/books pages of {page}", page_through(client, page)))
+        for label, job in runs:
+            baseline = rss_mb()
+            peak, stop = [baseline], asyncio.Event()
+            sampler = asyncio.create_task(sample_rss(peak, stop))
+            started = time.perf_counter()
+            docs, size = await job
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await sampler
+            print(f"{label:<24}{elapsed:>9.1f}{docs / elapsed:>10.0f}{size / 2**20:>9.1f}{peak[0] - baseline:>9.1f}")
+
+    server.should_exit = True
+    await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=1000, help="limit for the paged /books comparison")
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    asyncio.run(run(args.books, args.page, args.reuse))
+
+
+if __name__ == "__main__":
+    main()
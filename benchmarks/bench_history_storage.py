@@ -0,0 +1,77 @@
+"""
+book_history storage per crawl: full previous-document copies vs
+field-level diffs.
+
+Renders every fixture book before and after a catalogue refresh in which
+`--change-rate` of the books really change (price and stock) and
+`--markup-rate` only get different markup, parses both versions with the
+crawler's parser and BSON-encodes the history rows each scheme would write.
+No MongoDB needed:
+
+    python -m benchmarks.bench_history_storage --books 1000 --change-rate 0.1 --markup-rate 0.2
+"""
+import argparse
+import os
+from datetime import datetime
+
+import bson
+from bson import ObjectId
+
+from benchmarks.fixture_site import FixtureSite
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    parser.add_argument("--markup-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("API_KEY", "bench")
+    from src.utils.helpers import compute_hash
+    from src.utils.history import diff
+    from src.utils.parser import parse_book_page
+
+    site = FixtureSite(pages=max(1, args.books // 20), per_page=20, change_rate=args.change_rate)
+    markup_step = max(1, round(1 / args.markup_rate)) if args.markup_rate else 0
+    old_html = [site.render_book(i) for i in range(site.total_books)]
+    site.version += 1
+    new_html = [site.render_book(i) for i in range(site.total_books)]
+
+    legacy_rows = legacy_bytes = diff_rows = diff_bytes = 0
+    for i, (before, after) in enumerate(zip(old_html, new_html)):
+        if markup_step and i % markup_step == 1:
+            after = after.replace(b"<body>", b"<body><!-- refreshed layout -->")
+        if compute_hash(before) == compute_hash(after):
+            continue
+        url = f"http://fixture/catalogue/book-{i}_{i}/index.html"
+        existing = {
+            "_id": ObjectId(),
+            **parse_book_page(before.decode(), url),
+            "etag": '"0123456789abcdef"',
+            "last_modified": "Wed, 05 Nov 2025 21:49:38 GMT",
+            "crawl_timestamp": datetime.utcnow(),
+            "raw_html_hash": compute_hash(before),
+            "raw_html_snapshot_id": compute_hash(before),
+        }
+        item = parse_book_page(after.decode(), url)
+        common = {"book_id": existing["_id"], "raw_html_snapshot_id": existing["raw_html_hash"], "ts": datetime.utcnow()}
+
+        legacy_rows += 1
+        legacy_bytes += len(bson.encode({**common, "previous": existing}))
+        changes = diff(existing, item)
+        if changes:
+            diff_rows += 1
+            diff_bytes += len(bson.encode({**common, "changes": changes}))
+
+    print(f"{site.total_books} books, {args.change_rate:.0%} changed, {args.markup_rate:.0%} markup-only")
+    print(f"{'scheme':<10}{'rows':>8}{'bytes':>12}{'bytes/row':>11}")
+    for label, rows, nbytes in (("previous", legacy_rows, legacy_bytes), ("diff", diff_rows, diff_bytes)):
+        print(f"{label:<10}{rows:>8}{nbytes:>12}{nbytes / rows if rows else 0:>11.0f}")
+    if diff_bytes:
+        print(f"{legacy_bytes / diff_bytes:.1f}x less history written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+HTTP/1.1 vs HTTP/2 benchmark: requests per second through the crawler's
+client settings at several concurrency levels, against the fixture site
+served by hypercorn (cleartext HTTP/2 with prior knowledge):
+
+    pip install hypercorn
+    python -m benchmarks.bench_http2 --requests 2000 --concurrency 1 8 32 128
+
+Both protocols share the same pool limits and timeouts from `Settings`, so
+only the transport differs. Use --latency to model a remote server.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.fixture_site import FixtureSite, serve_h2
+
+
+async def measure(client, urls: list, concurrency: int) -> tuple:
+    """Returns (requests per second, HTTP versions seen)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    versions = set()
+
+    async def fetch(url):
+        async with semaphore:
+            res = await client.get(url)
+            res.raise_for_status()
+            versions.add(res.http_version)
+
+    await fetch(urls[0])  # open the first connection outside the timing
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in urls))
+    return len(urls) / (time.perf_counter() - started), ",".join(sorted(versions))
+
+
+async def run(base_url: str, site: FixtureSite, requests: int, levels: list):
+    from src.crawler.http_client import build_http_client
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+
+    urls = [f"{base_url}catalogue/book-{i % site.total_books}_{i % site.total_books}/index.html"
+            for i in range(requests)]
+    print(f"{requests} requests per run, {site.latency * 1000:.0f} ms server latency")
+    print(f"{'concurrency':>12}{'HTTP/1.1 req/s':>16}{'HTTP/2 req/s':>14}{'speedup':>10}")
+    for concurrency in levels:
+        rates = []
+        for http2, expected in ((False, "HTTP/1.1"), (True, "HTTP/2")):
+            # http1=False makes httpx speak HTTP/2 without TLS/ALPN negotiation
+            async with build_http_client(http2=http2, http1=not http2) as client:
+                rate, versions = await measure(client, urls, concurrency)
+            assert versions == expected, f"expected {expected}, got {versions}"
+            rates.append(rate)
+        print(f"{concurrency:>12}{rates[0]:>16.0f}{rates[1]:>14.0f}{rates[1] / rates[0]:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    site = FixtureSite(pages=50, latency=args.latency)
+    with serve_h2(site) as base_url:
+        os.environ["START_URL"] = base_url
+        asyncio.run(run(base_url, site, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
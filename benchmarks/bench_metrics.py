@@ -0,0 +1,102 @@
+"""
+Metrics overhead: cost of the crawl instrumentation (`src.utils.metrics`).
+
+First times the individual updates (counter, histogram, timer), then
+fetches and parses every listing page of the fixture catalogue (and its
+books) `--rounds` times with METRICS_ENABLED off and on, in alternating
+order, and compares the time per page. The site is called in-process over
+ASGI (no sockets, no server thread to add noise), nothing is written to
+MongoDB and nothing waits on the network, so the instrumentation's share
+of the work is as large as it gets:
+
+    python -m benchmarks.bench_metrics --pages 50 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import timeit
+
+import httpx
+
+from benchmarks.fixture_site import FixtureSite
+
+BASE = "http://fixture/"
+
+
+def micro():
+    from src.utils.metrics import Registry
+
+    registry = Registry()
+    counter = registry.counter("c", "counter", ["status"])
+    histogram = registry.histogram("h", "histogram")
+
+    def timed():
+        with histogram.time():
+            pass
+
+    for label, fn in [
+        ("counter.inc", lambda: counter.inc(1, ("200",))),
+        ("histogram.observe", lambda: histogram.observe(0.042)),
+        ("histogram.time()", timed),
+    ]:
+        n = 200_000
+        print(f"{label:<20}{timeit.timeit(fn, number=n) / n * 1e9:>8.0f} ns")
+
+
+async def crawl_page(crawler, base: str, page: int) -> float:
+    from src.utils.parser import parse_listing_page
+
+    started = time.perf_counter()
+    listing = await crawler.fetch_with_retry(f"{base}catalogue/page-{page}.html")
+    links, _ = parse_listing_page(listing.text)
+    responses = await asyncio.gather(*(crawler.fetch_with_retry(url) for url in links))
+    await crawler.parse_executor.parse_books([(res.text, url) for url, res in zip(links, responses)])
+    return time.perf_counter() - started
+
+
+async def run(site: FixtureSite, pages: int, rounds: int):
+    from src.crawler.crawler import Crawler
+    from src.utils.metrics import metrics
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=site))
+    crawler = Crawler(client=client)
+    for page in range(1, pages + 1):  # warm up
+        await crawl_page(crawler, BASE, page)
+
+    # Each listing page is crawled once per mode per round, in alternating
+    # order, so drift on a shared machine hits both modes alike
+    times = {False: [], True: []}
+    for i in range(rounds):
+        for page in range(1, pages + 1):
+            for enabled in ((False, True) if (i + page) % 2 else (True, False)):
+                metrics.enabled = enabled
+                times[enabled].append(await crawl_page(crawler, BASE, page))
+    await client.aclose()
+
+    books = site.per_page
+    for enabled in (False, True):
+        print(f"metrics {'on ' if enabled else 'off'}: {statistics.median(times[enabled]) / books * 1e6:.0f} us "
+              f"per book (median of {len(times[enabled])} pages)")
+    total = {enabled: sum(t) for enabled, t in times.items()}
+    median = {enabled: statistics.median(t) for enabled, t in times.items()}
+    print(f"overhead: {(median[True] / median[False] - 1) * 100:+.2f}% (median page), "
+          f"{(total[True] / total[False] - 1) * 100:+.2f}% (total)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # Measure the instrumentation, not the politeness throttle or a process pool
+    os.environ.update(CRAWL_RATE="100000", CRAWL_MAX_RATE="100000", PARSE_EXECUTOR="inline")
+    micro()
+    os.environ["START_URL"] = BASE
+    asyncio.run(run(FixtureSite(pages=args.pages), args.pages, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Deep-page latency of GET /books: skip/limit vs keyset cursors.
+
+Seeds `--books` synthetic books (default 1M) into the MongoDB at MONGO_URI
+(database MONGO_DB, default `books_crawler_bench`), creates the indexes from
+`ensure_indexes`, then times fetching one page at increasing depths for every
+sort_by option. The cursor for a given depth is taken from the document just
+before it, exactly what a client paging through would hold.
+
+    python -m benchmarks.bench_pagination --books 1000000 --depths 0 1000 100000 900000
+
+Pass --reuse to keep an already seeded collection.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+PAGE = 20
+
+
+def fake_book(i: int) -> dict:
+    return {
+        "name": f"Generated Book {i}",
+        "category": f"Category {i % 50}",
+        "price": {"including_tax": round(random.uniform(5, 60), 2), "excluding_tax": 0.0},
+        "num_reviews": random.randint(0, 30),
+        "rating": random.choice([1, 2, 3, 4, 5, None]),
+        "source_url": f"https://books.example/catalogue/book_{i}/index.html",
+    }
+
+
+async def seed(db, books: int):
+    await db.books.drop()
+    batch = 10_000
+    for start in range(0, books, batch):
+        await db.books.insert_many([fake_book(i) for i in range(start, min(books, start + batch))], ordered=False)
+    print(f"Seeded {books} books")
+
+
+async def timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return (time.perf_counter() - started) * 1000
+
+
+async def run(books: int, depths: list, reuse: bool):
+    from src.api.pagination import encode_cursor, paginate
+    from src.db import BOOK_SORTS, DEFAULT_BOOK_SORT
+    from src.db import db, ensure_indexes
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+
+    print(f"{'sort':<10}{'depth':>10}{'skip ms':>10}{'cursor ms':>11}")
+    for sort_by in [None, "rating", "price", "reviews"]:
+        field, direction = BOOK_SORTS.get(sort_by, DEFAULT_BOOK_SORT)
+        scope = f"books:{field}"
+        _, sort = paginate({}, field, direction, None, scope)
+        for depth in depths:
+            skip_ms = await timed(db.books.find({}).sort(sort).skip(depth).limit(PAGE).to_list(PAGE))
+
+            token = None
+            if depth:
+                # The last document of the previous page, as a client would have it
+                before = await db.books.find({}).sort(sort).skip(depth - 1).limit(1).to_list(1)
+                token = encode_cursor(scope, before[0], field)
+            query, _ = paginate({}, field, direction, token, scope)
+            cursor_ms = await timed(db.books.find(query).sort(sort).limit(PAGE).to_list(PAGE))
+            print(f"{sort_by or '_id':<10}{depth:>10}{skip_ms:>10.1f}{cursor_ms:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1_000, 100_000, 900_000])
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    asyncio.run(run(args.books, [d for d in args.depths if d < args.books], args.reuse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Parse-executor benchmark: book pages parsed per second and worst event-loop
+stall for each executor mode and worker count.
+
+Book pages are downloaded once from the local fixture site, grouped per
+listing page (as the crawler does) and pushed through ParseExecutor with
+all batches in flight at once:
+
+    python -m benchmarks.bench_parse_executor --pages 20 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fixture_site import FixtureSite, serve
+
+
+async def download_batches(base_url: str, site: FixtureSite) -> list:
+    import httpx
+
+    batches = []
+    async with httpx.AsyncClient() as client:
+        for page in range(site.pages):
+            urls = [f"{base_url}catalogue/book-{i}_{i}/index.html"
+                    for i in range(page * site.per_page, (page + 1) * site.per_page)]
+            responses = await asyncio.gather(*(client.get(url) for url in urls))
+            batches.append([(res.text, url) for res, url in zip(responses, urls)])
+    return batches
+
+
+async def measure(executor, batches: list) -> tuple:
+    """Returns (pages per second, longest gap between event-loop ticks)."""
+    max_lag = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal max_lag
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            max_lag = max(max_lag, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await executor.parse_books(batches[0])  # warm the pool up
+    started = time.perf_counter()
+    await asyncio.gather(*(executor.parse_books(batch) for batch in batches))
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+    return sum(len(b) for b in batches) / elapsed, max_lag
+
+
+async def run(base_url: str, site: FixtureSite, worker_counts: list):
+    from src.crawler.parse_executor import ParseExecutor
+
+    batches = await download_batches(base_url, site)
+    print(f"{os.cpu_count()} CPUs, {sum(len(b) for b in batches)} book pages in {len(batches)} batches")
+    print(f"{'mode':<10}{'workers':>8}{'pages/s':>10}{'max loop stall ms':>20}")
+    for mode in ("inline", "thread", "process"):
+        for workers in ([1] if mode == "inline" else worker_counts):
+            executor = ParseExecutor(mode=mode, workers=workers)
+            try:
+                rate, lag = await measure(executor, batches)
+            finally:
+                executor.shutdown()
+            print(f"{mode:<10}{workers:>8}{rate:>10.0f}{lag * 1000:>20.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20, help="listing pages (20 books each)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    site = FixtureSite(pages=args.pages)
+    with serve(site) as base_url:
+        os.environ["START_URL"] = base_url
+        asyncio.run(run(base_url, site, args.workers))
+
+
+if __name__ == "__main__":
+    main()
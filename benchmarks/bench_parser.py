@@ -0,0 +1,46 @@
+"""
+Parser micro-benchmark: pages parsed per second for every installed engine.
+
+Pages come from the fixture site generator, so no server or DB is needed:
+
+    python -m benchmarks.bench_parser --seconds 2
+"""
+import argparse
+import os
+import time
+
+from benchmarks.fixture_site import FixtureSite
+
+
+def pages_per_second(fn, pages: list, seconds: float) -> float:
+    done = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for page in pages:
+            fn(page)
+        done += len(pages)
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent per engine and page type")
+    args = parser.parse_args()
+
+    os.environ.setdefault("START_URL", "http://127.0.0.1/")
+    from src.utils.parser import available_engines, parse_book_page, parse_listing_page
+
+    site = FixtureSite(pages=5)
+    books = [(site.render_book(i).decode(), f"book-{i}") for i in range(site.total_books)]
+    listings = [site.render_listing(p).decode() for p in range(1, site.pages + 1)]
+
+    print(f"{'engine':<14}{'book pages/s':>14}{'listing pages/s':>17}")
+    for engine in available_engines():
+        book_rate = pages_per_second(lambda b: parse_book_page(b[0], b[1], engine=engine), books, args.seconds)
+        listing_rate = pages_per_second(lambda html: parse_listing_page(html, engine=engine), listings, args.seconds)
+        print(f"{engine:<14}{book_rate:>14.0f}{listing_rate:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
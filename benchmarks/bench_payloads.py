@@ -0,0 +1,127 @@
+"""
+Payload size and latency of the list endpoints, before and after field
+projection.
+
+Seeds `--books` full-size books (long descriptions, hashes, validators) and
+one history row per book into the MongoDB at MONGO_URI (database MONGO_DB,
+default `books_crawler_bench`), then calls the app in-process (cache and
+rate limiting off) and reports bytes per response and p50 latency:
+
+    python -m benchmarks.bench_payloads --books 20000 --runs 50
+
+The "before" row reproduces the old behaviour of returning every stored
+field. History storage is measured by bench_history_storage.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+ENDPOINTS = [
+    ("/books before (every stored field)", "/books?limit=100"),
+    ("/books fields=all", "/books?limit=100&fields=all"),
+    ("/books default (compact)", "/books?limit=100"),
+    ("/books fields=name,price", "/books?limit=100&fields=name,price"),
+    ("/changes", "/changes?limit=100"),
+    ("/changes mode=diff", "/changes?limit=100&mode=diff"),
+]
+
+
+def full_book(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "name": f"Generated Book {i}",
+        "description": f"Description of generated book {i}. " * 40,
+        "category": f"Category {i % 50}",
+        "price": {"including_tax": round(random.uniform(5, 60), 2), "excluding_tax": 0.0},
+        "availability": f"In stock ({i % 22} available)",
+        "num_reviews": random.randint(0, 30),
+        "image_url": f"https://books.toscrape.com/media/cache/{i:x}.jpg",
+        "rating": random.randint(1, 5),
+        "source_url": f"https://books.toscrape.com/catalogue/book_{i}/index.html",
+        "crawl_timestamp": datetime.utcnow(),
+        "raw_html_hash": f"{i:064x}",
+        "raw_html_snapshot_id": f"{i:064x}",
+        "etag": f'"{i:016x}"',
+        "last_modified": "Wed, 05 Nov 2025 21:49:38 GMT",
+        "has_changed": True,
+    }
+
+
+async def seed(db, books: int):
+    for name in ("books", "book_history"):
+        await db[name].drop()
+    batch = 5_000
+    started = datetime.utcnow() - timedelta(days=1)
+    for start in range(0, books, batch):
+        docs = [full_book(i) for i in range(start, min(books, start + batch))]
+        await db.books.insert_many(docs)
+        await db.book_history.insert_many([
+            {
+                "book_id": d["_id"],
+                "changes": {"price.including_tax": {"old": d["price"]["including_tax"] + 1,
+                                                    "new": d["price"]["including_tax"]}},
+                "raw_html_snapshot_id": d["raw_html_hash"],
+                "ts": started + timedelta(seconds=n),
+            }
+            for n, d in enumerate(docs, start)
+        ])
+    print(f"Seeded {books} books and {books} history rows")
+
+
+async def run(books: int, runs: int, reuse: bool):
+    import httpx
+    from src.api.main import app
+    from src.api.dependencies import limiter
+    from src.api.routers import books as books_router
+    from src.db import db, ensure_indexes
+    from src.api.cache import response_cache
+    from src.utils.config import settings
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+    limiter.enabled = False
+    response_cache.enabled = False
+
+    # "before": what list_books returned prior to field projection
+    compact = books_router.books_projection
+
+    def legacy_projection(fields, default=None, always=()):
+        return {"raw_html_gzip": 0} if fields is None else compact(fields, always=always)
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-API-Key": settings.API_KEY}
+    print(f"{'endpoint':<38}{'bytes':>10}{'p50 ms':>9}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for label, path in ENDPOINTS:
+            books_router.books_projection = legacy_projection if "before" in label else compact
+            timings, size = [], 0
+            for _ in range(runs):
+                started = time.perf_counter()
+                res = await client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+                res.raise_for_status()
+                size = len(res.content)
+            timings.sort()
+            print(f"{label:<38}{size:>10}{timings[len(timings) // 2]:>9.2f}")
+    books_router.books_projection = compact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    asyncio.run(run(args.books, args.runs, args.reuse))
+
+
+if __name__ == "__main__":
+    main()
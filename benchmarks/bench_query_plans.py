@@ -0,0 +1,75 @@
+"""
+Query plans of every GET /books filter/sort combination.
+
+Seeds synthetic books into the MongoDB at MONGO_URI (database MONGO_DB,
+default `books_crawler_bench`), runs `ensure_indexes`, then explains the
+exact query the endpoint builds for each combination of category, rating,
+price range and sort_by, on the first page and on a cursor page. Fails
+(exit code 1) if any plan contains a COLLSCAN or an in-memory SORT stage.
+
+    python -m benchmarks.bench_query_plans --books 200000
+
+Pass --reuse to keep a collection seeded by a previous run (or by
+bench_pagination).
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+
+from benchmarks.bench_pagination import seed
+
+
+async def run(books: int, reuse: bool) -> bool:
+    from src.api.book_queries import books_filter, books_hint, explain_summary
+    from src.api.pagination import encode_cursor, paginate
+    from src.db import BOOK_SORTS, DEFAULT_BOOK_SORT, db, ensure_indexes
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+
+    ok = True
+    print(f"{'category':<12}{'rating':>7}{'price':>8}{'sort':>9}{'page':>7}"
+          f"{'keys':>9}{'docs':>9}{'ms':>6}  stages")
+    for category, rating, price, sort_by, paged in itertools.product(
+        [None, "Category 7"], [None, 4], [None, (10.0, 30.0)], [None, *BOOK_SORTS], [False, True],
+    ):
+        query = books_filter(category, rating, *(price or (None, None)))
+        field, direction = BOOK_SORTS.get(sort_by, DEFAULT_BOOK_SORT)
+        hint = books_hint(query, field, direction)
+        scope = f"books:{field}"
+        token = None
+        if paged:
+            _, sort = paginate(query, field, direction, None, scope)
+            first = await db.books.find(query).sort(sort).hint(hint).limit(20).to_list(20)
+            if len(first) < 20:
+                continue
+            token = encode_cursor(scope, first[-1], field)
+        filter_, sort = paginate(query, field, direction, token, scope)
+        plan = await db.books.find(filter_).sort(sort).hint(hint).limit(21).explain()
+        summary = explain_summary(plan)
+        ok &= summary["index_scan_only"]
+        print(f"{category or '-':<12}{rating or '-':>7}{'yes' if price else '-':>8}{sort_by or '_id':>9}"
+              f"{'next' if paged else 'first':>7}{summary['keys_examined']:>9}{summary['docs_examined']:>9}"
+              f"{summary['execution_ms']:>6}  {' > '.join(summary['stages'])}"
+              + ("" if summary["index_scan_only"] else "  <-- NOT INDEXED"))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    if not asyncio.run(run(args.books, args.reuse)):
+        print("Some combinations need a COLLSCAN or an in-memory SORT")
+        sys.exit(1)
+    print("All combinations are served by an index without an in-memory sort")
+
+
+if __name__ == "__main__":
+    main()
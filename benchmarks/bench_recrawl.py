@@ -0,0 +1,98 @@
+"""
+Incremental recrawl: fetches and staleness of a full daily crawl vs the
+change-rate schedule of `src.crawler.recrawl`.
+
+A pure simulation (no site, no MongoDB). `--books` books each change as a
+Poisson process with a skewed rate: most almost never, some monthly, a few
+daily. Both strategies run for `--days`; the first `--warmup` of them build
+up each book's history and are not measured. Reports fetches per day, the
+share of fetches that found a change, the share of book-days on which the
+stored copy was out of date, and the mean delay from a change to its
+detection:
+
+    python -m benchmarks.bench_recrawl --books 100000 --days 240 --warmup 120 --bound 0.1
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from src.crawler.recrawl import RecrawlPlanner
+
+START = datetime(2025, 1, 1)
+# (share of books, changes per day)
+RATE_MIX = [(0.90, 1 / 365), (0.08, 1 / 30), (0.015, 1 / 7), (0.005, 1.0)]
+
+
+def change_days(rng: random.Random, rate: float, days: int) -> list:
+    """Times (in days) at which a book with this rate changes."""
+    times, t = [], rng.expovariate(rate)
+    while t < days:
+        times.append(t)
+        t += rng.expovariate(rate)
+    return times
+
+
+def simulate(changes: list, days: int, warmup: int, planner=None) -> dict:
+    fetches = found = stale_days = detected = delay = 0.0
+    for times in changes:
+        state, fetched_at, due = None, 0.0, 0
+        pending = iter(times)
+        upcoming = next(pending, None)
+        unseen = []  # changes since the last fetch
+        for day in range(days):
+            while upcoming is not None and upcoming < day:
+                unseen.append(upcoming)
+                upcoming = next(pending, None)
+            measured = day >= warmup
+            if measured and unseen:
+                stale_days += 1
+            if planner is not None and day < due:
+                continue
+            changed = bool(unseen)
+            if measured:
+                fetches += 1
+                found += changed
+                detected += len(unseen)
+                delay += sum(day - t for t in unseen)
+            unseen = []
+            fetched_at = day
+            if planner is not None:
+                state = planner.plan(state, changed, START + timedelta(days=fetched_at))
+                due = (state["next_due"] - START).total_seconds() / 86400
+    measured_days = days - warmup
+    return {
+        "fetches/day": fetches / measured_days,
+        "found changed": found / max(fetches, 1),
+        "stale book-days": stale_days / (len(changes) * measured_days),
+        "delay (days)": delay / max(detected, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=240)
+    parser.add_argument("--warmup", type=int, default=120)
+    parser.add_argument("--bound", type=float, default=None, help="RECRAWL_STALENESS_BOUND")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    shares, rates = zip(*RATE_MIX)
+    changes = [change_days(rng, rng.choices(rates, shares)[0], args.days) for _ in range(args.books)]
+    planner = RecrawlPlanner(bound=args.bound)
+    print(f"{args.books} books over days {args.warmup}-{args.days}, staleness bound {planner.bound}, "
+          f"intervals {planner.min_days}-{planner.max_days} days")
+
+    results = {"full daily": simulate(changes, args.days, args.warmup),
+               "incremental": simulate(changes, args.days, args.warmup, planner)}
+    columns = list(results["full daily"])
+    print(f"{'strategy':<14}" + "".join(f"{c:>17}" for c in columns))
+    for label, result in results.items():
+        print(f"{label:<14}" + "".join(f"{result[c]:>17.3f}" for c in columns))
+    ratio = results["full daily"]["fetches/day"] / results["incremental"]["fetches/day"]
+    print(f"incremental fetches {ratio:.1f}x fewer per day")
+
+
+if __name__ == "__main__":
+    main()
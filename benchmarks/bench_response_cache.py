@@ -0,0 +1,104 @@
+"""
+Load test of the books API with the response cache off and on.
+
+Seeds `--books` synthetic books into the MongoDB at MONGO_URI (database
+MONGO_DB, default `books_crawler_bench`), then drives the FastAPI app
+in-process (httpx ASGI transport, rate limiting disabled) with `--requests`
+GETs spread over a skewed mix of /books queries and /books/{id} lookups,
+`--concurrency` at a time, and reports p50/p99 latency and throughput.
+
+    python -m benchmarks.bench_response_cache --books 50000 --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.bench_pagination import seed
+
+QUERIES = [
+    "",
+    "sort_by=price",
+    "sort_by=rating",
+    "sort_by=reviews",
+    "category=Category%203",
+    "category=Category%207&sort_by=price",
+    "rating=5&sort_by=reviews",
+    "min_price=10&max_price=20&sort_by=price",
+    "category=Category%2011&min_price=20&max_price=40",
+    "rating=3&limit=100",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def load(client, paths: list, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def hit(path):
+        async with semaphore:
+            started = time.perf_counter()
+            res = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            res.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(hit(path) for path in paths))
+    return latencies, len(paths) / (time.perf_counter() - started)
+
+
+async def run(books: int, requests: int, concurrency: int, reuse: bool):
+    import httpx
+    from src.api.main import app
+    from src.api.dependencies import limiter
+    from src.db import db, ensure_indexes
+    from src.api.cache import response_cache
+    from src.utils.config import settings
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+    limiter.enabled = False
+
+    ids = [str(d["_id"]) for d in await db.books.find({}, {"_id": 1}).limit(200).to_list(200)]
+    rng = random.Random(42)
+    # Popular queries dominate, like a real catalogue front page
+    paths = [
+        f"/books?{rng.choices(QUERIES, weights=[1 / (i + 1) for i in range(len(QUERIES))])[0]}"
+        if rng.random() < 0.7 else f"/books/{rng.choice(ids)}"
+        for _ in range(requests)
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-API-Key": settings.API_KEY}
+    print(f"{requests} requests, concurrency {concurrency}, {books} books")
+    print(f"{'cache':<6}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}{'hit rate':>10}")
+    for enabled in (False, True):
+        response_cache.enabled = enabled
+        response_cache.hits = response_cache.misses = 0
+        await response_cache.backend.clear()
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            latencies, rate = await load(client, paths, concurrency)
+        print(f"{'on' if enabled else 'off':<6}{percentile(latencies, 50):>9.2f}{percentile(latencies, 99):>9.2f}"
+              f"{rate:>9.0f}{response_cache.stats()['hit_rate']:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    asyncio.run(run(args.books, args.requests, args.concurrency, args.reuse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Crash recovery: what a full crawl costs to finish after a `kill -9`.
+
+Serves a fixture catalogue (with a fixed per-response `--latency`) and, for
+each of `--trials`, wipes the crawl collections of the MongoDB at MONGO_URI
+(database MONGO_DB, default `books_crawler_bench`), starts a full crawl in a
+subprocess, SIGKILLs it at a random point of an uninterrupted crawl's
+duration and runs a second crawl, which resumes the first. Reports how far
+the first crawl got, the requests the resumed crawl made, and the wasted
+requests (both crawls together beyond an uninterrupted one), then checks
+that the catalogue is complete, unchanged and that no run is left open:
+
+    python -m benchmarks.bench_resume --pages 50 --trials 5 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import sys
+import time
+
+from benchmarks.common import wipe
+from benchmarks.fixture_site import FixtureSite, serve
+
+CRAWL = "import asyncio; from src.crawler.crawler import Crawler; asyncio.run(Crawler().run())"
+
+
+async def crawl(env: dict, kill_after: float = None) -> float:
+    started = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", CRAWL, env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    if kill_after is None:
+        if await proc.wait() != 0:
+            raise SystemExit(f"crawl exited with {proc.returncode}")
+    else:
+        await asyncio.sleep(kill_after)
+        proc.send_signal(signal.SIGKILL)
+        await proc.wait()
+    return time.perf_counter() - started
+
+
+async def run(site: FixtureSite, trials: int, seed: int):
+    from src.db import db
+
+    env = dict(os.environ)
+    rng = random.Random(seed)
+    await wipe()
+    site.reset_stats()
+    full_seconds = await crawl(env)
+    full_requests = site.stats["requests"]
+    print(f"uninterrupted crawl: {full_requests} requests in {full_seconds:.1f}s")
+    print(f"{'killed at':>10}{'books stored':>14}{'requests':>10}{'resumed':>9}{'304s':>6}{'wasted':>8}{'seconds':>9}")
+
+    wasted_total = 0
+    for _ in range(trials):
+        await wipe()
+        site.reset_stats()
+        kill_after = rng.uniform(0.05, 0.95) * full_seconds
+        await crawl(env, kill_after)
+        before = site.stats["requests"]
+        stored = await db.books.count_documents({})
+
+        site.reset_stats()
+        resume_seconds = await crawl(env)
+        resumed, not_modified = site.stats["requests"], site.stats["not_modified"]
+        wasted = before + resumed - full_requests
+        wasted_total += wasted
+        print(f"{kill_after:>9.1f}s{stored:>14}{before:>10}{resumed:>9}{not_modified:>6}{wasted:>8}{resume_seconds:>9.1f}")
+
+        assert await db.books.count_documents({}) == site.total_books
+        assert await db.book_history.count_documents({}) == 0
+        assert await db.crawl_runs.count_documents({"finished": None}) == 0
+        assert await db.frontier.count_documents({}) == 0
+    print(f"mean wasted requests per crash: {wasted_total / trials:.1f} "
+          f"(restarting from scratch wastes everything fetched before the kill)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    site = FixtureSite(pages=args.pages, latency=args.latency)
+    with serve(site) as base:
+        # Settings are read at import time, so point the crawler at the fixture first
+        os.environ["START_URL"] = base
+        asyncio.run(run(site, args.trials, args.seed))
+
+
+if __name__ == "__main__":
+    main()
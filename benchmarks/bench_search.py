@@ -0,0 +1,119 @@
+"""
+Latency of GET /books/search.
+
+Seeds `--books` synthetic books (default 1M) whose names and descriptions
+are drawn from a Zipf-ish vocabulary into the MongoDB at MONGO_URI
+(database MONGO_DB, default `books_crawler_bench`), creates the indexes
+from `ensure_indexes`, then times the first page and the page `--depth`
+results in (reached through cursors) for common, rare and filtered
+queries. A case-insensitive `$regex` scan over name and description, the
+only option before the text index, is timed for comparison.
+
+    python -m benchmarks.bench_search --books 1000000 --runs 10
+    python -m benchmarks.bench_search --backend memory   # in-process inverted index
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+PAGE = 20
+VOCABULARY = [f"word{i}" for i in range(5_000)]
+WEIGHTS = [1 / (i + 1) for i in range(len(VOCABULARY))]
+QUERIES = [
+    ("common term", "word1", {}),
+    ("rare term", "word4000", {}),
+    ("two terms", "word10 word200", {}),
+    ("common + category", "word1", {"category": "Category 7"}),
+    ("common + price range", "word1", {"price.including_tax": {"$gte": 10.0, "$lte": 20.0}}),
+]
+
+
+def fake_book(i: int, rng: random.Random) -> dict:
+    return {
+        "name": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=4)),
+        "description": " ".join(rng.choices(VOCABULARY, WEIGHTS, k=60)),
+        "category": f"Category {i % 50}",
+        "price": {"including_tax": round(rng.uniform(5, 60), 2), "excluding_tax": 0.0},
+        "num_reviews": rng.randint(0, 30),
+        "rating": rng.randint(1, 5),
+        "source_url": f"https://books.example/catalogue/book_{i}/index.html",
+    }
+
+
+async def seed(db, books: int):
+    await db.books.drop()
+    rng = random.Random(7)
+    batch = 10_000
+    for start in range(0, books, batch):
+        docs = [fake_book(i, rng) for i in range(start, min(books, start + batch))]
+        await db.books.insert_many(docs, ordered=False)
+    print(f"Seeded {books} books")
+
+
+async def timed(coro) -> tuple:
+    started = time.perf_counter()
+    result = await coro
+    return (time.perf_counter() - started) * 1000, result
+
+
+async def run(books: int, runs: int, depth: int, backend: str, reuse: bool):
+    from src.api.book_queries import books_projection
+    from src.api.search import mongo_search, memory_search
+    from src.db import db, ensure_indexes
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+    search = memory_search if backend == "memory" else mongo_search
+    projection = books_projection(None)
+
+    if backend == "memory":
+        build_ms, _ = await timed(memory_search._current_index())
+        print(f"In-memory index built in {build_ms / 1000:.1f}s")
+
+    print(f"{backend} backend, {books} books, {runs} runs, p50 ms")
+    print(f"{'query':<24}{'page 1':>9}{f'page @{depth}':>13}{'regex':>10}")
+    for label, q, query in QUERIES:
+        first, deep = [], []
+        for _ in range(runs):
+            ms, (_, cursor) = await timed(search(q, query, projection, PAGE, None))
+            first.append(ms)
+        # Walk to `depth` once, then time the page found there
+        cursor, seen = None, 0
+        while seen < depth:
+            docs, cursor = await search(q, query, projection, PAGE, cursor)
+            seen += len(docs)
+            if not cursor:
+                break
+        if cursor:
+            for _ in range(runs):
+                ms, _ = await timed(search(q, query, projection, PAGE, cursor))
+                deep.append(ms)
+
+        pattern = {"$regex": q.split()[0], "$options": "i"}
+        regex_query = {"$or": [{"name": pattern}, {"description": pattern}], **query}
+        regex_ms, _ = await timed(db.books.find(regex_query, projection).limit(PAGE).to_list(PAGE))
+
+        first.sort()
+        deep.sort()
+        deep_p50 = f"{deep[len(deep) // 2]:.1f}" if deep else "-"
+        print(f"{label:<24}{first[len(first) // 2]:>9.1f}{deep_p50:>13}{regex_ms:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=1_000, help="results to page through before the deep timing")
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    asyncio.run(run(args.books, args.runs, args.depth, args.backend, args.reuse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Response serialisation cost per page size: the former path (per-route `_id`
+stringification, a recursive `_serialize` walk, then stdlib json via
+JSONResponse) against the orjson response class used by `success()`.
+
+    python -m benchmarks.bench_serialization --sizes 1 20 100 1000
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+
+def book(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "name": f"Generated Book {i}",
+        "description": f"Description of generated book {i}. " * 20,
+        "category": "Poetry",
+        "price": {"including_tax": 51.77, "excluding_tax": 51.77},
+        "availability": "In stock (22 available)",
+        "num_reviews": 0,
+        "image_url": f"https://books.toscrape.com/media/cache/{i}.jpg",
+        "rating": 3,
+        "source_url": f"https://books.toscrape.com/catalogue/book_{i}/index.html",
+        "crawl_timestamp": datetime.utcnow(),
+        "raw_html_hash": "ab" * 32,
+        "etag": '"5e1c9f0a"',
+        "last_modified": "Wed, 05 Nov 2025 21:49:38 GMT",
+    }
+
+
+def legacy_serialize(obj):
+    """The recursive walk `success()` used to do before handing off to JSONResponse."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, dict):
+        return {k: legacy_serialize(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_serialize(v) for v in obj]
+    return obj
+
+
+def legacy(docs: list) -> bytes:
+    from fastapi.responses import JSONResponse
+
+    for d in docs:
+        d["_id"] = str(d["_id"])
+    payload = {"status": "success", "message": "Books fetched successfully", "data": legacy_serialize(docs)}
+    return JSONResponse(content=payload).body
+
+
+def current(docs: list) -> bytes:
+    from src.api.responses import success
+
+    return success("Books fetched successfully", data=docs).body
+
+
+def timed(fn, make_docs, repeat: int) -> float:
+    """Best-of-`repeat` microseconds, each run on fresh documents."""
+    best = float("inf")
+    for _ in range(repeat):
+        docs = make_docs()
+        started = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 20, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # Settings are validated on import; the benchmark never touches MongoDB
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("API_KEY", "bench")
+
+    print(f"{'books':>6}{'legacy us':>12}{'orjson us':>12}{'speedup':>10}{'bytes':>10}")
+    for size in args.sizes:
+        make_docs = lambda: [book(i) for i in range(size)]
+        old = timed(legacy, make_docs, args.repeat)
+        new = timed(current, make_docs, args.repeat)
+        print(f"{size:>6}{old:>12.0f}{new:>12.0f}{old / new:>9.1f}x{len(current(make_docs())):>10}")
+
+
+if __name__ == "__main__":
+    main()
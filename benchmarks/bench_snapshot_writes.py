@@ -0,0 +1,52 @@
+"""
+Snapshot-write benchmark: html_snapshots inserts and storage per daily run.
+
+The fixture site is served without validators so every book page is
+downloaded and goes through `upsert_book`; `--change-rate` of the books
+change between runs. Before content addressing every fetched page cost one
+snapshot insert, so the `legacy inserts` column is simply the books fetched.
+
+    python -m benchmarks.bench_snapshot_writes --pages 50 --runs 3 --change-rate 0.01
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.common import wipe
+from benchmarks.fixture_site import FixtureSite, serve
+
+
+async def run(site: FixtureSite, runs: int):
+    from src.crawler.crawler import Crawler
+    from src.crawler.http_client import close_http_client
+    from src.db import db
+
+    await wipe()
+
+    print(f"{'run':<6}{'legacy inserts':>16}{'inserts':>10}{'snapshot bytes':>16}")
+    for i in range(runs):
+        before = await db.html_snapshots.count_documents({})
+        await Crawler().run()
+        after = await db.html_snapshots.count_documents({})
+        stats = await db.command("collStats", "html_snapshots")
+        print(f"{i + 1:<6}{site.total_books:>16}{after - before:>10}{stats.get('storageSize', 0):>16}")
+        site.version += 1
+    await close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    site = FixtureSite(pages=args.pages, change_rate=args.change_rate, validators=False)
+    with serve(site) as base_url:
+        os.environ["START_URL"] = base_url
+        os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+        asyncio.run(run(site, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Catalogue statistics: ad-hoc aggregation over `books` vs reading the
+materialised `book_stats`.
+
+Seeds `--books` synthetic books into the MongoDB at MONGO_URI (database
+MONGO_DB, default `books_crawler_bench`), builds `book_stats` with the full
+recompute, then times `--runs` reads of each way and checks they agree:
+
+    python -m benchmarks.bench_stats --books 1000000 --runs 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.bench_pagination import seed
+
+
+async def run(books: int, runs: int, reuse: bool):
+    from src.db import db, ensure_indexes
+    from src.utils.stats import RECOMPUTE_PIPELINE, fold_groups, recompute_stats, summarise
+
+    if not reuse or await db.books.estimated_document_count() < books:
+        await seed(db, books)
+    await ensure_indexes()
+
+    started = time.perf_counter()
+    categories = await recompute_stats()
+    print(f"{books} books, {categories} categories; full recompute took {time.perf_counter() - started:.2f}s")
+
+    async def aggregate():
+        groups = await db.books.aggregate(RECOMPUTE_PIPELINE).to_list(length=None)
+        return summarise(list(fold_groups(groups).values()))
+
+    async def materialised():
+        return summarise(await db.book_stats.find({}).to_list(length=None))
+
+    assert await aggregate() == await materialised()
+    print(f"{'read':<14}{'p50 ms':>9}{'max ms':>9}")
+    for label, read in (("aggregation", aggregate), ("book_stats", materialised)):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await read()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"{label:<14}{timings[len(timings) // 2]:>9.2f}{timings[-1]:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="keep an existing seeded collection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_DB", "books_crawler_bench")
+    asyncio.run(run(args.books, args.runs, args.reuse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Helpers shared by the crawl benchmarks.
+
+`src.db` is imported inside `wipe()` rather than at module level, since the
+benchmarks set MONGO_DB / START_URL in the environment before the crawler's
+settings are first read.
+"""
+
+# Everything a crawl writes to, so each measured crawl starts from nothing
+CRAWL_COLLECTIONS = [
+    "books", "book_history", "html_snapshots", "listing_pages", "book_stats",
+    "recrawl_schedule", "frontier", "crawl_runs",
+]
+
+
+async def wipe():
+    """Drop the crawl collections of the benchmark database and recreate their indexes."""
+    from src.db import db, ensure_indexes
+
+    for name in CRAWL_COLLECTIONS:
+        await db[name].drop()
+    await ensure_indexes()
@@ -0,0 +1,254 @@
+# fixture_site.py
+"""
+A local, generated clone of the books.toscrape catalogue served over ASGI.
+
+The markup mirrors the selectors used by `src/utils/parser.py`, and every
+response carries an ETag and Last-Modified so conditional GETs can be
+benchmarked without touching the real site.
+"""
+import asyncio
+import hashlib
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+
+RATING_WORDS = ["One", "Two", "Three", "Four", "Five"]
+CATEGORIES = ["Poetry", "Travel", "Mystery", "History", "Science", "Fiction", "Music", "Fantasy"]
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>All products | Page {page} of {pages}</title></head>
+<body><section><ol class="row">
+{items}
+</ol>
+<ul class="pager">{next_link}</ul>
+</section></body></html>"""
+
+LISTING_ITEM = """<li><article class="product_pod">
+<div class="image_container"><a href="{slug}/index.html"><img src="../media/cache/{i}.jpg" alt="{title}" class="thumbnail"></a></div>
+<p class="star-rating {rating}"><i class="icon-star"></i></p>
+<h3><a href="{slug}/index.html" title="{title}">{title}</a></h3>
+<div class="product_price"><p class="price_color">£{price:.2f}</p></div>
+</article></li>"""
+
+BOOK_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title} | Books to Scrape - Sandbox</title></head>
+<body>
+<ul class="breadcrumb">
+<li><a href="../../index.html">Home</a></li>
+<li><a href="../category/books_1/index.html">Books</a></li>
+<li><a href="../category/books/{category_slug}/index.html">{category}</a></li>
+<li class="active">{title}</li>
+</ul>
+<article class="product_page">
+<div class="row">
+<div class="col-sm-6"><div id="product_gallery" class="carousel"><div class="thumbnail"><div class="carousel-inner">
+<div class="item active"><img src="../../media/cache/{i}.jpg" alt="{title}" /></div>
+</div></div></div></div>
+<div class="col-sm-6 product_main">
+<h1>{title}</h1>
+<p class="price_color">£{price:.2f}</p>
+<p class="instock availability"><i class="icon-ok"></i> In stock ({stock} available)</p>
+<p class="star-rating {rating}"><i class="icon-star"></i></p>
+</div>
+</div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+<p>{description}</p>
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">
+<tr><th>UPC</th><td>{upc}</td></tr>
+<tr><th>Product Type</th><td>Books</td></tr>
+<tr><th>Price (excl. tax)</th><td>£{price:.2f}</td></tr>
+<tr><th>Price (incl. tax)</th><td>£{price:.2f}</td></tr>
+<tr><th>Tax</th><td>£0.00</td></tr>
+<tr><th>Availability</th><td>In stock ({stock} available)</td></tr>
+<tr><th>Number of reviews</th><td>{reviews}</td></tr>
+</table>
+</article>
+</body></html>"""
+
+
+class FixtureSite:
+    """
+    ASGI app serving `pages` listing pages of `per_page` books each.
+
+    `version` can be bumped to change a fraction of the books (`change_rate`),
+    `latency` adds a fixed delay to every response and `error_rate` answers
+    that share of requests (drawn from `seed`) with a 503.
+    """
+
+    def __init__(self, pages: int = 50, per_page: int = 20, latency: float = 0.0,
+                 change_rate: float = 0.0, validators: bool = True, error_rate: float = 0.0, seed: int = 0):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.change_rate = change_rate
+        self.validators = validators
+        self.error_rate = error_rate
+        self.version = 0
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0, "bytes": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def total_books(self) -> int:
+        return self.pages * self.per_page
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": 0, "not_modified": 0, "errors": 0, "bytes": 0}
+
+    def _book_version(self, i: int) -> int:
+        # Every `version` bump touches roughly `change_rate` of the catalogue
+        if not self.change_rate:
+            return 0
+        step = max(1, round(1 / self.change_rate))
+        return self.version if i % step == 0 else 0
+
+    def _book_fields(self, i: int) -> dict:
+        v = self._book_version(i)
+        return {
+            "i": i,
+            "slug": f"book-{i}_{i}",
+            "title": f"Generated Book {i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "category_slug": CATEGORIES[i % len(CATEGORIES)].lower() + f"_{i % len(CATEGORIES) + 2}",
+            "price": 10 + (i * 7 + v) % 50 + 0.99,
+            "stock": 1 + (i + v) % 22,
+            "rating": RATING_WORDS[i % 5],
+            "reviews": 0,
+            "upc": hashlib.md5(str(i).encode()).hexdigest()[:16],
+            "description": f"Description of generated book {i}. " * 20,
+        }
+
+    def render_listing(self, page: int) -> bytes:
+        start = (page - 1) * self.per_page
+        items = "\n".join(
+            LISTING_ITEM.format(**self._book_fields(i)) for i in range(start, start + self.per_page)
+        )
+        next_link = f'<li class="next"><a href="page-{page + 1}.html">next</a></li>' if page < self.pages else ""
+        return LISTING_TEMPLATE.format(page=page, pages=self.pages, items=items, next_link=next_link).encode()
+
+    def render_book(self, i: int) -> bytes:
+        return BOOK_TEMPLATE.format(**self._book_fields(i)).encode()
+
+    def route(self, path: str) -> bytes | None:
+        if path.startswith("/catalogue/page-") and path.endswith(".html"):
+            page = int(path[len("/catalogue/page-"):-len(".html")])
+            return self.render_listing(page) if 1 <= page <= self.pages else None
+        if path.startswith("/catalogue/book-") and path.endswith("/index.html"):
+            i = int(path.split("_")[-1].split("/")[0])
+            return self.render_book(i) if 0 <= i < self.total_books else None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            await self._respond(send, 503, b"busy", [])
+            return
+
+        body = self.route(scope["path"])
+        if body is None:
+            await self._respond(send, 404, b"not found", [])
+            return
+
+        headers = [(b"content-type", b"text/html; charset=utf-8")]
+        if self.validators:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            last_modified = formatdate(1_700_000_000 + self.version * 86400, usegmt=True)
+            headers += [(b"etag", etag.encode()), (b"last-modified", last_modified.encode())]
+            request_headers = dict(scope["headers"])
+            if_none_match = request_headers.get(b"if-none-match")
+            if_modified_since = request_headers.get(b"if-modified-since")
+            if (if_none_match is not None and if_none_match.decode() == etag) or (
+                if_none_match is None and if_modified_since is not None
+                and if_modified_since.decode() == last_modified
+            ):
+                await self._respond(send, 304, b"", headers)
+                return
+        await self._respond(send, 200, body, headers)
+
+    async def _respond(self, send, status: int, body: bytes, headers: list):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += len(body)
+            if status == 304:
+                self.stats["not_modified"] += 1
+            elif status >= 500:
+                self.stats["errors"] += 1
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers + [(b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(app, port: int | None = None):
+    """Run `app` with uvicorn in a background thread and yield its base URL."""
+    import uvicorn
+
+    port = port or _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+@contextmanager
+def serve_h2(app, port: int | None = None):
+    """
+    Run `app` with hypercorn, which speaks both HTTP/1.1 and cleartext HTTP/2
+    (prior knowledge) on the same port. Needs `pip install hypercorn`.
+    """
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"127.0.0.1:{port or _free_port()}"]
+    config.loglevel = "WARNING"
+    config.accesslog = None
+    loop = asyncio.new_event_loop()
+    shutdown = asyncio.Event()
+    started = threading.Event()
+
+    async def run():
+        loop.call_soon(started.set)
+        await hypercorn_serve(app, config, shutdown_trigger=shutdown.wait)
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+    thread.start()
+    started.wait()
+    time.sleep(0.2)  # let hypercorn bind before the first request
+    try:
+        yield f"http://{config.bind[0]}/"
+    finally:
+        loop.call_soon_threadsafe(shutdown.set)
+        thread.join()
+        loop.close()
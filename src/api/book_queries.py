@@ -0,0 +1,101 @@
+"""
+Query building, field projection and plan inspection for GET /books.
+
+Every filter/sort combination the endpoint accepts maps to one index from
+`src.db.book_index_keys`, which is passed as a hint so the planner never
+falls back to a collection scan or an in-memory sort.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+
+from src.db import book_index_keys
+
+# Fields a client may ask for with `fields=`
+PUBLIC_BOOK_FIELDS = (
+    "name", "description", "category", "price", "availability", "num_reviews",
+    "image_url", "rating", "source_url", "crawl_timestamp", "has_changed",
+)
+# List views skip the long description and crawl metadata unless asked for
+COMPACT_BOOK_FIELDS = (
+    "name", "category", "price", "availability", "num_reviews", "image_url", "rating", "source_url",
+)
+
+# Plan stages that mean the query is not served by an index
+BAD_STAGES = ("COLLSCAN", "SORT")
+
+
+def books_filter(category: Optional[str] = None, rating: Optional[int] = None,
+                 min_price: Optional[float] = None, max_price: Optional[float] = None) -> dict:
+    query = {}
+    if category:
+        query["category"] = category
+    if rating:
+        query["rating"] = rating
+    if min_price is not None or max_price is not None:
+        query["price.including_tax"] = {}
+        if min_price is not None:
+            query["price.including_tax"]["$gte"] = min_price
+        if max_price is not None:
+            query["price.including_tax"]["$lte"] = max_price
+    return query
+
+
+def books_projection(fields: Optional[str], default=COMPACT_BOOK_FIELDS, always=()) -> dict:
+    """
+    Inclusion projection for a `fields=` parameter: a comma-separated list of
+    public fields, "all" for every public field, or empty for `default`.
+    `always` lists fields the caller needs regardless (e.g. the sort key).
+    """
+    if not fields:
+        selected = list(default)
+    elif fields.strip() == "all":
+        selected = list(PUBLIC_BOOK_FIELDS)
+    else:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted(set(selected) - set(PUBLIC_BOOK_FIELDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    projection = {f: 1 for f in selected}
+    for f in always:
+        # A parent field already covers a dotted path such as price.including_tax
+        if f != "_id" and f.split(".")[0] not in projection:
+            projection[f] = 1
+    return projection
+
+
+def books_hint(query: dict, sort_field: str, direction: int) -> list:
+    """Index keys for `query` (as built by `books_filter`) sorted on `sort_field`."""
+    equality = [f for f in ("category", "rating") if f in query]
+    return book_index_keys(equality, sort_field, direction)
+
+
+def plan_stages(plan: dict) -> list:
+    """All stage names of the winning plan, outermost first."""
+    stages = []
+    node = plan.get("queryPlanner", {}).get("winningPlan", {})
+    # Slot-based engine plans nest the classic tree under queryPlan
+    node = node.get("queryPlan", node)
+    pending = [node]
+    while pending:
+        node = pending.pop(0)
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+    return stages
+
+
+def explain_summary(plan: dict) -> dict:
+    """The parts of `explain()` worth returning from the API."""
+    stats = plan.get("executionStats", {})
+    stages = plan_stages(plan)
+    return {
+        "stages": stages,
+        "index_scan_only": not any(stage in BAD_STAGES for stage in stages),
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
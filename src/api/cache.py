@@ -0,0 +1,117 @@
+"""
+Read-through cache for API responses.
+
+Entries hold the serialised response body, keyed by the request path, the
+normalised query parameters and the current books generation
+(`src.utils.cache_generation`). A crawl that inserts or updates books bumps
+the generation, so every later lookup misses and stale entries simply age
+out of the LRU.
+
+The default backend is an in-process LRU with a TTL. `CACHE_BACKEND` may
+instead name a factory as "package.module:callable"; it is called with
+(max_entries, ttl) and must return an object with async `get(key)`,
+`set(key, value)` and `clear()`, plus `__len__`.
+"""
+import importlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from src.utils.cache_generation import BooksGeneration, books_generation
+from src.utils.config import settings
+
+
+class MemoryBackend:
+    """LRU of at most `max_entries` values, each expiring `ttl` seconds after it was set."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def clear(self):
+        self._entries.clear()
+
+
+def load_backend(name: str, max_entries: int, ttl: float):
+    if name == "memory":
+        return MemoryBackend(max_entries, ttl)
+    module, _, factory = name.partition(":")
+    return getattr(importlib.import_module(module), factory)(max_entries, ttl)
+
+
+class ResponseCache:
+    def __init__(self, backend, enabled: bool = True, generation: BooksGeneration = books_generation):
+        self.backend = backend
+        self.enabled = enabled
+        self.generation = generation
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache":
+        backend = load_backend(settings.CACHE_BACKEND, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL)
+        return cls(backend, settings.CACHE_ENABLED)
+
+    @staticmethod
+    def key_for(request: Request, generation: int) -> str:
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{generation}:{request.url.path}?{params}"
+
+    async def lookup(self, request: Request) -> Optional[Response]:
+        """The cached response for `request`, or None (counted as a miss)."""
+        if not self.enabled:
+            return None
+        # Keyed by the generation seen *before* querying, so a crawl landing
+        # mid-request cannot get stale data stored under the new generation
+        request.state.cache_key = self.key_for(request, await self.generation.refresh())
+        body = await self.backend.get(request.state.cache_key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    async def store(self, request: Request, response: Response) -> Response:
+        """Cache a successful response for `request` and return it."""
+        key = getattr(request.state, "cache_key", None)
+        if self.enabled and key and response.status_code == 200:
+            await self.backend.set(key, response.body)
+        return response
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend),
+            "generation": self.generation.value,
+        }
+
+
+response_cache = ResponseCache.from_settings()
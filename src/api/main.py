@@ -1,17 +1,20 @@
 # src/api/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
 from .routers import crawler, books
 from .dependencies import limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 from slowapi import _rate_limit_exceeded_handler
 from ..utils.config import settings
+from ..utils.metrics import CONTENT_TYPE, metrics
+from .responses import ORJSONResponse
 import sys
 import logging
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="BooksToScrape API", version="1.0")
+app = FastAPI(title="BooksToScrape API", version="1.0", default_response_class=ORJSONResponse)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -40,6 +43,13 @@ async def root():
     from ..utils.helpers import now_utc
     return {"message": "BooksToScrape crawler API running.", "time": now_utc()}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Crawl metrics in the Prometheus text format (for crawls started through this API)."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_handler(request, exc):
     return {"status": "error", "message": "Rate limit exceeded"}
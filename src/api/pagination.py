@@ -0,0 +1,94 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of `.skip(n)`, which makes MongoDB walk and discard n documents on
+every request, each page ends with an opaque token holding the sort key and
+`_id` of its last document; the next page starts strictly after it, so deep
+pages cost the same as the first one given an index on (sort key, _id).
+
+MongoDB sorts null/missing values before every number, so they come first
+in ascending order and last in descending order; `after_filter` follows
+the same rule.
+"""
+import base64
+import binascii
+from typing import Any, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException
+
+CHANGES_SORT = ("ts", -1)
+
+
+def sort_spec(field: str, direction: int) -> list:
+    if field == "_id":
+        return [("_id", direction)]
+    return [(field, direction), ("_id", direction)]
+
+
+def encode_cursor(scope: str, doc: dict, field: str) -> str:
+    """Token pointing just after `doc` in a listing sorted on `field`."""
+    key = [_get(doc, field), doc["_id"]] if field != "_id" else [doc["_id"]]
+    raw = json_util.dumps({"s": scope, "k": key}, json_options=json_util.CANONICAL_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, scope: str) -> list:
+    """Sort key stored in `token`; 400 if it is malformed or from another listing."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json_util.loads(raw)
+        key = payload["k"]
+        valid = payload["s"] == scope and isinstance(key, list) and key
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def after_filter(field: str, direction: int, key: list) -> dict:
+    """Query matching the documents that sort strictly after `key`."""
+    if field == "_id":
+        return {"_id": {"$gt" if direction == 1 else "$lt": key[0]}}
+
+    value, last_id = key
+    cmp = "$gt" if direction == 1 else "$lt"
+    same_value_after = {field: value, "_id": {cmp: last_id}}
+    if value is None:
+        if direction == 1:
+            # Nulls sort first: the rest of the nulls, then every real value
+            return {"$or": [same_value_after, {field: {"$ne": None}}]}
+        return same_value_after
+    branches = [{field: {cmp: value}}, same_value_after]
+    if direction == -1:
+        # Nulls sort last when descending
+        branches.append({field: None})
+    return {"$or": branches}
+
+
+def paginate(query: dict, field: str, direction: int, cursor: Optional[str], scope: str) -> Tuple[dict, list]:
+    """Return (filter, sort) for the page after `cursor` of a listing of `query`."""
+    if cursor:
+        after = after_filter(field, direction, decode_cursor(cursor, scope))
+        query = {"$and": [query, after]} if query else after
+    return query, sort_spec(field, direction)
+
+
+def next_cursor(docs: list, limit: int, scope: str, field: str) -> Optional[str]:
+    """
+    Token for the next page, given up to `limit + 1` fetched docs (the extra
+    one only tells us there is more). Trims `docs` to `limit` in place.
+    """
+    if len(docs) <= limit:
+        return None
+    del docs[limit:]
+    return encode_cursor(scope, docs[-1], field)
+
+
+def _get(doc: dict, dotted: str) -> Any:
+    for part in dotted.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
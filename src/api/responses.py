@@ -1,27 +1,40 @@
+import orjson
+from bson import ObjectId
 from fastapi.responses import JSONResponse
-from datetime import datetime
-
-def _serialize(obj):
-    """Convert non-serializable objects (like datetime) to JSON-safe values."""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    elif isinstance(obj, dict):
-        return {k: _serialize(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_serialize(v) for v in obj]
-    return obj
-
-def success(message: str, data=None):
+
+
+def _default(obj):
+    """orjson fallback for the BSON types found in our documents."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded by orjson in a single pass: datetimes natively,
+    ObjectIds as strings, so documents can be returned straight from Mongo.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default)
+
+
+def success(message: str, data=None, next_cursor=None):
     payload = {"status": "success", "message": message}
     if data is not None:
-        payload["data"] = _serialize(data)
-    return JSONResponse(content=payload)
+        payload["data"] = data
+    if next_cursor is not None:
+        payload["next_cursor"] = next_cursor
+    return ORJSONResponse(content=payload)
 
 def warning(message: str):
-    return JSONResponse(content={"status": "warning", "message": message})
+    return ORJSONResponse(content={"status": "warning", "message": message})
 
 def error(message: str, status_code=500):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status_code,
         content={"status": "error", "message": message},
     )
@@ -1,11 +1,24 @@
 from fastapi import APIRouter, HTTPException, Query, Security, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
 from typing import Optional, List
+from datetime import datetime, timezone
 from bson import ObjectId
-from src.db import db
+from src.db import db, BOOK_SORTS, DEFAULT_BOOK_SORT
 from ..dependencies import get_api_key, limiter
 from src.utils.helpers import now_utc
 from src.api.responses import success, warning, error
+from src.api.pagination import CHANGES_SORT, paginate, next_cursor
+from src.api.book_queries import (
+    PUBLIC_BOOK_FIELDS, books_filter, books_hint, books_projection, explain_summary,
+)
+from src.api.export import FORMATS, csv_columns, export_stream
+from src.api.search import search_books
+from src.utils.history import TRACKED_FIELDS, complete_changes, state_at
+from src.utils.stats import summarise
+from src.api.cache import response_cache
+from src.utils.cache_generation import books_generation
+from src.utils.config import settings
 
 router = APIRouter()
 
@@ -35,17 +48,20 @@ class BooksListResponse(BaseModel):
     status: str
     message: str
     data: List[BookResponse]
+    next_cursor: Optional[str] = None
 
 class ChangeResponse(BaseModel):
     id: str = Field(..., alias="_id")
     book_id: Optional[str]
-    previous: dict
+    changes: dict  # {dotted path: {"old", "new"}}
+    previous: Optional[dict] = None  # mode=full
     ts: str
 
 class ChangesListResponse(BaseModel):
     status: str
     message: str
     data: List[ChangeResponse]
+    next_cursor: Optional[str] = None
 
 # ----------------------------
 # Endpoints
@@ -60,39 +76,100 @@ async def list_books(
     max_price: Optional[float] = None,
     rating: Optional[int] = None,
     sort_by: Optional[str] = None,
-    limit: int = 20,
-    skip: int = 0,
+    limit: int = Query(20, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use `cursor` instead"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, or `all`; defaults to a compact set without description"
+    ),
+    explain: bool = Query(False, description="Debug: return the query plan instead of the books"),
     api_key: str = Security(get_api_key)
 ):
-    query = {}
-    if category:
-        query["category"] = category
-    if rating:
-        query["rating"] = rating
-    if min_price is not None or max_price is not None:
-        query["price.including_tax"] = {}
-        if min_price is not None:
-            query["price.including_tax"]["$gte"] = min_price
-        if max_price is not None:
-            query["price.including_tax"]["$lte"] = max_price
-
-    cursor = db.books.find(query, {"raw_html_gzip": 0})
-    if sort_by:
-        sort_field = {
-            "rating": ("rating", -1),
-            "price": ("price.including_tax", 1),
-            "reviews": ("num_reviews", -1)
-        }.get(sort_by)
-        if sort_field:
-            cursor = cursor.sort(*sort_field)
-
-    cursor = cursor.skip(skip).limit(limit)
-    books = []
-    async for b in cursor:
-        b["_id"] = str(b["_id"])
-        books.append(b)
-
-    return success("Books fetched successfully", data=books)
+    if not explain:
+        cached = await response_cache.lookup(request)
+        if cached:
+            return cached
+
+    query = books_filter(category, rating, min_price, max_price)
+    field, direction = BOOK_SORTS.get(sort_by, DEFAULT_BOOK_SORT)
+    hint = books_hint(query, field, direction)
+    # The sort key is always returned, since the next cursor is built from it
+    projection = books_projection(fields, always=(field,))
+    scope = f"books:{field}"
+    query, sort = paginate(query, field, direction, cursor, scope)
+    # One extra document tells us whether there is a next page
+    docs = db.books.find(query, projection).sort(sort).hint(hint)
+    if skip and not cursor:
+        docs = docs.skip(skip)
+    if explain:
+        plan = await docs.limit(limit + 1).explain()
+        return success("Query plan", data={"filter": query, "sort": sort, "hint": hint, **explain_summary(plan)})
+    books = await docs.limit(limit + 1).to_list(length=limit + 1)
+    token = next_cursor(books, limit, scope, field)
+
+    return await response_cache.store(
+        request, success("Books fetched successfully", data=books, next_cursor=token)
+    )
+
+
+# Declared before /books/{book_id} so "search" is not taken for an id
+@router.get("/books/search", response_model=BooksListResponse)
+@limiter.limit("100/hour")
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to look for in the name and description"),
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    rating: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or `all`"),
+    api_key: str = Security(get_api_key)
+):
+    """Books matching `q`, most relevant first; each carries its relevance `score`."""
+    cached = await response_cache.lookup(request)
+    if cached:
+        return cached
+
+    query = books_filter(category, rating, min_price, max_price)
+    books, token = await search_books(q, query, books_projection(fields), limit, cursor)
+
+    return await response_cache.store(
+        request, success("Books fetched successfully", data=books, next_cursor=token)
+    )
+
+
+# Declared before /books/{book_id} so "export" is not taken for an id
+@router.get("/books/export")
+@limiter.limit("10/hour")
+async def export_books(
+    request: Request,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    rating: Optional[int] = None,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Compress the body (served as a .gz file)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export; defaults to every public field"),
+    api_key: str = Security(get_api_key)
+):
+    """Stream every book matching the filters, in `_id` order, as NDJSON or CSV."""
+    query = books_filter(category, rating, min_price, max_price)
+    projection = books_projection(fields, default=PUBLIC_BOOK_FIELDS)
+    cursor = (
+        db.books.find(query, projection)
+        .sort("_id", 1)
+        .hint(books_hint(query, "_id", 1))
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+
+    filename = f"books.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_stream(cursor, fmt, csv_columns(projection), gzip=gzip),
+        media_type="application/gzip" if gzip else FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/books/{book_id}", response_model=BookResponse)
@@ -103,44 +180,89 @@ async def get_book(request: Request, book_id: str, api_key: str = Security(get_a
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ID format")
 
-    book = await db.books.find_one({"_id": oid}, {"raw_html_gzip": 0})
+    cached = await response_cache.lookup(request)
+    if cached:
+        return cached
+
+    book = await db.books.find_one({"_id": oid}, {f: 1 for f in PUBLIC_BOOK_FIELDS})
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    book["_id"] = str(book["_id"])
-    return success("Book fetched successfully", data=book)
+    return await response_cache.store(request, success("Book fetched successfully", data=book))
 
 
 @router.get("/changes", response_model=ChangesListResponse)
 @limiter.limit("100/hour")
 async def get_recent_changes(
     request: Request,
-    limit: int = 20,
-    skip: int = 0,
+    limit: int = Query(20, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Use `cursor` instead"),
+    mode: str = Query("full", pattern="^(full|diff)$",
+                      description="`full` also embeds the book as it was before each change, `diff` only the changed fields"),
     api_key: str = Security(get_api_key)
 ):
-    cursor = db.book_history.find({}).sort("ts", -1).skip(skip).limit(limit)
-    changes = []
-    async for c in cursor:
-        c["_id"] = str(c["_id"])
-        if "book_id" in c:
-            c["book_id"] = str(c["book_id"])
-        if isinstance(c.get("ts"), (bytes, bytearray)):
-            c["ts"] = c["ts"].decode("utf-8")
-        elif hasattr(c.get("ts"), "isoformat"):
-            c["ts"] = c["ts"].isoformat()
+    field, direction = CHANGES_SORT
+    query, sort = paginate({}, field, direction, cursor, "changes")
+    docs = db.book_history.find(query).sort(sort)
+    if skip and not cursor:
+        docs = docs.skip(skip)
+    changes = await docs.limit(limit + 1).to_list(length=limit + 1)
+    token = next_cursor(changes, limit, "changes", field)
+    # Without a cursor the page starts at the newest change
+    await complete_changes(changes, previous=mode == "full", latest=not cursor and not skip)
 
-        # Convert nested ObjectIds inside 'previous'
-        prev = c.get("previous")
-        if isinstance(prev, dict):
-            prev["_id"] = str(prev["_id"]) if "_id" in prev else None
-            if "book_id" in prev and isinstance(prev["book_id"], ObjectId):
-                prev["book_id"] = str(prev["book_id"])
+    return success("Recent changes fetched successfully", data=changes, next_cursor=token)
+
+
+@router.get("/books/{book_id}/history")
+@limiter.limit("100/hour")
+async def get_book_history(
+    request: Request,
+    book_id: str,
+    at: Optional[datetime] = Query(None, description="Return the book as it was at this time instead"),
+    limit: int = Query(100, ge=1, le=1000),
+    api_key: str = Security(get_api_key)
+):
+    try:
+        oid = ObjectId(book_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+    book = await db.books.find_one({"_id": oid}, {f: 1 for f in TRACKED_FIELDS})
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    if at is None:
+        rows = await db.book_history.find({"book_id": oid}).sort([("ts", -1), ("_id", -1)]).to_list(length=limit)
+        await complete_changes(rows, latest=True)
+        return success("Book history fetched successfully", data=rows)
+
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    # A book's ObjectId records when it was first stored
+    if oid.generation_time.replace(tzinfo=None) > at:
+        raise HTTPException(status_code=404, detail="Book did not exist at that time")
+    newer = db.book_history.find({"book_id": oid, "ts": {"$gt": at}}).sort([("ts", -1), ("_id", -1)])
+    newer = await newer.to_list(length=None)
+    return success("Book state fetched successfully", data={"_id": oid, "at": at, **state_at(book, newer, at)})
+
+
+@router.get("/stats")
+@limiter.limit("100/hour")
+async def get_stats(request: Request, api_key: str = Security(get_api_key)):
+    """Per-category counts, price min/avg/max and rating distribution, plus overall totals."""
+    cached = await response_cache.lookup(request)
+    if cached:
+        return cached
 
-        changes.append(c)
+    docs = await db.book_stats.find({}).to_list(length=None)
+    return await response_cache.store(request, success("Stats fetched successfully", data=summarise(docs)))
 
-    return success("Recent changes fetched successfully", data=changes)
 
+@router.get("/cache/stats")
+async def cache_stats(api_key: str = Security(get_api_key)):
+    return success("Cache stats fetched", data=response_cache.stats())
 
 
 # This is just for testing purposes
@@ -150,4 +272,6 @@ async def clear_all_books(request: Request, confirm: bool = Query(False), api_ke
     if not confirm:
         return warning("Pass ?confirm=true to delete all books.")
     result = await db.books.delete_many({})
+    await db.book_stats.delete_many({})
+    await books_generation.bump()
     return success(f"Deleted {result.deleted_count} books")
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import Optional
 import asyncio
+from contextlib import nullcontext
 from ..dependencies import get_api_key
 from src.utils.logger import logger
 from src.db import ensure_indexes
 from src.crawler.crawler import Crawler
+from src.crawler.http_client import close_http_client
 from src.utils.helpers import now_utc
+from src.utils.profiling import PROFILE_MODES, CrawlProfiler
 from src.api.responses import success
 
 router = APIRouter()
@@ -20,6 +23,7 @@ crawler_task: Optional[asyncio.Task] = None
 class CrawlStatusResponse(BaseModel):
     running: bool
     visited_count: int
+    throttle: dict
     timestamp: str
 
 class CrawlActionResponse(BaseModel):
@@ -42,6 +46,9 @@ async def shutdown():
     global crawler_instance
     if crawler_instance:
         crawler_instance._stop = True
+    if crawler_task and not crawler_task.done():
+        await asyncio.gather(crawler_task, return_exceptions=True)
+    await close_http_client()
     logger.info("🛑 API shutting down.")
 
 # ----------------------------
@@ -56,26 +63,40 @@ async def get_status(api_key: str = Depends(get_api_key)):
     return success("Crawler status fetched", data={
         "running": running,
         "visited_count": visited_count,
+        "throttle": crawler_instance.throttle.snapshot() if crawler_instance else {},
         "timestamp": now_utc()
     })
 
 
 @router.post("/crawl/start", response_model=CrawlActionResponse)
-async def start_crawl(background_tasks: BackgroundTasks, api_key: str = Depends(get_api_key)):
+async def start_crawl(
+    background_tasks: BackgroundTasks,
+    profile: Optional[str] = Query(None, description=f"profile the crawl into reports/: {' | '.join(PROFILE_MODES)}"),
+    api_key: str = Depends(get_api_key),
+):
     global crawler_instance, crawler_task
     if crawler_task and not crawler_task.done():
         raise HTTPException(status_code=400, detail="Crawler is already running")
+    if profile is not None and profile not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"profile must be one of {', '.join(PROFILE_MODES)}")
+    # Profiles the whole event loop, so API requests served meanwhile show up too
+    profiler = CrawlProfiler(profile) if profile else nullcontext()
+
+    async def discard(change):
+        # Only counted (crawler.change_count); reports come from the daily crawl
+        pass
 
     async def run():
         try:
-            await crawler_instance.run()
+            with profiler:
+                await crawler_instance.run(on_change=discard)
         except Exception as e:
             logger.error(f"Crawler failed: {e}")
         finally:
             logger.info("Crawler finished.")
 
     crawler_task = asyncio.create_task(run())
-    logger.info("🚀 Crawler started in background.")
+    logger.info(f"🚀 Crawler started in background{f' (profiling: {profile})' if profile else ''}.")
 
     return success("Crawl has started", data={"message": "Crawl has started", "ts": now_utc()})
 
@@ -0,0 +1,167 @@
+"""
+Full-text search for GET /books/search.
+
+The default backend runs a `$text` query against the `books_text` index
+(name weighted above description, see `src.db.TEXT_INDEX_WEIGHTS`) with
+the usual /books filters as pre-filters, and pages by (relevance, _id)
+with the same opaque cursors as the other listings. Text scores are
+deterministic for a given query, so "strictly after the last score/_id"
+is a stable keyset.
+
+`SEARCH_BACKEND=memory` swaps in an in-process inverted index built from
+`books`, for environments without a real MongoDB text index (tests,
+mongomock). It understands plain terms only, not phrases or negation, and
+rebuilds itself whenever a crawl bumps the cache generation.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.api.pagination import decode_cursor, next_cursor, paginate
+from src.db import TEXT_INDEX_WEIGHTS, db
+from src.utils.cache_generation import books_generation
+from src.utils.config import settings
+from src.utils.logger import logger
+
+SCORE_FIELD = "score"
+
+# Words MongoDB's English text index ignores, trimmed to the common ones
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def search_scope(q: str) -> str:
+    # Cursors only make sense for the query they came from
+    return f"search:{q.strip().lower()}"
+
+
+async def mongo_search(q: str, query: dict, projection: dict, limit: int, cursor: Optional[str]) -> Tuple[list, Optional[str]]:
+    scope = search_scope(q)
+    after, sort = paginate({}, SCORE_FIELD, -1, cursor, scope)
+    pipeline = [
+        {"$match": {"$text": {"$search": q}, **query}},
+        {"$addFields": {SCORE_FIELD: {"$meta": "textScore"}}},
+    ]
+    if after:
+        pipeline.append({"$match": after})
+    pipeline += [
+        {"$sort": dict(sort)},
+        {"$limit": limit + 1},
+        {"$project": {**projection, SCORE_FIELD: 1}},
+    ]
+    docs = await db.books.aggregate(pipeline).to_list(length=limit + 1)
+    return docs, next_cursor(docs, limit, scope, SCORE_FIELD)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased words minus stop words, with a plural "s" stripped."""
+    tokens = []
+    for word in TOKEN.findall((text or "").lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    """Evaluate a filter built by `books_filter` against an indexed document."""
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if value is None:
+                return False
+            if "$gte" in condition and value < condition["$gte"]:
+                return False
+            if "$lte" in condition and value > condition["$lte"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class InvertedIndex:
+    """
+    term -> {_id: score} over the text-indexed fields, plus the fields the
+    /books filters use. Scores follow the shape of MongoDB's: for each
+    field, weight x occurrences of the term, damped by the field's length.
+    """
+
+    FILTER_FIELDS = ("category", "rating", "price.including_tax")
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[object, float]] = defaultdict(dict)
+        self.docs: Dict[object, dict] = {}
+
+    def add(self, doc: dict):
+        self.docs[doc["_id"]] = {
+            "category": doc.get("category"),
+            "rating": doc.get("rating"),
+            "price.including_tax": (doc.get("price") or {}).get("including_tax"),
+        }
+        scores: Counter = Counter()
+        for field, weight in TEXT_INDEX_WEIGHTS.items():
+            tokens = tokenize(doc.get(field))
+            if not tokens:
+                continue
+            damping = 1 + math.log(len(tokens))
+            for term, count in Counter(tokens).items():
+                scores[term] += weight * count / damping
+        for term, score in scores.items():
+            self.postings[term][doc["_id"]] = score
+
+    def search(self, q: str, query: dict) -> List[Tuple[float, object]]:
+        """(score, _id) of every match, best first, ties by _id descending."""
+        totals: Counter = Counter()
+        for term in set(tokenize(q)):
+            for book_id, score in self.postings.get(term, {}).items():
+                totals[book_id] += score
+        hits = [(score, book_id) for book_id, score in totals.items() if _matches(self.docs[book_id], query)]
+        hits.sort(reverse=True)
+        return hits
+
+
+class MemorySearch:
+    def __init__(self):
+        self.index: Optional[InvertedIndex] = None
+        self.generation = None
+
+    async def _current_index(self) -> InvertedIndex:
+        generation = await books_generation.refresh()
+        if self.index is None or self.generation != generation:
+            index = InvertedIndex()
+            fields = {f: 1 for f in (*TEXT_INDEX_WEIGHTS, *InvertedIndex.FILTER_FIELDS)}
+            async for doc in db.books.find({}, fields):
+                index.add(doc)
+            self.index, self.generation = index, generation
+            logger.info(f"🔎 Built the in-memory search index over {len(index.docs)} books")
+        return self.index
+
+    async def __call__(self, q: str, query: dict, projection: dict, limit: int,
+                       cursor: Optional[str]) -> Tuple[list, Optional[str]]:
+        index = await self._current_index()
+        scope = search_scope(q)
+        hits = index.search(q, query)
+        if cursor:
+            # Same keyset as the Mongo backend: strictly after (score, _id), descending
+            last = tuple(decode_cursor(cursor, scope))
+            hits = [hit for hit in hits if hit < last]
+        page = hits[:limit + 1]
+        found = {d["_id"]: d async for d in db.books.find({"_id": {"$in": [i for _, i in page]}}, projection)}
+        docs = [{**found[i], SCORE_FIELD: s} for s, i in page if i in found]
+        return docs, next_cursor(docs, limit, scope, SCORE_FIELD)
+
+
+memory_search = MemorySearch()
+
+
+async def search_books(q: str, query: dict, projection: dict, limit: int,
+                       cursor: Optional[str]) -> Tuple[list, Optional[str]]:
+    """One page of books matching `q` and `query`, best first, and the next cursor."""
+    if settings.SEARCH_BACKEND == "memory":
+        return await memory_search(q, query, projection, limit, cursor)
+    return await mongo_search(q, query, projection, limit, cursor)
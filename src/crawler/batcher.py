@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from ..utils.logger import logger
+
+
+class WriteBatcher:
+    """
+    Write-behind buffer (parsed books, frontier state changes).
+
+    Entries are collected and handed to `flush_fn` as one list once
+    `max_items` are buffered or the oldest entry is `max_delay` seconds old.
+    Each entry may carry an `on_written` callback, awaited only after the
+    batch containing it has been flushed successfully; `after_flush` is
+    awaited once those callbacks have run.
+    """
+
+    def __init__(self, flush_fn: Callable[[list], Awaitable[None]], max_items: int, max_delay: float,
+                 after_flush: Optional[Callable[[], Awaitable[None]]] = None):
+        self._flush_fn = flush_fn
+        self._after_flush = after_flush
+        self._max_items = max_items
+        self._max_delay = max_delay
+        self._entries: list = []
+        self._callbacks: List[Optional[Callable[[], Awaitable[None]]]] = []
+        self._oldest: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    def pending(self) -> int:
+        """Entries waiting to be flushed."""
+        return len(self._entries)
+
+    def start(self):
+        self._timer = asyncio.create_task(self._flush_periodically())
+
+    async def add(self, entry, on_written: Optional[Callable[[], Awaitable[None]]] = None):
+        if not self._entries:
+            self._oldest = time.monotonic()
+        self._entries.append(entry)
+        self._callbacks.append(on_written)
+        if len(self._entries) >= self._max_items:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._entries:
+                return
+            entries, callbacks = self._entries, self._callbacks
+            self._entries, self._callbacks, self._oldest = [], [], None
+            try:
+                await self._flush_fn(entries)
+            except Exception as e:
+                # Callbacks are skipped, so nothing in the lost batch is marked done
+                logger.error(f"Failed to flush {len(entries)} buffered writes: {e}")
+                return
+        for callback in callbacks:
+            if callback:
+                await callback()
+        if self._after_flush:
+            await self._after_flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self._max_delay)
+            if self._oldest is not None and time.monotonic() - self._oldest >= self._max_delay:
+                await self.flush()
+
+    async def close(self):
+        if self._timer:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        await self.flush()
@@ -1,21 +1,77 @@
 import asyncio
-from typing import Set, Optional, Dict
+import random
+import time
+from functools import partial
+from typing import Awaitable, Callable, Set, Optional, Dict, List, Tuple
 from httpx import AsyncClient, RequestError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from urllib.parse import urljoin
 
 from src.db import db, ensure_indexes
 from ..utils.logger import logger
-from src.utils.helpers import gzip_bytes, compute_hash, now_utc, async_sleep
+from src.utils.helpers import (
+    gzip_bytes, compute_hash, now_utc, async_sleep, response_validators, conditional_headers,
+)
 from ..models import Book
 from ..utils.config import settings
-from ..utils.parser import parse_listing_page, parse_book_page
+from ..utils.cache_generation import books_generation
+from ..utils.history import TRACKED_FIELDS, diff
+from ..utils.metrics import (
+    CHANGES, DB_OPS, DB_SECONDS, FETCH_FAILURES, FETCH_RESPONSES, FETCH_RETRIES, FETCH_SECONDS,
+    FETCHED_BYTES, IN_FLIGHT, QUEUE_DEPTH, SLOT_WAIT_SECONDS,
+)
+from ..utils.parser import parse_listing_page
+from ..utils.stats import StatsDelta, apply_stats
+from .batcher import WriteBatcher
+from .parse_executor import ParseExecutor
+from .throttle import Throttle, BACKOFF_STATUSES, parse_retry_after
+from .known_books import KnownBooks
+from .frontier import BOOK, DONE, FAILED, LEASED, LISTING, PENDING, LocalFrontier
+from .recrawl import RecrawlPlanner
+from .http_client import get_http_client
 
 
 # Crawl from /catalogue/
 BASE = settings.START_URL.rstrip("/") + "/catalogue/"
 
+# Response validators stored per URL for conditional GETs
+VALIDATOR_FIELDS = ("etag", "last_modified")
+
+
+class _PageTracker:
+    """Gathers the fetched books of each listing page into one parse batch."""
+
+    def __init__(self):
+        self._unfetched: Dict[int, int] = {}
+        self._fetched: Dict[int, list] = {}
+
+    def add_page(self, index: int, book_count: int):
+        if book_count:
+            self._unfetched[index] = book_count
+            self._fetched[index] = []
+
+    def book_fetched(self, index: int, fetched=None) -> Optional[list]:
+        """
+        Record a settled fetch (`fetched` is None if there is nothing to parse).
+        Returns the page's fetched books once its last fetch has settled.
+        """
+        if fetched is not None:
+            self._fetched[index].append(fetched)
+        self._unfetched[index] -= 1
+        if self._unfetched[index] == 0:
+            del self._unfetched[index]
+            return self._fetched.pop(index)
+        return None
+
+
+# Async callable receiving each change dict once its batch has been written
+ChangeSink = Callable[[dict], Awaitable[None]]
+
+
 class Crawler:
-    def __init__(self, start_url: str = BASE, concurrency: Optional[int] = None):
+    def __init__(self, start_url: str = BASE, concurrency: Optional[int] = None,
+                 client: Optional[AsyncClient] = None):
         # Ensure the start URL is correct
         if not start_url.endswith(".html"):
             start_url = urljoin(BASE, "page-1.html")
@@ -24,140 +80,575 @@ class Crawler:
         logger.info(start_url)
         logger.info("start url====================== 2")
         self.start_url = start_url
-        self.semaphore = asyncio.Semaphore(concurrency or settings.CRAWL_CONCURRENCY)
+        self.concurrency = concurrency or settings.CRAWL_CONCURRENCY
+        # Per-host token bucket + AIMD concurrency limit, starting at `concurrency`
+        self.throttle = Throttle(self.concurrency)
         self.visited: Set[str] = set()
-        self.client = AsyncClient(headers={"User-Agent": settings.USER_AGENT}, timeout=30)
+        # url -> {"etag", "last_modified"} from the previous crawl
+        self.validators: Dict[str, dict] = {}
+        # source_url -> (raw_html_hash, _id) of every stored book
+        self.known = KnownBooks()
+        # Write-behind buffer for parsed books, live only while crawling
+        self.writer: Optional[WriteBatcher] = None
+        # Persisted URL states of the current full crawl, so it can be resumed
+        self.frontier: Optional[LocalFrontier] = None
+        self.parse_executor = ParseExecutor()
+        # Shared across crawls so connections stay warm; closed by the process owner
+        self.client = client or get_http_client()
+        # Records every check of a book page for the incremental recrawl schedule
+        self.planner = RecrawlPlanner()
+        self.change_count = 0
+        self._on_change: Optional[ChangeSink] = None
         self._stop = False
 
-    async def load_checkpoint(self):
-        cp = await db.checkpoints.find_one({"key": "listing_last"})
-        if not cp or not cp.get("value"):
-            return None
+    async def load_known_books(self):
+        """
+        Load the hash index and HTTP validators of every stored book with a
+        single projected cursor, plus the validators of the listing pages.
+        """
+        self.known = KnownBooks()
+        self.validators = {}
+        cursor = db.books.find(
+            {},
+            {"source_url": 1, "raw_html_hash": 1, "etag": 1, "last_modified": 1},
+        ).batch_size(10_000)
+        async for doc in cursor:
+            if doc.get("raw_html_hash"):
+                self.known.add(doc["source_url"], doc["raw_html_hash"], doc["_id"])
+            validators = {k: doc[k] for k in VALIDATOR_FIELDS if doc.get(k)}
+            if validators:
+                self.validators[doc["source_url"]] = validators
+        async for doc in db.listing_pages.find({}, {"url": 1, "etag": 1, "last_modified": 1, "_id": 0}):
+            self.validators[doc["url"]] = {k: doc[k] for k in VALIDATOR_FIELDS if doc.get(k)}
+        logger.info(f"Loaded {len(self.known)} known books and HTTP validators for {len(self.validators)} URLs")
 
-        next_url = cp["value"]
-        # ✅ Normalize old checkpoints without /catalogue/
-        if "catalogue" not in next_url:
-            next_url = urljoin(BASE, "page-1.html")
-
-        return next_url
-
-    async def save_checkpoint(self, value):
-        # ✅ Normalize before saving
-        if value and "catalogue" not in value:
-            value = urljoin(BASE, value)
-        await db.checkpoints.update_one(
-            {"key": "listing_last"},
-            {"$set": {"value": value}},
-            upsert=True,
-        )
+    async def save_raw_html(self, snapshots: Dict[str, Tuple[str, bytes]]):
+        """
+        Store gzipped snapshots keyed by their content hash (`{hash: (url, html)}`),
+        so identical pages are only ever written once.
+        """
+        ops = [
+            UpdateOne(
+                {"_id": h},
+                {"$setOnInsert": {"url": url, "html_gzip": gzip_bytes(html), "ts": now_utc()}},
+                upsert=True,
+            )
+            for h, (url, html) in snapshots.items()
+        ]
+        DB_OPS.inc(len(ops), ("html_snapshots",))
+        try:
+            with DB_SECONDS.time(("save_raw_html",)):
+                await db.html_snapshots.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # Concurrent upserts of the same hash race on _id; the blob is stored either way
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    async def upsert_books(self, batch: List[Tuple[dict, bytes, Optional[dict]]]) -> List[dict]:
+        """
+        Upsert a batch of (item, raw_html, validators) tuples.
+        Books whose hash matches the known-book index are skipped without a
+        query; the parsed fields of the rest are loaded with a single `$in`
+        query, and every collection is written with one unordered bulk_write.
+        History rows store only the fields that changed; a new hash with
+        identical parsed fields (a markup-only change) writes no history.
+        `book_stats` gets the batch's net deltas (see src.utils.stats).
+        Returns the change dicts (see `upsert_book`) for the new and updated
+        books, in batch order.
+        """
+        if not batch:
+            return []
+        with DB_SECONDS.time(("upsert_books",)):
+            return await self._upsert_books(batch)
+
+    async def _upsert_books(self, batch: list) -> List[dict]:
+        book_ops, pending = [], []
+        for item, raw_html, validators in batch:
+            url = item["source_url"]
+            h = compute_hash(raw_html)
+            if not self.known.is_unchanged(url, h):
+                pending.append((item, raw_html, validators, h))
+            elif validators and validators != self.validators.get(url):
+                # Same content, new validators: keep them fresh for the next revalidation
+                book_ops.append(UpdateOne({"_id": self.known.get(url)[1]}, {"$set": validators}))
+
+        existing_by_url = {}
+        if pending:
+            cursor = db.books.find(
+                {"source_url": {"$in": [item["source_url"] for item, _, _, _ in pending]}},
+                {**{f: 1 for f in TRACKED_FIELDS}, "source_url": 1, "raw_html_hash": 1, **{k: 1 for k in VALIDATOR_FIELDS}},
+            )
+            async for existing in cursor:
+                existing_by_url[existing["source_url"]] = existing
 
-    async def save_raw_html(self, url: str, html: bytes):
-        payload = gzip_bytes(html)
-        res = await db.html_snapshots.insert_one({
-            "url": url,
-            "html_gzip": payload,
-            "ts": now_utc()
-        })
-        return str(res.inserted_id)
+        snapshots: Dict[str, Tuple[str, bytes]] = {}
+        history_ops, changes, updated = [], [], []
+        changed_urls = set()
+        stats = StatsDelta()
+        new_docs: Dict[int, dict] = {}  # book_ops index -> inserted doc
+        for item, raw_html, validators, h in pending:
+            existing = existing_by_url.get(item["source_url"])
 
-    async def upsert_book(self, item: dict, raw_html: bytes) -> dict | None:
+            doc = {
+                **item,
+                **(validators or {}),
+                "crawl_timestamp": now_utc(),
+                "raw_html_hash": h,
+            }
+
+            if existing:
+                if existing.get("raw_html_hash") != h:
+                    snapshots.setdefault(h, (item["source_url"], raw_html))
+                    doc["raw_html_snapshot_id"] = h
+                    field_changes = diff(existing, item)
+                    if field_changes:
+                        history_ops.append(InsertOne({
+                            "book_id": existing["_id"],
+                            "changes": field_changes,
+                            "raw_html_snapshot_id": existing.get("raw_html_hash"),
+                            "ts": now_utc()
+                        }))
+                        doc["has_changed"] = True
+                        stats.update(existing, item)
+                        changed_urls.add(item["source_url"])
+                        changes.append({"type": "updated", "book": doc, "changes": field_changes})
+                    # Markup-only changes just move the hash and snapshot forward
+                    book_ops.append(UpdateOne({"_id": existing["_id"]}, {"$set": doc}))
+                    updated.append((item["source_url"], h, existing["_id"]))
+                elif validators and any(existing.get(k) != v for k, v in validators.items()):
+                    # Same content, new validators: keep them fresh for the next revalidation
+                    book_ops.append(UpdateOne({"_id": existing["_id"]}, {"$set": validators}))
+            else:
+                snapshots.setdefault(h, (item["source_url"], raw_html))
+                doc["raw_html_snapshot_id"] = h
+                new_docs[len(book_ops)] = doc
+                book_ops.append(UpdateOne({"source_url": item["source_url"]}, {"$set": doc}, upsert=True))
+                stats.add(doc)
+                changes.append({"type": "new", "book": doc})
+
+        if snapshots:
+            await self.save_raw_html(snapshots)
+        if history_ops:
+            DB_OPS.inc(len(history_ops), ("book_history",))
+            await db.book_history.bulk_write(history_ops, ordered=False)
+        if book_ops:
+            DB_OPS.inc(len(book_ops), ("books",))
+            res = await db.books.bulk_write(book_ops, ordered=False)
+            for index, book_id in res.upserted_ids.items():
+                new_docs[index]["_id"] = book_id
+            raced = [doc for doc in new_docs.values() if "_id" not in doc]
+            if raced:
+                changes = await self._resolve_raced_inserts(raced, changes, stats)
+            await apply_stats(stats)
+        inserted = {id(change["book"]) for change in changes if change["type"] == "new"}
+        for doc in new_docs.values():
+            if id(doc) in inserted:
+                logger.info(f"✅ Inserted new book: {doc['name']}")
+            if doc.get("_id") is not None:
+                updated.append((doc["source_url"], doc["raw_html_hash"], doc["_id"]))
+        if changes:
+            # Cached API responses are now stale
+            await books_generation.bump()
+
+        # Only index what has actually been written
+        for url, h, book_id in updated:
+            self.known.add(url, h, book_id)
+        for item, _, validators in batch:
+            if validators:
+                self.validators[item["source_url"]] = validators
+            await self.planner.record(item["source_url"], item["source_url"] in changed_urls)
+        return changes
+
+    async def _resolve_raced_inserts(self, raced: List[dict], changes: List[dict], stats: StatsDelta) -> List[dict]:
+        """
+        Books another writer (a second worker, an overlapping run) inserted
+        between our lookup and our upsert: the upsert matched their document
+        instead of inserting one. They are not new books of this batch, so
+        their change records and stats are dropped; their ids are read back.
+        """
+        ids = {
+            book["source_url"]: book["_id"]
+            async for book in db.books.find({"source_url": {"$in": [doc["source_url"] for doc in raced]}}, {"source_url": 1})
+        }
+        for doc in raced:
+            doc["_id"] = ids.get(doc["source_url"])
+            stats.remove(doc)
+        logger.info(f"{len(raced)} books were inserted by another crawler first; updated them instead")
+        raced_docs = {id(doc) for doc in raced}
+        return [change for change in changes if id(change["book"]) not in raced_docs]
+
+    async def upsert_book(self, item: dict, raw_html: bytes, validators: Optional[dict] = None) -> dict | None:
         """
         Upsert a single book.
+        `validators` holds the response's ETag / Last-Modified, stored on the
+        book so the next crawl can revalidate with a conditional GET.
         Returns a dict describing the change:
-            {"type": "new" | "updated", "book": item, "changes": {...}}
+            {"type": "new" | "updated", "book": item, "changes": {path: {"old", "new"}}}
         or None if no change.
         """
-        h = compute_hash(raw_html)
-        existing = await db.books.find_one({"source_url": item["source_url"]})
-
-        doc = {
-            **item,
-            "crawl_timestamp": now_utc(),
-            "raw_html_hash": h,
-        }
-
-        raw_id = await self.save_raw_html(item["source_url"], raw_html)
-        doc["raw_html_snapshot_id"] = raw_id
-
-        if existing:
-            if existing.get("raw_html_hash") != h:
-                await db.book_history.insert_one({
-                    "book_id": existing["_id"],
-                    "previous": existing,
-                    "ts": now_utc()
-                })
-                doc["has_changed"] = True
-                await db.books.update_one({"_id": existing["_id"]}, {"$set": doc})
-                return {"type": "updated", "book": doc, "changes": existing}
-            return None
-        else:
-            await db.books.insert_one(doc)
-            logger.info(f"✅ Inserted new book: {item['name']}")
-            return {"type": "new", "book": doc}
+        changes = await self.upsert_books([(item, raw_html, validators)])
+        return changes[0] if changes else None
 
-    async def fetch_with_retry(self, url: str, attempts: Optional[int] = None):
+    async def fetch_with_retry(self, url: str, attempts: Optional[int] = None, headers: Optional[dict] = None):
+        """
+        GET `url`, retrying on errors. Returns the response on 200, or on 304
+        when `headers` carry conditional validators; None once retries run out.
+        """
         attempts = attempts or settings.CRAWL_RETRY_ATTEMPTS
-        delay = 1
+        host = self.throttle.for_url(url)
+        delay = settings.CRAWL_DELAY
         for i in range(attempts):
+            waiting = time.monotonic()
+            await host.acquire()
+            started = time.monotonic()
+            SLOT_WAIT_SECONDS.observe(started - waiting)
+            retry_after = None
             try:
-                async with self.semaphore:
-                    res = await self.client.get(url)
-                    if res.status_code == 200:
-                        return res
-                    else:
-                        logger.warning(f"[{res.status_code}] Retrying {url}")
+                res = await self.client.get(url, headers=headers)
             except RequestError as e:
+                latency = time.monotonic() - started
+                host.release(latency, None)
+                status = "error"
                 logger.warning(f"Error fetching {url}: {e}")
-            await async_sleep(delay)
-            delay *= 2
+            except BaseException:
+                host.abandon()
+                raise
+            else:
+                latency = time.monotonic() - started
+                if res.status_code in BACKOFF_STATUSES:
+                    retry_after = parse_retry_after(res.headers.get("retry-after"))
+                host.release(latency, res.status_code, retry_after)
+                status = str(res.status_code)
+                FETCHED_BYTES.inc(len(res.content))
+                if res.status_code in (200, 304):
+                    FETCH_SECONDS.observe(latency)
+                    FETCH_RESPONSES.inc(1, (status,))
+                    return res
+                logger.warning(f"[{res.status_code}] Retrying {url}")
+            FETCH_SECONDS.observe(latency)
+            FETCH_RESPONSES.inc(1, (status,))
+            if i + 1 < attempts:
+                FETCH_RETRIES.inc(1, (status,))
+            await async_sleep(max(delay, retry_after or 0))
+            delay *= settings.CRAWL_RETRY_BACKOFF
+        FETCH_FAILURES.inc()
         logger.error(f"Failed after {attempts} attempts: {url}")
         return None
 
-    async def crawl_book(self, url: str, changes_list: list):
+    async def revalidate(self, url: str):
+        """
+        Conditional GET of a book page against its stored validators. Returns
+        the response (200, or 304 which is recorded as an unchanged check for
+        the recrawl planner), or None if the fetch failed.
+        """
+        res = await self.fetch_with_retry(url, headers=conditional_headers(self.validators.get(url)))
+        if res is not None and res.status_code == 304:
+            await self.planner.record(url, False)
+        return res
+
+    async def fetch_book(self, url: str):
+        """
+        Fetch a book page, revalidating against the stored validators.
+        Returns the response, or None when there is nothing to parse
+        (already visited, failed, or 304 Not Modified).
+        """
         if url in self.visited:
-            return
+            return None
         self.visited.add(url)
 
-        res = await self.fetch_with_retry(url)
+        res = await self.revalidate(url)
+        if not res or res.status_code == 304:
+            # Failed, or unchanged since the last crawl: nothing to parse or write
+            return None
+        return res
+
+    async def emit_change(self, change: dict):
+        self.change_count += 1
+        CHANGES.inc(1, (change["type"],))
+        if self._on_change:
+            await self._on_change(change)
+
+    async def store_books(self, fetched: list, on_written=None):
+        """
+        Parse a batch of fetched (url, response) pairs in the parse executor
+        and store them. While a crawl is running the writes go through the
+        write-behind batcher and `on_written(url)` is awaited for each book
+        once it is flushed (or straight away if the page failed to parse).
+        """
+        items = await self.parse_executor.parse_books([(res.text, url) for url, res in fetched])
+        for (url, res), item in zip(fetched, items):
+            written = partial(on_written, url) if on_written else None
+            if item is None:
+                if written:
+                    await written()
+                continue
+            if self.writer:
+                await self.writer.add((item, res.content, response_validators(res)), written)
+                continue
+            change = await self.upsert_book(item, res.content, response_validators(res))
+            if change:
+                await self.emit_change(change)
+            if written:
+                await written()
+
+    async def crawl_book(self, url: str):
+        res = await self.fetch_book(url)
+        if res:
+            await self.store_books([(url, res)])
+
+    async def fetch_listing(self, url: str):
+        """
+        Fetch and parse a listing page, revalidating against the stored copy.
+        Returns (book_links, next_page), or (None, None) if the fetch failed.
+        """
+        res = await self.fetch_with_retry(url, headers=conditional_headers(self.validators.get(url)))
         if not res:
-            return
+            return None, None
+
+        if res.status_code == 304:
+            cached = await db.listing_pages.find_one({"url": url})
+            if cached:
+                return cached["book_links"], cached["next_url"]
+            # Validators without a stored page: refetch unconditionally
+            res = await self.fetch_with_retry(url)
+            if not res:
+                return None, None
 
-        item = parse_book_page(res.text, url)
-        change = await self.upsert_book(item, res.content)
-        if change:
-            changes_list.append(change)
+        book_links, next_page = parse_listing_page(res.text)
+        # Normalize next_page
+        if next_page and "catalogue" not in next_page:
+            next_page = urljoin(BASE, next_page)
 
-    async def crawl_listing(self, start_url: str, changes_list: list):
-        next_url = await self.load_checkpoint() or start_url
+        validators = response_validators(res)
+        if validators and validators != self.validators.get(url):
+            await db.listing_pages.update_one(
+                {"url": url},
+                {"$set": {**validators, "book_links": book_links, "next_url": next_page, "ts": now_utc()}},
+                upsert=True,
+            )
+        elif url not in self.validators:
+            # Recorded even without validators, so listing_sample knows every page
+            await db.listing_pages.update_one({"url": url}, {"$setOnInsert": {"ts": now_utc()}}, upsert=True)
+        return book_links, next_page
 
-        # ✅ Auto-correct if the URL doesn’t contain /catalogue/
-        if "catalogue" not in next_url:
-            next_url = urljoin(BASE, "page-1.html")
+    async def produce_listing(self, queue: asyncio.Queue, tracker: _PageTracker):
+        """
+        Feed (page_index, book_url) pairs into the queue: first the books an
+        interrupted run left unfinished, then those of each listing page,
+        walking the `next` links from the first page not yet done.
+        """
+        frontier = self.frontier
+        index = 0
+        leftover = frontier.pending[BOOK]
+        for start in range(0, len(leftover), settings.WRITE_BATCH_SIZE):
+            chunk = leftover[start:start + settings.WRITE_BATCH_SIZE]
+            tracker.add_page(index, len(chunk))
+            for link in chunk:
+                await queue.put((index, link))
+            index += 1
 
+        listings = frontier.pending[LISTING]
+        next_url = listings[0] if listings else None
         while next_url and not self._stop:
             logger.info(f"📖 Crawling page: {next_url}")
-            res = await self.fetch_with_retry(next_url)
-            if not res:
+            await frontier.mark(next_url, LEASED)
+            book_links, next_page = await self.fetch_listing(next_url)
+            if book_links is None:
+                # Left pending: the run stays open and the next crawl picks the walk up here
+                logger.error(f"Failed to fetch listing page {next_url}; the rest of the catalogue waits for the next run")
+                await frontier.mark(next_url, PENDING)
                 break
 
-            book_links, next_page = parse_listing_page(res.text)
-            # Normalize next_page
-            if next_page and "catalogue" not in next_page:
-                next_page = urljoin(BASE, next_page)
+            # Books and the next page are recorded before this page is done
+            book_links = await frontier.add(book_links, BOOK)
+            if next_page:
+                await frontier.add([next_page], LISTING)
+            await frontier.mark(next_url, DONE)
 
-            tasks = [self.crawl_book(link, changes_list) for link in book_links]
-            await asyncio.gather(*tasks)
+            tracker.add_page(index, len(book_links))
+            for link in book_links:
+                await queue.put((index, link))
 
-            await self.save_checkpoint(next_page)
+            index += 1
             next_url = next_page
 
-    async def run(self):
+    async def book_worker(self, queue: asyncio.Queue, tracker: _PageTracker):
+        """Drain book URLs from the queue until cancelled."""
+        frontier = self.frontier
+        while True:
+            index, url = await queue.get()
+            try:
+                # Left pending for the run that resumes this one
+                if self._stop:
+                    continue
+                self.visited.add(url)
+                await frontier.mark(url, LEASED)
+                try:
+                    res = await self.revalidate(url)
+                except Exception as e:
+                    logger.error(f"Failed to crawl book {url}: {e}")
+                    res = None
+                if res is None:
+                    await frontier.mark(url, FAILED)
+                elif res.status_code == 304:
+                    await frontier.mark(url, DONE)
+
+                # The last fetch of a listing page ships the whole page to the parser
+                fetched = tracker.book_fetched(index, (url, res) if res is not None and res.status_code == 200 else None)
+                if fetched:
+                    try:
+                        await self.store_books(fetched, partial(frontier.mark, status=DONE))
+                    except Exception as e:
+                        # Left in flight, so the resumed run fetches them again
+                        logger.error(f"Failed to store books of listing page {index}: {e}")
+            finally:
+                queue.task_done()
+
+    async def crawl_listing(self, start_url: str):
+        """
+        Full crawl of the catalogue, resuming the previous one if it was
+        interrupted. The run is closed only once it completes: every listing
+        page fetched and every book settled (a book batch that failed to be
+        written stays in flight and is fetched again by the resumed run).
+        """
+        # ✅ Auto-correct if the URL doesn’t contain /catalogue/
+        if "catalogue" not in start_url:
+            start_url = urljoin(BASE, "page-1.html")
+        self.frontier = await LocalFrontier.open([start_url])
+
+        # The producer runs ahead of the book workers (bounded by the queue size)
+        # so the fetch slots never idle at the end of a listing page.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CRAWL_QUEUE_SIZE)
+        QUEUE_DEPTH.set_function(queue.qsize, ("books",))
+        tracker = _PageTracker()
+
+        # Written books are marked done in the same breath, so a crash refetches almost none of them
+        self.open_writer(after_flush=self.frontier.flush)
+        workers = [
+            asyncio.create_task(self.book_worker(queue, tracker))
+            for _ in range(max(self.concurrency, settings.CRAWL_MAX_CONCURRENCY) * 2)
+        ]
+        try:
+            await self.produce_listing(queue, tracker)
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Books first: their flush is what marks them done
+            await self.close_writer()
+            self.parse_executor.shutdown()
+            await self.frontier.close()
+            QUEUE_DEPTH.set(0, ("books",))
+        if self._stop:
+            return
+        if self.frontier.unsettled:
+            logger.warning(f"⏸️ Crawl run {self.frontier.run_id} left open with "
+                           f"{len(self.frontier.unsettled)} URLs unsettled; the next crawl resumes it")
+        else:
+            counts = await self.frontier.finish()
+            logger.info(f"🏁 Crawl run {self.frontier.run_id} complete {counts}")
+
+    def open_writer(self, after_flush=None):
+        """
+        Route `store_books` through a write-behind batcher until `close_writer`
+        (`after_flush` is awaited after each batch's `on_written` callbacks).
+        """
+        async def flush_books(batch):
+            for change in await self.upsert_books(batch):
+                await self.emit_change(change)
+
+        writer = self.writer = WriteBatcher(
+            flush_books, settings.WRITE_BATCH_SIZE, settings.WRITE_BATCH_INTERVAL, after_flush=after_flush,
+        )
+        writer.start()
+        QUEUE_DEPTH.set_function(writer.pending, ("write_buffer",))
+        IN_FLIGHT.set_function(lambda: sum(host.in_flight for host in self.throttle.hosts.values()))
+
+    async def close_writer(self):
+        """Flush what is buffered and go back to writing books one at a time."""
+        writer, self.writer = self.writer, None
+        if writer:
+            await writer.close()
+        QUEUE_DEPTH.set(0, ("write_buffer",))
+        IN_FLIGHT.set(0)
+
+    async def listing_sample(self) -> List[str]:
+        """The first listing page plus a random sample of the other known ones."""
+        first = urljoin(BASE, "page-1.html")
+        known = [doc["url"] async for doc in db.listing_pages.find({"url": {"$ne": first}}, {"url": 1, "_id": 0})]
+        return [first] + random.sample(known, min(len(known), max(0, settings.RECRAWL_LISTING_SAMPLE - 1)))
+
+    async def crawl_due(self):
+        """
+        Incremental crawl: fetch only the books the recrawl planner says are
+        due, plus any book linked from a sample of listing pages that is not
+        stored yet. Falls back to a full crawl while there is no schedule or
+        no known listing page to sample (an empty database, or one filled
+        before the listing pages were recorded).
+        """
+        await self.planner.bootstrap()
+        if not (await db.recrawl_schedule.estimated_document_count()
+                and await db.listing_pages.estimated_document_count()):
+            # The sample would be page 1 alone, whose next links are not followed
+            logger.info("🗓️ Incremental crawl: no recrawl schedule or listing pages yet, crawling the whole catalogue")
+            await self.crawl_listing(self.start_url)
+            return
+        urls = await self.planner.due_urls()
+        due = len(urls)
+        listings = await self.listing_sample()
+        for listing in listings:
+            book_links, _ = await self.fetch_listing(listing)
+            urls.extend(link for link in book_links or [] if link not in self.known)
+        urls = list(dict.fromkeys(urls))
+        logger.info(f"🗓️ Incremental crawl: {due} books due, {len(urls) - due} new from {len(listings)} listing pages")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        QUEUE_DEPTH.set_function(queue.qsize, ("books",))
+
+        async def drain():
+            while not self._stop and not queue.empty():
+                url = queue.get_nowait()
+                try:
+                    await self.crawl_book(url)
+                except Exception as e:
+                    logger.error(f"Failed to crawl book {url}: {e}")
+
+        self.open_writer()
+        try:
+            await asyncio.gather(*(drain() for _ in range(max(self.concurrency, settings.CRAWL_MAX_CONCURRENCY) * 2)))
+        finally:
+            await self.close_writer()
+            self.parse_executor.shutdown()
+            QUEUE_DEPTH.set(0, ("books",))
+
+    async def run(self, on_change: Optional[ChangeSink] = None, incremental: bool = False) -> List[dict]:
+        """
+        Crawl the catalogue (only what is due, see `crawl_due`, if
+        `incremental`). Each change is awaited on `on_change` as soon as it is
+        written, so nothing accumulates here; without a sink the changes are
+        collected and returned instead.
+        """
         logger.info("🚀 Starting crawler...")
         await ensure_indexes()
-        changes = []
+        await self.load_known_books()
+        changes: List[dict] = []
+        if on_change is None:
+            async def on_change(change):
+                changes.append(change)
+        self.change_count = 0
+        self._on_change = on_change
+        self._stop = False
+        self.visited.clear()
         try:
-            await self.crawl_listing(self.start_url, changes)
+            if incremental:
+                await self.crawl_due()
+            else:
+                await self.crawl_listing(self.start_url)
             return changes
         finally:
-            await self.client.aclose()
-            logger.info("🛑 Crawler stopped.")
+            self._on_change = None
+            await self.planner.flush()
+            logger.info(f"🛑 Crawler stopped ({self.change_count} changes).")
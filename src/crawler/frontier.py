@@ -0,0 +1,249 @@
+"""
+MongoDB-backed URL frontier shared by distributed crawl workers.
+
+A crawl *run* is a document in `crawl_runs`; its URLs live in `frontier`,
+one document per (run, url):
+
+    {"run": run_id, "url": ..., "kind": "listing" | "book",
+     "status": "pending" | "leased" | "done" | "failed",
+     "owner": worker_id, "lease_expires": datetime, "attempts": n}
+
+Workers claim one URL at a time with a single `find_one_and_update`, which
+flips it to "leased" under their name until `lease_expires`. Nobody else
+can claim it in the meantime, so two live workers never fetch the same URL.
+A worker that dies never settles its leases; once they run out, those URLs
+are claimed by someone else, up to FRONTIER_MAX_ATTEMPTS claims in all,
+after which they are marked failed. URLs are added with upserts on the unique
+(run, url) index, so a book linked from two listing pages, or discovered by
+two workers at once, is still queued only once.
+
+A single-process crawl (`Crawler.run`) keeps its own run in the same
+collections through `LocalFrontier`: its state lives in memory and is
+written behind in batches, and an interrupted run is picked up again by
+the next crawl, which skips everything already done.
+"""
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from src.db import db
+from src.utils.config import settings
+from src.utils.helpers import now_utc
+from src.utils.logger import logger
+from .batcher import WriteBatcher
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+LISTING, BOOK = "listing", "book"
+# Claimed first: listing pages are what feed everyone else
+PRIORITY = {LISTING: 0, BOOK: 1}
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+async def close_run(run_id: ObjectId) -> dict:
+    """Mark a run finished (idempotent) and return its per-status counts."""
+    counts = {}
+    async for row in db.frontier.aggregate([
+        {"$match": {"run": run_id}},
+        {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+    ]):
+        counts[row["_id"]] = row["n"]
+    await db.crawl_runs.update_one(
+        {"_id": run_id, "finished": None}, {"$set": {"finished": now_utc(), "counts": counts}},
+    )
+    return counts
+
+
+class Frontier:
+    def __init__(self, run_id: ObjectId, owner: Optional[str] = None,
+                 lease_seconds: Optional[float] = None, max_attempts: Optional[int] = None):
+        self.run_id = run_id
+        self.owner = owner or worker_id()
+        self.lease = timedelta(seconds=lease_seconds or settings.FRONTIER_LEASE_SECONDS)
+        self.max_attempts = max_attempts or settings.FRONTIER_MAX_ATTEMPTS
+
+    @classmethod
+    async def start_run(cls, seeds: Iterable[str], **kwargs) -> "Frontier":
+        """Open a new run whose frontier holds the listing `seeds`."""
+        run_id = (await db.crawl_runs.insert_one({"started": now_utc(), "finished": None})).inserted_id
+        frontier = cls(run_id, **kwargs)
+        await frontier.add(seeds, LISTING)
+        logger.info(f"🧭 Started crawl run {run_id}")
+        return frontier
+
+    @classmethod
+    async def join_latest(cls, **kwargs) -> Optional["Frontier"]:
+        """The most recent unfinished run, or None."""
+        run = await db.crawl_runs.find_one({"finished": None, "local": {"$ne": True}}, sort=[("_id", -1)])
+        return cls(run["_id"], **kwargs) if run else None
+
+    async def add(self, urls: Iterable[str], kind: str):
+        ops = [
+            UpdateOne(
+                {"run": self.run_id, "url": url},
+                {"$setOnInsert": {
+                    "kind": kind, "priority": PRIORITY[kind], "status": PENDING, "attempts": 0, "added": now_utc(),
+                }},
+                upsert=True,
+            )
+            for url in dict.fromkeys(urls)
+        ]
+        if ops:
+            await db.frontier.bulk_write(ops, ordered=False)
+
+    async def claim(self) -> Optional[dict]:
+        """Lease the next claimable URL to this worker; None if there is none right now."""
+        now = now_utc()
+        update = {
+            "$set": {"status": LEASED, "owner": self.owner, "lease_expires": now + self.lease},
+            "$inc": {"attempts": 1},
+        }
+        # Two claims rather than one $or, so each walks its own index
+        entry = await db.frontier.find_one_and_update(
+            {"run": self.run_id, "status": PENDING}, update,
+            sort=[("priority", 1)], return_document=ReturnDocument.AFTER,
+        )
+        if entry is None:
+            expired = {"run": self.run_id, "status": LEASED, "lease_expires": {"$lt": now}}
+            # A lease that ran out on its last attempt is given up, like a failure would be
+            given_up = await db.frontier.update_many(
+                {**expired, "attempts": {"$gte": self.max_attempts}}, {"$set": {"status": FAILED, "finished": now}},
+            )
+            if given_up.modified_count:
+                logger.error(f"Giving up on {given_up.modified_count} URLs whose last lease expired")
+            entry = await db.frontier.find_one_and_update(
+                {**expired, "attempts": {"$lt": self.max_attempts}}, update,
+                return_document=ReturnDocument.AFTER,
+            )
+            if entry:
+                logger.warning(f"Reclaimed expired lease on {entry['url']}")
+        return entry
+
+    async def _settle(self, entry: dict, update: dict):
+        # Only while we still hold the lease; if it ran out, the new holder settles it
+        await db.frontier.update_one(
+            {"_id": entry["_id"], "owner": self.owner, "status": LEASED}, {"$set": update},
+        )
+
+    async def complete(self, entry: dict):
+        await self._settle(entry, {"status": DONE, "finished": now_utc()})
+
+    async def fail(self, entry: dict):
+        """Give the URL back, or give up on it after `max_attempts` claims."""
+        if entry.get("attempts", 0) >= self.max_attempts:
+            logger.error(f"Giving up on {entry['url']} after {entry['attempts']} attempts")
+            await self._settle(entry, {"status": FAILED, "finished": now_utc()})
+        else:
+            await self._settle(entry, {"status": PENDING, "lease_expires": None})
+
+    async def remaining(self) -> int:
+        """URLs not yet done or failed (pending or leased, including expired leases)."""
+        return await db.frontier.count_documents({"run": self.run_id, "status": {"$in": [PENDING, LEASED]}})
+
+    async def finish(self) -> dict:
+        """Close the run (idempotent) and return its per-status counts."""
+        return await close_run(self.run_id)
+
+
+class LocalFrontier:
+    """
+    Frontier of a single-process crawl.
+
+    The crawl is the only user of its run, so nothing is claimed: every
+    state change (pending -> leased, i.e. in flight -> done | failed) is
+    recorded in memory and written behind in batches of
+    FRONTIER_FLUSH_SIZE, or after FRONTIER_FLUSH_INTERVAL seconds. A crash
+    loses at most that last batch; its URLs are simply fetched again, with
+    the conditional GETs answering 304.
+    """
+
+    def __init__(self, run_id: ObjectId, seen: Iterable[str] = (), pending: Optional[Dict[str, List[str]]] = None):
+        self.run_id = run_id
+        # Every URL of the run, so links found again are not queued twice
+        self.seen: Set[str] = set(seen)
+        # What is left to crawl when the run was opened, in discovery order
+        self.pending = pending or {LISTING: [], BOOK: []}
+        # URLs still pending or in flight; the run is complete once this is empty
+        self.unsettled: Set[str] = {url for urls in self.pending.values() for url in urls}
+        self._writer = WriteBatcher(self._write, settings.FRONTIER_FLUSH_SIZE, settings.FRONTIER_FLUSH_INTERVAL)
+
+    @classmethod
+    async def open(cls, seeds: Iterable[str]) -> "LocalFrontier":
+        """Resume the unfinished local run, or start one from the listing `seeds`."""
+        run = await db.crawl_runs.find_one({"finished": None, "local": True}, sort=[("_id", -1)])
+        if run is None:
+            run_id = (await db.crawl_runs.insert_one({"started": now_utc(), "finished": None, "local": True})).inserted_id
+            frontier = cls(run_id)
+            frontier.pending[LISTING] = await frontier.add(seeds, LISTING)
+            logger.info(f"🧭 Started crawl run {run_id}")
+        else:
+            seen, pending = [], {LISTING: [], BOOK: []}
+            cursor = db.frontier.find({"run": run["_id"]}, {"url": 1, "kind": 1, "status": 1})
+            async for entry in cursor.batch_size(10_000):
+                seen.append(entry["url"])
+                if entry["status"] in (PENDING, LEASED):
+                    pending[entry["kind"]].append((entry["_id"], entry["url"]))
+            pending = {kind: [url for _, url in sorted(entries)] for kind, entries in pending.items()}
+            frontier = cls(run["_id"], seen, pending)
+            logger.info(f"🧭 Resuming crawl run {run['_id']}: {len(seen)} URLs known, "
+                        f"{len(pending[BOOK])} books and {len(pending[LISTING])} listing pages left")
+        frontier._writer.start()
+        return frontier
+
+    async def add(self, urls: Iterable[str], kind: str) -> List[str]:
+        """Record newly found URLs as pending; returns the ones not seen before in this run."""
+        added = [url for url in dict.fromkeys(urls) if url not in self.seen]
+        self.seen.update(added)
+        self.unsettled.update(added)
+        for url in added:
+            await self._writer.add((url, {
+                "kind": kind, "priority": PRIORITY[kind], "status": PENDING, "attempts": 0, "added": now_utc(),
+            }, {}))
+        return added
+
+    async def mark(self, url: str, status: str):
+        if status in (PENDING, LEASED):
+            self.unsettled.add(url)
+        else:
+            self.unsettled.discard(url)
+        await self._writer.add((url, {}, {"status": status}))
+
+    async def _write(self, entries: list):
+        # One upsert per URL: its insert (if still unwritten) and its latest status
+        merged: Dict[str, tuple] = {}
+        for url, insert, update in entries:
+            on_insert, on_set = merged.setdefault(url, ({}, {}))
+            on_insert.update(insert)
+            on_set.update(update)
+        ops = []
+        for url, (on_insert, on_set) in merged.items():
+            for field in on_set:
+                on_insert.pop(field, None)
+            update = {"$setOnInsert": on_insert, "$set": on_set}
+            ops.append(UpdateOne({"run": self.run_id, "url": url}, {k: v for k, v in update.items() if v}, upsert=True))
+        await db.frontier.bulk_write(ops, ordered=False)
+
+    async def flush(self):
+        """Write out whatever is buffered now."""
+        await self._writer.flush()
+
+    async def close(self):
+        await self._writer.close()
+
+    async def finish(self) -> dict:
+        """
+        Close the run and drop its entries, so the next crawl starts over;
+        the per-status counts are kept on the `crawl_runs` document. Only
+        for a run with nothing `unsettled`, or what is left would be lost.
+        """
+        await self.close()
+        counts = await close_run(self.run_id)
+        await db.frontier.delete_many({"run": self.run_id})
+        return counts
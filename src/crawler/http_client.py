@@ -0,0 +1,52 @@
+from typing import Optional
+
+from httpx import AsyncClient, Limits, Timeout
+
+from ..utils.config import settings
+from ..utils.logger import logger
+
+# One client (and connection pool) shared by every crawl in this process
+_client: Optional[AsyncClient] = None
+
+
+def build_http_client(http2: Optional[bool] = None, **overrides) -> AsyncClient:
+    """Create an AsyncClient with the transport settings from `settings`."""
+    http2 = settings.HTTP2 if http2 is None else http2
+    options = {
+        "headers": {"User-Agent": settings.USER_AGENT},
+        "http2": http2,
+        "limits": Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": Timeout(
+            settings.HTTP_READ_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            # A request stuck waiting for a pooled connection fails (and is
+            # retried) like one that cannot connect, instead of hanging
+            pool=settings.HTTP_CONNECT_TIMEOUT,
+        ),
+    }
+    options.update(overrides)
+    return AsyncClient(**options)
+
+
+def get_http_client() -> AsyncClient:
+    """Return the shared client, creating it on first use (or after it was closed)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+        logger.info(
+            f"🌐 HTTP client ready (http2={settings.HTTP2}, "
+            f"max_connections={settings.HTTP_MAX_CONNECTIONS})"
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client; call once the process is done crawling."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,38 @@
+from typing import Dict, Optional, Tuple
+
+from bson import ObjectId
+
+
+class KnownBooks:
+    """
+    In-memory index of the books already stored: source_url -> (raw_html_hash, _id).
+
+    Each entry packs the 32-byte SHA-256 digest and the 12-byte ObjectId into a
+    single 44-byte `bytes` value instead of keeping a hex string and an
+    ObjectId instance around. With CPython's object overheads an entry costs
+    roughly 250 bytes including a ~70 character URL key and its dict slot, so
+    a 1M-book catalogue stays around 250 MB; the full documents this replaces
+    are several KB each.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def add(self, url: str, raw_html_hash: str, book_id: ObjectId):
+        self._entries[url] = bytes.fromhex(raw_html_hash) + book_id.binary
+
+    def get(self, url: str) -> Optional[Tuple[str, ObjectId]]:
+        packed = self._entries.get(url)
+        if packed is None:
+            return None
+        return packed[:32].hex(), ObjectId(packed[32:])
+
+    def is_unchanged(self, url: str, raw_html_hash: str) -> bool:
+        packed = self._entries.get(url)
+        return packed is not None and packed[:32] == bytes.fromhex(raw_html_hash)
@@ -0,0 +1,126 @@
+"""
+Recrawl planning from observed change frequency.
+
+Every time a book page is checked (fetched, or answered 304), the planner
+records whether it had changed. `recrawl_schedule` keeps, per URL:
+
+    {"_id": url, "first_seen", "last_checked", "last_changed",
+     "checks": n, "changes": n, "rate": changes per day, "next_due"}
+
+Changes are modelled as a Poisson process, so the chance that a book has
+changed again `t` days after a visit is 1 - exp(-rate * t). Each URL's next
+visit is the longest interval that keeps this under RECRAWL_STALENESS_BOUND,
+clamped to [RECRAWL_MIN_INTERVAL_DAYS, RECRAWL_MAX_INTERVAL_DAYS]: hot
+books come back daily, books that never change once a month.
+
+The rate estimate (changes + 0.5) / (days observed + 1) starts new books
+at about one change every two days, which is checked daily, and backs
+off as the book proves stable. Several changes between two visits count
+as one, so for very hot books the estimate runs low. Those books sit at
+the minimum interval anyway.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from src.db import db
+from src.utils.config import settings
+from src.utils.helpers import now_utc
+from src.utils.logger import logger
+
+PRIOR_CHANGES = 0.5
+PRIOR_DAYS = 1.0
+
+
+def estimate_rate(changes: int, observed_days: float) -> float:
+    """Changes per day."""
+    return (changes + PRIOR_CHANGES) / (max(observed_days, 0.0) + PRIOR_DAYS)
+
+
+def next_interval(rate: float, bound: float, min_days: float, max_days: float) -> float:
+    """Days until a change has happened with probability `bound`, clamped."""
+    if rate <= 0:
+        return max_days
+    return min(max_days, max(min_days, -math.log(1 - bound) / rate))
+
+
+class RecrawlPlanner:
+    def __init__(self, bound: Optional[float] = None, min_days: Optional[float] = None,
+                 max_days: Optional[float] = None, batch_size: int = 500):
+        self.bound = bound or settings.RECRAWL_STALENESS_BOUND
+        self.min_days = min_days or settings.RECRAWL_MIN_INTERVAL_DAYS
+        self.max_days = max_days or settings.RECRAWL_MAX_INTERVAL_DAYS
+        self.batch_size = batch_size
+        self._checks: Dict[str, tuple] = {}  # url -> (changed, when)
+
+    def plan(self, state: Optional[dict], changed: bool, when: datetime) -> dict:
+        """The schedule entry after a check at `when` (`state` is the previous entry, if any)."""
+        state = dict(state or {"first_seen": when, "checks": 0, "changes": 0, "last_changed": None})
+        state["checks"] += 1
+        state["last_checked"] = when
+        if changed:
+            state["changes"] += 1
+            state["last_changed"] = when
+        observed_days = (when - state["first_seen"]).total_seconds() / 86400
+        state["rate"] = estimate_rate(state["changes"], observed_days)
+        interval = next_interval(state["rate"], self.bound, self.min_days, self.max_days)
+        state["next_due"] = when + timedelta(days=interval)
+        return state
+
+    async def record(self, url: str, changed: bool, when: Optional[datetime] = None):
+        """Note one check of `url`; written in batches (see `flush`)."""
+        previous = self._checks.get(url)
+        self._checks[url] = ((previous and previous[0]) or changed, when or now_utc())
+        if len(self._checks) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        checks, self._checks = self._checks, {}
+        if not checks:
+            return
+        existing = {doc["_id"]: doc async for doc in db.recrawl_schedule.find({"_id": {"$in": list(checks)}})}
+        ops = []
+        for url, (changed, when) in checks.items():
+            state = self.plan(existing.get(url), changed, when)
+            state.pop("_id", None)
+            ops.append(UpdateOne({"_id": url}, {"$set": state}, upsert=True))
+        await db.recrawl_schedule.bulk_write(ops, ordered=False)
+
+    async def due_urls(self, now: Optional[datetime] = None) -> List[str]:
+        cursor = db.recrawl_schedule.find({"next_due": {"$lte": now or now_utc()}}, {"_id": 1}).sort("next_due", 1)
+        return [doc["_id"] async for doc in cursor.batch_size(10_000)]
+
+    async def bootstrap(self) -> int:
+        """
+        Seed an empty schedule from what is already stored: each book's first
+        crawl (its ObjectId), its last crawl and its `book_history` rows.
+        """
+        if await db.recrawl_schedule.estimated_document_count():
+            return 0
+        changes = {
+            row["_id"]: row["n"]
+            async for row in db.book_history.aggregate([{"$group": {"_id": "$book_id", "n": {"$sum": 1}}}])
+        }
+        ops, seeded = [], 0
+        async for book in db.books.find({}, {"source_url": 1, "crawl_timestamp": 1, "has_changed": 1}):
+            first_seen = book["_id"].generation_time.replace(tzinfo=None)
+            last_checked = book.get("crawl_timestamp") or first_seen
+            count = changes.get(book["_id"], 1 if book.get("has_changed") else 0)
+            rate = estimate_rate(count, (last_checked - first_seen).total_seconds() / 86400)
+            interval = next_interval(rate, self.bound, self.min_days, self.max_days)
+            ops.append(UpdateOne({"_id": book["source_url"]}, {"$setOnInsert": {
+                "first_seen": first_seen, "last_checked": last_checked, "last_changed": None,
+                "checks": 1 + count, "changes": count, "rate": rate,
+                "next_due": last_checked + timedelta(days=interval),
+            }}, upsert=True))
+            if len(ops) >= self.batch_size:
+                await db.recrawl_schedule.bulk_write(ops, ordered=False)
+                seeded += len(ops)
+                ops = []
+        if ops:
+            await db.recrawl_schedule.bulk_write(ops, ordered=False)
+            seeded += len(ops)
+        logger.info(f"🗓️ Seeded the recrawl schedule for {seeded} books")
+        return seeded
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from ..utils.config import settings
+from ..utils.logger import logger
+
+# Statuses that mean "slow down" rather than "this URL is broken" (and may carry a Retry-After)
+BACKOFF_STATUSES = (429, 503)
+
+
+def is_unhealthy(status: Optional[int]) -> bool:
+    """Whether a response (`status` None for a network error) says the host is struggling."""
+    return status is None or status in BACKOFF_STATUSES or status >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostThrottle:
+    """
+    Politeness and throughput control for a single host.
+
+    A token bucket caps the request rate, and an AIMD controller adjusts both
+    the concurrency limit and the rate: each healthy response (below
+    `target_latency`) adds roughly one slot per window of `limit` responses
+    and `rate_step` tokens/s, while 429s, 5xx responses and network errors
+    halve both.
+    Slow responses shrink the limit gently. A Retry-After pauses the host.
+    """
+
+    def __init__(self, host: str, limit: float, rate: float, min_limit: int = 1, max_limit: int = 50,
+                 max_rate: float = 100.0, rate_step: float = 0.5, target_latency: float = 2.0):
+        self.host = host
+        self.limit = float(limit)
+        self.rate = float(rate)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._tokens = 1.0
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: list = []
+        self._token_lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait for a free concurrency slot and a rate token."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            self.abandon()
+            raise
+
+    async def _take_token(self):
+        async with self._token_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._refilled) * self.rate)
+                self._refilled = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                await asyncio.sleep(wait)
+
+    def abandon(self):
+        """Free a slot without feedback (e.g. the request was cancelled)."""
+        self.in_flight -= 1
+        # Waiters re-check the limit, which may also have grown
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def release(self, latency: float, status: Optional[int], retry_after: Optional[float] = None):
+        """Feed back one response (`status` None for a network error) and free its slot."""
+        if is_unhealthy(status):
+            self.limit = max(self.min_limit, self.limit / 2)
+            self.rate = max(1.0, self.rate / 2)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            logger.warning(
+                f"🐢 Backing off {self.host}: limit {self.limit:.1f}, rate {self.rate:.1f}/s"
+                + (f", paused {retry_after:.0f}s" if retry_after else "")
+            )
+        elif latency > self.target_latency:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+        self.abandon()
+
+    def snapshot(self) -> dict:
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "rate_per_sec": round(self.rate, 2),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        }
+
+
+class Throttle:
+    """Registry of HostThrottles, created on first use from `settings`."""
+
+    def __init__(self, initial_limit: Optional[int] = None):
+        self.initial_limit = initial_limit or settings.CRAWL_CONCURRENCY
+        self.hosts: Dict[str, HostThrottle] = {}
+
+    def for_url(self, url: str) -> HostThrottle:
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostThrottle(
+                host,
+                limit=self.initial_limit,
+                rate=settings.CRAWL_RATE,
+                max_limit=max(settings.CRAWL_MAX_CONCURRENCY, self.initial_limit),
+                max_rate=settings.CRAWL_MAX_RATE,
+                target_latency=settings.CRAWL_TARGET_LATENCY,
+            )
+        return self.hosts[host]
+
+    def snapshot(self) -> dict:
+        return {host: throttle.snapshot() for host, throttle in self.hosts.items()}
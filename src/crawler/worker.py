@@ -0,0 +1,130 @@
+"""
+Distributed crawl worker.
+
+Any number of these, in as many processes or containers as needed, work
+through one run's frontier (see `src.crawler.frontier`) together: each
+claims URLs, fetches and stores them with an ordinary `Crawler` (so HTTP
+validators, the known-book index, batching and the parse executor all
+apply), feeds the links it finds back into the frontier and settles the
+claim once the result is written. A worker exits when the run has nothing
+left to claim, or on SIGTERM/SIGINT, leaving its unsettled leases to expire.
+
+    python -m src.crawler.worker --new-run       # open a run and start working on it
+    python -m src.crawler.worker                 # join the latest unfinished run
+"""
+import argparse
+import asyncio
+import signal
+from typing import Optional
+from urllib.parse import urljoin
+
+from src.db import ensure_indexes
+from src.utils.config import settings
+from src.utils.logger import logger
+from .crawler import BASE, ChangeSink, Crawler
+from .frontier import BOOK, LISTING, Frontier
+from .http_client import close_http_client
+
+
+class CrawlWorker:
+    def __init__(self, frontier: Frontier, crawler: Optional[Crawler] = None,
+                 concurrency: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.frontier = frontier
+        self.crawler = crawler or Crawler()
+        self.concurrency = concurrency or settings.CRAWL_MAX_CONCURRENCY
+        self.poll_interval = poll_interval if poll_interval is not None else settings.FRONTIER_POLL_INTERVAL
+        self.processed = 0
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+        self.crawler._stop = True
+
+    async def process(self, entry: dict):
+        """Fetch one claimed URL and settle the claim."""
+        url = entry["url"]
+        crawler, frontier = self.crawler, self.frontier
+        if entry["kind"] == LISTING:
+            book_links, next_page = await crawler.fetch_listing(url)
+            if book_links is None:
+                await frontier.fail(entry)
+                return
+            await frontier.add(book_links, BOOK)
+            if next_page:
+                await frontier.add([next_page], LISTING)
+            await frontier.complete(entry)
+            return
+
+        res = await crawler.revalidate(url)
+        if res is None:
+            await frontier.fail(entry)
+        elif res.status_code == 304:
+            await frontier.complete(entry)
+        else:
+            # Settled only once the book has actually been written
+            await crawler.store_books([(url, res)], lambda _: frontier.complete(entry))
+
+    async def _work(self):
+        while not self._stop:
+            entry = await self.frontier.claim()
+            if entry is None:
+                # Leases still out (ours waiting on the writer, or someone else's) may come back
+                if not await self.frontier.remaining():
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                await self.process(entry)
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"Failed to crawl {entry['url']}: {e}")
+                await self.frontier.fail(entry)
+
+    async def run(self, on_change: Optional[ChangeSink] = None) -> dict:
+        """Work until the run is drained or `stop()` is called; returns the run's status counts."""
+        logger.info(f"👷 Worker {self.frontier.owner} joining crawl run {self.frontier.run_id}")
+        await self.crawler.load_known_books()
+        self.crawler._on_change = on_change
+        self.crawler.open_writer()
+        tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.crawler.close_writer()
+            await self.crawler.planner.flush()
+            self.crawler.parse_executor.shutdown()
+            self.crawler._on_change = None
+        counts = await self.frontier.finish() if not self._stop else {}
+        logger.info(f"🛑 Worker {self.frontier.owner} done: {self.processed} URLs, "
+                    f"{self.crawler.change_count} changes {counts}")
+        return counts
+
+
+async def main(new_run: bool, concurrency: Optional[int]):
+    await ensure_indexes()
+    if new_run:
+        frontier = await Frontier.start_run([urljoin(BASE, "page-1.html")])
+    else:
+        frontier = await Frontier.join_latest()
+        if frontier is None:
+            logger.error("No unfinished crawl run to join; start one with --new-run")
+            return
+    worker = CrawlWorker(frontier, concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Work on a distributed crawl run.")
+    parser.add_argument("--new-run", action="store_true", help="open a new run instead of joining the latest one")
+    parser.add_argument("--concurrency", type=int, help="URLs in flight (default CRAWL_MAX_CONCURRENCY)")
+    args = parser.parse_args()
+    asyncio.run(main(args.new_run, args.concurrency))
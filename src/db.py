@@ -7,6 +7,57 @@ from .utils.logger import logger
 client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGO_URI)
 db = client[settings.MONGO_DB]
 
+# GET /books query shapes: equality filters, sort_by options and the price range
+BOOK_EQUALITY_FIELDS = {"category": 1, "rating": -1}
+# sort_by option -> (field, direction); `_id` breaks ties in the same direction
+BOOK_SORTS = {
+    "rating": ("rating", -1),
+    "price": ("price.including_tax", 1),
+    "reviews": ("num_reviews", -1),
+}
+DEFAULT_BOOK_SORT = ("_id", 1)
+BOOK_RANGE_FIELD = "price.including_tax"
+
+# GET /books/search: a name match counts for more than a description match
+TEXT_INDEX_NAME = "books_text"
+TEXT_INDEX_WEIGHTS = {"name": 10, "description": 1}
+
+# Indexes superseded by the ones created in ensure_indexes
+LEGACY_INDEXES = {
+    "books": ["category_1"],
+    "book_history": ["book_id_1"],
+}
+
+
+def book_index_keys(equality, sort_field: str, direction: int) -> list:
+    """
+    Index serving a /books query with equality on `equality`, sorted on
+    (`sort_field`, _id), following the ESR rule: equality fields first, then
+    the sort keys, then the price range. `_id` follows the direction of the
+    key before it, so one index serves both "sort by rating" and
+    "rating = n, sort by _id" (read backwards).
+    """
+    keys = [(f, d) for f, d in BOOK_EQUALITY_FIELDS.items() if f in equality]
+    if sort_field != "_id" and sort_field not in equality:
+        keys.append((sort_field, direction))
+    keys.append(("_id", keys[-1][1] if keys else direction))
+    if sort_field != BOOK_RANGE_FIELD:
+        keys.append((BOOK_RANGE_FIELD, 1))
+    # _id is unique, so nothing after a leading _id narrows anything
+    return keys if keys[0][0] != "_id" else [("_id", 1)]
+
+
+def book_query_indexes() -> list:
+    """Every distinct index needed for the equality x sort combinations."""
+    equality_sets = [[], ["category"], ["rating"], ["category", "rating"]]
+    indexes = []
+    for equality in equality_sets:
+        for field, direction in [DEFAULT_BOOK_SORT, *BOOK_SORTS.values()]:
+            keys = book_index_keys(equality, field, direction)
+            if keys != [("_id", 1)] and keys not in indexes:
+                indexes.append(keys)
+    return indexes
+
 
 async def ensure_indexes():
     """
@@ -17,14 +68,40 @@ async def ensure_indexes():
     # books: main collection
     await db.books.create_index([("source_url", 1)], unique=True)
     await db.books.create_index([("upc", 1)], unique=True, sparse=True)
-    await db.books.create_index([("category", 1)])
     await db.books.create_index([("crawl_timestamp", -1)])
 
-    # history
-    await db.book_history.create_index([("book_id", 1)])
+    # GET /books filters and sorts (see book_index_keys)
+    for keys in book_query_indexes():
+        await db.books.create_index(keys)
+
+    # GET /books/search (only one text index is allowed per collection)
+    await db.books.create_index(
+        [(field, "text") for field in TEXT_INDEX_WEIGHTS],
+        weights=TEXT_INDEX_WEIGHTS, name=TEXT_INDEX_NAME, default_language="english",
+    )
+
+    # history: a book's changes newest first (also serves lookups by book_id alone)
+    await db.book_history.create_index([("book_id", 1), ("ts", -1), ("_id", -1)])
+    await db.book_history.create_index([("ts", -1), ("_id", -1)])
+
+    # listing pages (HTTP validators + parsed links for conditional GETs)
+    await db.listing_pages.create_index([("url", 1)], unique=True)
+
+    # crawl frontier (see src.crawler.frontier): one entry per URL per run; distributed
+    # runs claim pending-by-priority first, then by expired lease
+    await db.frontier.create_index([("run", 1), ("url", 1)], unique=True)
+    await db.frontier.create_index([("run", 1), ("status", 1), ("priority", 1)])
+    await db.frontier.create_index([("run", 1), ("status", 1), ("lease_expires", 1)])
+
+    # incremental recrawl: books whose next visit is due
+    await db.recrawl_schedule.create_index([("next_due", 1)])
 
-    # checkpoints
-    await db.checkpoints.create_index([("key", 1)], unique=True)
+    # Only once their replacements exist
+    for collection, names in LEGACY_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
 
     logger.info("✅ Indexes ensured successfully.")
 
@@ -0,0 +1,67 @@
+import csv
+import json
+from pathlib import Path
+
+from src.utils.logger import logger
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+CSV_FIELDS = ["type", "book", "changes"]
+
+
+def dumps(obj) -> bytes:
+    """Serialise one change as a compact JSON line (ObjectIds and dates as strings)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, default=str, separators=(",", ":")) + "\n").encode()
+
+
+class ChangeReport:
+    """
+    Streaming sink for `Crawler.run(on_change=...)`.
+
+    Each change is appended to `<stem>.ndjson` and `<stem>.csv` and flushed
+    as it arrives, so memory stays flat however many books change and a
+    crawl that dies part-way still leaves every change reported so far on
+    disk (one small append per change; the crawler emits them a write batch
+    at a time). In the CSV the `book` and `changes` columns hold the same
+    JSON as the NDJSON.
+    """
+
+    def __init__(self, report_dir: Path, stem: str):
+        self.ndjson_path = report_dir / f"{stem}.ndjson"
+        self.csv_path = report_dir / f"{stem}.csv"
+        self.count = 0
+        self._ndjson = None
+        self._csv_file = None
+        self._csv = None
+
+    def _open(self):
+        self._ndjson = open(self.ndjson_path, "wb")
+        self._csv_file = open(self.csv_path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(CSV_FIELDS)
+
+    async def __call__(self, change: dict):
+        # Files are only created once there is something to report
+        if self._ndjson is None:
+            self._open()
+        self._ndjson.write(dumps(change))
+        self._ndjson.flush()
+        self._csv.writerow([
+            change.get("type"),
+            dumps(change.get("book")).decode().rstrip("\n"),
+            dumps(change.get("changes")).decode().rstrip("\n") if "changes" in change else "",
+        ])
+        self._csv_file.flush()
+        self.count += 1
+
+    def close(self):
+        for f in (self._ndjson, self._csv_file):
+            if f is not None:
+                f.close()
+        if self.count:
+            logger.info(f"✅ Daily report generated: {self.ndjson_path} & {self.csv_path} ({self.count} changes)")
@@ -1,46 +1,51 @@
+import argparse
 import asyncio
-import json
-import csv
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from src.crawler.crawler import Crawler
+from src.crawler.http_client import close_http_client
 from src.db import ensure_indexes
+from src.scheduler.change_report import ChangeReport
 from src.utils.logger import logger
+from src.utils.metrics import metrics
+from src.utils.profiling import PROFILE_MODES, CrawlProfiler
 
 REPORT_DIR = Path("reports")
 REPORT_DIR.mkdir(exist_ok=True)
 
-async def run_daily_crawl():
+async def run_daily_crawl(full: bool = False, profile: Optional[str] = None):
     await ensure_indexes()
-    logger.info("🚀 Starting daily scheduled crawl...")
+    logger.info(f"🚀 Starting daily scheduled {'full' if full else 'incremental'} crawl...")
 
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    report = ChangeReport(REPORT_DIR, f"daily_changes_{timestamp}")
     crawler = Crawler()
-    # `crawler.run()` now returns the list of new/updated books
-    changes = await crawler.run()
-
-    if changes:
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        json_path = REPORT_DIR / f"daily_changes_{timestamp}.json"
-        csv_path = REPORT_DIR / f"daily_changes_{timestamp}.csv"
-
-        # JSON report
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(changes, f, default=str, indent=2)
-
-        # CSV report
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["type", "book", "changes"])
-            writer.writeheader()
-            for row in changes:
-                writer.writerow(row)
-
-        logger.info(f"✅ Daily report generated: {json_path} & {csv_path}")
-    else:
+    metrics.reset()
+    profiler = CrawlProfiler(profile, REPORT_DIR, f"daily_crawl_{timestamp}") if profile else nullcontext()
+    # Changes are streamed into the report as they are written
+    try:
+        with profiler:
+            await crawler.run(on_change=report, incremental=not full)
+    finally:
+        report.close()
+        await close_http_client()
+        if metrics.enabled:
+            for line in metrics.summary():
+                logger.info(line)
+
+    if not report.count:
         logger.info("No changes detected today.")
 
     logger.info("🛑 Daily scheduled crawl finished.")
 
 
 if __name__ == "__main__":
-    asyncio.run(run_daily_crawl())
+    parser = argparse.ArgumentParser(description="Daily crawl: only the books due for a recheck, plus new ones.")
+    parser.add_argument("--full", action="store_true", help="crawl the whole catalogue instead")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="profile the crawl and write the profile and its time by stage into reports/")
+    args = parser.parse_args()
+    asyncio.run(run_daily_crawl(full=args.full, profile=args.profile))
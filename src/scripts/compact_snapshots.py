@@ -0,0 +1,104 @@
+"""
+Deduplicate legacy `html_snapshots` documents into content-addressed ones.
+
+Older crawls inserted one snapshot (with an ObjectId `_id`) per book per run.
+This rewrites each of them under `_id = compute_hash(html)`, drops the
+duplicates and repoints `books` / `book_history` at the hash. The repointing
+looks books up by their old snapshot id, which nothing else queries, so the
+script indexes that field for the duration of the run:
+
+    python -m src.scripts.compact_snapshots [--dry-run]
+"""
+import argparse
+import asyncio
+
+from pymongo import DeleteOne, UpdateMany
+from pymongo.errors import DuplicateKeyError
+
+from src.db import db
+from src.utils.helpers import compute_hash, gunzip_bytes
+from src.utils.logger import logger
+
+BATCH_SIZE = 500
+# collection -> field holding the snapshot id, indexed while the script runs
+SNAPSHOT_REFERENCES = {"books": "raw_html_snapshot_id", "book_history": "previous.raw_html_snapshot_id"}
+TEMP_INDEX = "compact_snapshots_tmp"
+
+
+async def _collection_size() -> dict:
+    stats = await db.command("collStats", "html_snapshots")
+    return {"count": stats.get("count", 0), "size": stats.get("size", 0), "storage_size": stats.get("storageSize", 0)}
+
+
+async def _flush(remap: dict, deletes: list, dry_run: bool):
+    if dry_run:
+        return
+    # Repoint before deleting: if the script dies in between, the old snapshots
+    # are still there and a rerun remaps whatever still references them
+    if remap:
+        for collection, field in SNAPSHOT_REFERENCES.items():
+            await db[collection].bulk_write(
+                [UpdateMany({field: old}, {"$set": {field: h}}) for old, h in remap.items()], ordered=False,
+            )
+    if deletes:
+        await db.html_snapshots.bulk_write(deletes, ordered=False)
+
+
+async def compact_snapshots(dry_run: bool = False) -> dict:
+    if dry_run:
+        return await _compact(dry_run)
+    # Without these every repointing UpdateMany is a collection scan
+    for collection, field in SNAPSHOT_REFERENCES.items():
+        await db[collection].create_index([(field, 1)], name=TEMP_INDEX, sparse=True)
+    try:
+        return await _compact(dry_run)
+    finally:
+        for collection in SNAPSHOT_REFERENCES:
+            await db[collection].drop_index(TEMP_INDEX)
+
+
+async def _compact(dry_run: bool) -> dict:
+    before = await _collection_size()
+    seen = set()
+    remap, deletes = {}, []
+    scanned = kept = 0
+
+    cursor = db.html_snapshots.find({"_id": {"$type": "objectId"}}).batch_size(BATCH_SIZE)
+    async for snap in cursor:
+        scanned += 1
+        h = compute_hash(gunzip_bytes(snap["html_gzip"]))
+        if h not in seen:
+            seen.add(h)
+            if not dry_run:
+                try:
+                    await db.html_snapshots.insert_one({
+                        "_id": h,
+                        "url": snap.get("url"),
+                        "html_gzip": snap["html_gzip"],
+                        "ts": snap.get("ts"),
+                    })
+                    kept += 1
+                except DuplicateKeyError:
+                    pass
+            else:
+                kept += 1
+        remap[str(snap["_id"])] = h
+        deletes.append(DeleteOne({"_id": snap["_id"]}))
+
+        if len(deletes) >= BATCH_SIZE:
+            await _flush(remap, deletes, dry_run)
+            remap, deletes = {}, []
+
+    await _flush(remap, deletes, dry_run)
+    after = await _collection_size()
+
+    report = {"scanned": scanned, "unique": kept, "removed": scanned - kept, "before": before, "after": after}
+    logger.info(f"🗜️ Snapshot compaction {'(dry run) ' if dry_run else ''}finished: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate html_snapshots by content hash.")
+    parser.add_argument("--dry-run", action="store_true", help="count duplicates without writing")
+    args = parser.parse_args()
+    asyncio.run(compact_snapshots(dry_run=args.dry_run))
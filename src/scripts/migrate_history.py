@@ -0,0 +1,81 @@
+"""
+Rewrite legacy `book_history` rows as field-level diffs.
+
+Older crawls stored a full copy of the book (`previous`) on every hash
+change. Walking each book's history newest first from its current document,
+this replaces `previous` with `changes` (the parsed fields that differ from
+the version that followed) and deletes rows where nothing parsed changed:
+
+    python -m src.scripts.migrate_history [--dry-run]
+"""
+import argparse
+import asyncio
+
+from pymongo import DeleteOne, UpdateOne
+
+from src.db import db
+from src.utils.history import TRACKED_FIELDS, apply, diff
+from src.utils.logger import logger
+
+BATCH_SIZE = 500
+
+
+async def _collection_size() -> dict:
+    stats = await db.command("collStats", "book_history")
+    return {"count": stats.get("count", 0), "size": stats.get("size", 0), "storage_size": stats.get("storageSize", 0)}
+
+
+async def _migrate_book(book_id) -> list:
+    """Write ops turning one book's legacy rows into diffs."""
+    book = await db.books.find_one({"_id": book_id}, {f: 1 for f in TRACKED_FIELDS}) or {}
+    after = {f: book[f] for f in TRACKED_FIELDS if f in book}
+    ops = []
+    rows = db.book_history.find({"book_id": book_id}).sort([("ts", -1), ("_id", -1)])
+    async for row in rows:
+        if "changes" in row:
+            after = apply(after, row["changes"], side="old")
+            continue
+        previous = row.get("previous") or {}
+        before = {f: previous[f] for f in TRACKED_FIELDS if f in previous}
+        changes = diff(before, after)
+        if changes:
+            update = {"changes": changes}
+            # Kept at the top level, like the rows the crawler writes now
+            if previous.get("raw_html_snapshot_id"):
+                update["raw_html_snapshot_id"] = previous["raw_html_snapshot_id"]
+            ops.append(UpdateOne({"_id": row["_id"]}, {"$set": update, "$unset": {"previous": ""}}))
+        else:
+            # Only the markup changed
+            ops.append(DeleteOne({"_id": row["_id"]}))
+        after = before
+    return ops
+
+
+async def migrate_history(dry_run: bool = False) -> dict:
+    before = await _collection_size()
+    book_ids = await db.book_history.distinct("book_id", {"previous": {"$exists": True}})
+    rewritten = deleted = 0
+    ops = []
+    for book_id in book_ids:
+        book_ops = await _migrate_book(book_id)
+        rewritten += sum(isinstance(op, UpdateOne) for op in book_ops)
+        deleted += sum(isinstance(op, DeleteOne) for op in book_ops)
+        ops.extend(book_ops)
+        if len(ops) >= BATCH_SIZE:
+            if not dry_run:
+                await db.book_history.bulk_write(ops, ordered=False)
+            ops = []
+    if ops and not dry_run:
+        await db.book_history.bulk_write(ops, ordered=False)
+    after = await _collection_size()
+
+    report = {"books": len(book_ids), "rewritten": rewritten, "deleted": deleted, "before": before, "after": after}
+    logger.info(f"🗜️ History migration {'(dry run) ' if dry_run else ''}finished: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite legacy book_history rows as field-level diffs.")
+    parser.add_argument("--dry-run", action="store_true", help="count rows without writing")
+    args = parser.parse_args()
+    asyncio.run(migrate_history(dry_run=args.dry_run))
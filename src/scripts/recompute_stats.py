@@ -0,0 +1,17 @@
+"""
+Rebuild the `book_stats` collection behind GET /stats from `books`.
+
+The crawler maintains the stats incrementally; run this once after
+upgrading (books stored before the stats existed are not counted), or
+whenever the stats look off, ideally while no crawl is running:
+
+    python -m src.scripts.recompute_stats
+"""
+import argparse
+import asyncio
+
+from src.utils.stats import recompute_stats
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Rebuild book_stats from the books collection.").parse_args()
+    asyncio.run(recompute_stats())
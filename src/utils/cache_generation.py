@@ -0,0 +1,54 @@
+"""
+Generation counter of the books collection.
+
+A crawl that inserts or updates books bumps it (in this process and in
+`db.meta`, which other processes poll), so whatever is derived from the
+books, such as cached API responses or the in-memory search index, can tell
+it is stale by comparing generations. Free of any web framework, so the
+crawler can bump it without depending on the API.
+"""
+import time
+
+from pymongo import ReturnDocument
+
+from src.db import db
+from src.utils.config import settings
+from src.utils.logger import logger
+
+GENERATION_ID = "books_generation"
+
+
+class BooksGeneration:
+    def __init__(self, poll_interval: float = 5.0):
+        self.poll_interval = poll_interval
+        self.value = 0
+        self._polled = 0.0
+
+    async def refresh(self) -> int:
+        """Pick up bumps made by other processes (e.g. the scheduled crawl), at most once per poll interval."""
+        if time.monotonic() - self._polled < self.poll_interval:
+            return self.value
+        self._polled = time.monotonic()
+        try:
+            doc = await db.meta.find_one({"_id": GENERATION_ID})
+        except Exception as e:
+            logger.warning(f"Could not read the cache generation: {e}")
+            return self.value
+        if doc and doc["value"] > self.value:
+            self.value = doc["value"]
+        return self.value
+
+    async def bump(self) -> int:
+        """Mark everything derived from the books stale, here and (via db.meta) in other processes."""
+        self.value += 1
+        try:
+            doc = await db.meta.find_one_and_update(
+                {"_id": GENERATION_ID}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER,
+            )
+            self.value = max(self.value, doc["value"])
+        except Exception as e:
+            logger.warning(f"Could not persist the cache generation: {e}")
+        return self.value
+
+
+books_generation = BooksGeneration(settings.CACHE_GENERATION_POLL)
@@ -10,11 +10,64 @@ class Settings(BaseSettings):
     MONGO_DB: str = "books_to_scrape"  # can have a default
 
     # Crawler
-    CRAWL_CONCURRENCY: int = 5
+    CRAWL_CONCURRENCY: int = 5  # initial per-host concurrency limit
+    CRAWL_MAX_CONCURRENCY: int = 50  # ceiling for the adaptive limit
+    CRAWL_RATE: float = 20.0  # initial per-host requests per second
+    CRAWL_MAX_RATE: float = 100.0
+    CRAWL_TARGET_LATENCY: float = 2.0  # seconds; slower responses shrink the limit
     USER_AGENT: str = "BooksToScrapeCrawler/1.0 (+https://example.com)"
     CRAWL_RETRY_ATTEMPTS: int = 3
     CRAWL_RETRY_BACKOFF: float = 2.0
-    CRAWL_DELAY: float = 0.5  # seconds between retries or pages
+    CRAWL_DELAY: float = 0.5  # first retry delay, multiplied by CRAWL_RETRY_BACKOFF after each retry
+    CRAWL_QUEUE_SIZE: int = 100  # book URLs buffered ahead of the workers
+    WRITE_BATCH_SIZE: int = 100  # parsed books per bulk_write
+    WRITE_BATCH_INTERVAL: float = 1.0  # max seconds a parsed book waits to be written
+
+    # Parsing
+    PARSER_ENGINE: str = "auto"  # auto | lxml | selectolax | html.parser
+    PARSE_EXECUTOR: str = "thread"  # inline | thread | process
+    PARSE_WORKERS: int = 0  # 0 = one per CPU
+
+    # Incremental recrawl (daily runs fetch only the books that are due)
+    RECRAWL_STALENESS_BOUND: float = 0.1  # max chance a book has changed again by its next visit
+    RECRAWL_MIN_INTERVAL_DAYS: float = 1.0
+    RECRAWL_MAX_INTERVAL_DAYS: float = 30.0
+    RECRAWL_LISTING_SAMPLE: int = 5  # listing pages fetched per incremental run to find new books
+
+    # Distributed crawl (python -m src.crawler.worker)
+    FRONTIER_LEASE_SECONDS: float = 60.0  # a claimed URL is given to another worker after this
+    FRONTIER_MAX_ATTEMPTS: int = 3  # claims of one URL before it is marked failed
+    FRONTIER_POLL_INTERVAL: float = 1.0  # seconds an idle worker waits before claiming again
+    # Single-process crawl: URL state changes written per batch (a crash refetches at most one batch)
+    FRONTIER_FLUSH_SIZE: int = 500
+    FRONTIER_FLUSH_INTERVAL: float = 1.0  # max seconds a state change waits to be written
+
+    # HTTP transport (shared crawler client)
+    HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_READ_TIMEOUT: float = 30.0
+
+    # API response cache
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"  # or "package.module:factory"
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL: float = 300.0  # seconds
+    CACHE_GENERATION_POLL: float = 5.0  # seconds between checks for crawls in other processes
+
+    # Bulk export
+    EXPORT_BATCH_SIZE: int = 5000  # documents per Motor cursor batch in GET /books/export
+
+    # Full-text search
+    SEARCH_BACKEND: str = "mongo"  # mongo ($text index) | memory (in-process inverted index, for tests)
+
+    # Crawl metrics (GET /metrics, summary after the daily crawl)
+    METRICS_ENABLED: bool = True
+
+    # Crawl profiling (daily_crawl --profile, POST /crawl/start?profile=)
+    PROFILE_SAMPLE_INTERVAL: float = 0.005  # seconds between stack samples in "sample" mode
 
     # Logging
     LOG_LEVEL: str = "INFO"
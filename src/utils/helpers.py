@@ -23,5 +23,37 @@ def gzip_bytes(b: bytes) -> bytes:
 
 
 
+def gunzip_bytes(b: bytes) -> bytes:
+    return gzip.decompress(b)
+
+
+
+
 def now_utc():
-    return datetime.utcnow()
\ No newline at end of file
+    return datetime.utcnow()
+
+
+
+
+def response_validators(res) -> dict:
+    """Pick the HTTP cache validators (ETag / Last-Modified) off a response."""
+    validators = {}
+    if res.headers.get("etag"):
+        validators["etag"] = res.headers["etag"]
+    if res.headers.get("last-modified"):
+        validators["last_modified"] = res.headers["last-modified"]
+    return validators
+
+
+
+
+def conditional_headers(validators: dict | None) -> dict:
+    """Build If-None-Match / If-Modified-Since headers from stored validators."""
+    headers = {}
+    if not validators:
+        return headers
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
@@ -0,0 +1,145 @@
+"""
+Field-level history of books.
+
+`book_history` rows hold `changes`: a diff of the parsed fields between the
+previous and the new version, keyed by dotted path ("price.including_tax")
+so it names exactly the leaf values that changed. Going back in time means
+undoing rows newest first, starting from the current book. Rows written
+before diffs existed hold a full `previous` document instead; both kinds
+are understood here.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from src.db import db
+
+# The scraped fields of a book; crawl metadata is not part of its history
+TRACKED_FIELDS = (
+    "name", "description", "category", "price", "availability",
+    "num_reviews", "image_url", "rating",
+)
+
+
+def flatten(doc: Optional[dict], fields: Iterable[str] = TRACKED_FIELDS) -> Dict[str, object]:
+    """`{dotted path: leaf value}` for `fields` of `doc`."""
+    flat = {}
+
+    def walk(prefix: str, value):
+        if isinstance(value, dict) and value:
+            for key, child in value.items():
+                walk(f"{prefix}.{key}", child)
+        else:
+            flat[prefix] = value
+
+    for field in fields:
+        if doc and field in doc:
+            walk(field, doc[field])
+    return flat
+
+
+def diff(old: Optional[dict], new: Optional[dict], fields: Iterable[str] = TRACKED_FIELDS) -> Dict[str, dict]:
+    """`{dotted path: {"old": ..., "new": ...}}` for every leaf that differs."""
+    fields = tuple(fields)
+    before, after = flatten(old, fields), flatten(new, fields)
+    return {
+        path: {"old": before.get(path), "new": after.get(path)}
+        for path in sorted(before.keys() | after.keys())
+        if before.get(path) != after.get(path)
+    }
+
+
+def apply(doc: dict, changes: Dict[str, dict], side: str = "new") -> dict:
+    """
+    Copy of `doc` with every path in `changes` set to its `side` ("new" to
+    replay a change, "old" to undo it). None removes the path.
+    """
+    result = {k: (dict(v) if isinstance(v, dict) else v) for k, v in doc.items()}
+    for path, change in changes.items():
+        *parents, leaf = path.split(".")
+        node = result
+        for key in parents:
+            child = node.get(key)
+            node[key] = dict(child) if isinstance(child, dict) else {}
+            node = node[key]
+        if change.get(side) is None:
+            node.pop(leaf, None)
+        else:
+            node[leaf] = change[side]
+    return result
+
+
+def state_at(current: dict, rows: list, at: datetime) -> dict:
+    """
+    The tracked fields of a book as they were at `at`, from its current
+    document and its history `rows` sorted newest first.
+    """
+    state = {f: current[f] for f in TRACKED_FIELDS if f in current}
+    for row in rows:
+        if row["ts"] <= at:
+            break
+        if "changes" in row:
+            state = apply(state, row["changes"], side="old")
+        else:
+            previous = row.get("previous") or {}
+            state = {f: previous[f] for f in TRACKED_FIELDS if f in previous}
+    return state
+
+
+def _tracked(doc: Optional[dict]) -> dict:
+    return {f: doc[f] for f in TRACKED_FIELDS if doc and f in doc}
+
+
+async def complete_changes(rows: list, previous: bool = False, latest: bool = False):
+    """
+    Give a page of history rows (newest first, as the API lists them) the
+    same shape: `changes` for every row, diffed for rows written before
+    field-level diffs, and with `previous=True` also `previous`, the tracked
+    fields of the book before the change. Each row is worked out from the
+    book's next newer row in the page; only the newest row of each book
+    needs the current book and the rows newer than the page, which there are
+    none of when the page starts at the newest row (`latest`).
+    """
+    by_book = {}  # book_id -> its rows in the page, newest first
+    for row in rows:
+        by_book.setdefault(row["book_id"], []).append(row)
+    book_ids = [b for b, book_rows in by_book.items() if previous or any("changes" not in r for r in book_rows)]
+    if not book_ids:
+        return
+    current = {
+        b["_id"]: b async for b in db.books.find({"_id": {"$in": book_ids}}, {f: 1 for f in TRACKED_FIELDS})
+    }
+    states = await asyncio.gather(*(_state_after(by_book[b][0], current.get(b), latest) for b in book_ids))
+
+    for book_id, after in zip(book_ids, states):
+        for row in by_book[book_id]:
+            if "changes" in row:
+                before = apply(after, row["changes"], side="old")
+            else:
+                before = _tracked(row.pop("previous", None))
+                row["changes"] = diff(before, after)
+            if previous:
+                row["previous"] = before
+            after = before
+
+
+async def _state_after(row: dict, current: Optional[dict], latest: bool) -> dict:
+    """The tracked fields of a book right after its history `row`."""
+    state = _tracked(current)
+    if latest:
+        return state
+    newer = db.book_history.find(
+        {"book_id": row["book_id"],
+         "$or": [{"ts": {"$gt": row["ts"]}}, {"ts": row["ts"], "_id": {"$gt": row["_id"]}}]},
+        {"changes": 1, **{f"previous.{f}": 1 for f in TRACKED_FIELDS}},
+    ).sort([("ts", 1), ("_id", 1)])
+    undo = []
+    async for later in newer:
+        if "changes" not in later:
+            # A legacy row holds the whole version before it, so nothing newer is needed
+            state = _tracked(later.get("previous"))
+            break
+        undo.append(later["changes"])
+    for changes in reversed(undo):
+        state = apply(state, changes, side="old")
+    return state
@@ -0,0 +1,262 @@
+"""
+Crawl metrics, exported in the Prometheus text format on `/metrics` and
+summarised at the end of the daily crawl.
+
+A deliberately small in-house registry rather than `prometheus_client`:
+the crawler needs a dozen series, and on the hot paths an update is one
+dict lookup (plus one bisect for a histogram). Label values are passed as
+a tuple in the order of the metric's label names. With
+METRICS_ENABLED=false every update is a no-op.
+
+Gauges can be backed by a function (e.g. a queue's `qsize`), evaluated
+when the metrics are read.
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from src.utils.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        registry.metrics.append(self)
+
+    @abstractmethod
+    def reset(self):
+        ...
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def summarise(self, elapsed: float) -> List[str]:
+        ...
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        if self.registry.enabled:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def reset(self):
+        self.values.clear()
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in self.values.items()]
+
+    def summarise(self, elapsed: float) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, k)}: {_format_value(v)} ({v / elapsed:.1f}/s)"
+            for k, v in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Labels, float] = {}
+        self.functions: Dict[Labels, Callable[[], float]] = {}
+
+    def set(self, value: float, labels: Labels = ()):
+        if self.registry.enabled:
+            self.functions.pop(labels, None)
+            self.values[labels] = value
+
+    def set_function(self, fn: Callable[[], float], labels: Labels = ()):
+        """Read the value from `fn` whenever the metrics are collected."""
+        if self.registry.enabled:
+            self.functions[labels] = fn
+
+    def reset(self):
+        self.values.clear()
+        self.functions.clear()
+
+    def current(self) -> Dict[Labels, float]:
+        return {**self.values, **{k: fn() for k, fn in self.functions.items()}}
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in self.current().items()]
+
+    def summarise(self, elapsed: float) -> List[str]:
+        # Point-in-time values say nothing once the crawl is over
+        return []
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = (), count: int = 1):
+        """Record `count` observations of `value`."""
+        if not self.registry.enabled:
+            return
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += count
+        entry[1] += value * count
+
+    def time(self, labels: Labels = ()) -> _Timer:
+        """Context manager observing the time spent inside it."""
+        return _Timer(self, labels)
+
+    def reset(self):
+        self.values.clear()
+
+    def quantile(self, q: float, labels: Labels = ()) -> float:
+        """Estimate from the buckets (linear within the bucket, like PromQL's histogram_quantile)."""
+        counts = self.values[labels][0]
+        rank = q * sum(counts)
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return 0.0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+    def summarise(self, elapsed: float) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self.values.items()):
+            n = sum(counts)
+            lines.append(
+                f"{self.name}{_format_labels(self.label_names, labels)}: {n} in {total:.2f}s "
+                f"(mean {total / n * 1000:.1f} ms, p50 {self.quantile(0.5, labels) * 1000:.1f} ms, "
+                f"p95 {self.quantile(0.95, labels) * 1000:.1f} ms)"
+            )
+        return lines
+
+
+class Registry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.metrics: List[Metric] = []
+        self.started = time.monotonic()
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return Counter(self, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return Gauge(self, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return Histogram(self, name, help, labels, buckets=buckets)
+
+    def reset(self):
+        """Start a fresh measurement window (used per daily crawl, never under a live scraper)."""
+        for metric in self.metrics:
+            metric.reset()
+        self.started = time.monotonic()
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+    def summary(self) -> List[str]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        lines = [line for metric in self.metrics for line in metric.summarise(elapsed)]
+        return [f"📊 Crawl metrics over {elapsed:.1f}s:"] + [f"   {line}" for line in lines]
+
+
+metrics = Registry(enabled=settings.METRICS_ENABLED)
+
+# HTTP
+FETCH_SECONDS = metrics.histogram("crawler_fetch_seconds", "Duration of each HTTP request attempt")
+FETCH_RESPONSES = metrics.counter(
+    "crawler_fetch_responses_total", "HTTP responses by status (error: no response)", ["status"],
+)
+FETCH_RETRIES = metrics.counter("crawler_fetch_retries_total", "Request attempts retried, by status", ["status"])
+FETCH_FAILURES = metrics.counter("crawler_fetch_failures_total", "URLs given up on after every retry")
+FETCHED_BYTES = metrics.counter("crawler_fetched_bytes_total", "Response body bytes received")
+SLOT_WAIT_SECONDS = metrics.histogram(
+    "crawler_slot_wait_seconds", "Time waiting for a per-host concurrency slot and rate token",
+)
+IN_FLIGHT = metrics.gauge("crawler_fetches_in_flight", "HTTP requests currently holding a slot")
+
+# Parsing (timed per batch from the crawler, since it may run in another process)
+PARSE_SECONDS = metrics.histogram(
+    "crawler_parse_seconds", "Book page parse time, averaged over its batch", buckets=PARSE_BUCKETS,
+)
+
+# MongoDB
+DB_SECONDS = metrics.histogram("crawler_db_seconds", "Duration of crawler write calls", ["op"])
+DB_OPS = metrics.counter("crawler_db_ops_total", "Documents written by the crawler", ["collection"])
+
+# Pipeline
+QUEUE_DEPTH = metrics.gauge("crawler_queue_depth", "Items waiting in the crawl pipeline", ["queue"])
+CHANGES = metrics.counter("crawler_changes_total", "Books inserted or updated", ["type"])
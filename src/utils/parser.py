@@ -1,8 +1,37 @@
 # parser.py
-from bs4 import BeautifulSoup
+"""
+HTML extraction for listing and book pages.
+
+Three interchangeable engines produce identical dicts:
+
+- "lxml": lxml.html + cssselect, no BeautifulSoup tree at all.
+- "selectolax": the lexbor backend of selectolax. It follows the HTML5 tree
+  construction rules, which drop table cells outside a <table> (keeping
+  only their text); product information rows missing from its tree are
+  matched as <th>/<td> pairs in the page source instead.
+- "html.parser": BeautifulSoup with the stdlib parser (the original engine).
+
+`settings.PARSER_ENGINE` picks one; "auto" uses lxml when it is installed
+and falls back to html.parser otherwise.
+"""
+import html as html_lib
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+from functools import lru_cache
 from urllib.parse import urljoin
 from typing import Tuple, Dict, Optional
 from src.utils.config import settings
+from src.utils.logger import logger
+
+try:
+    import lxml.html
+except ImportError:  # optional dependency
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency
+    LexborHTMLParser = None
 
 BASE_URL = settings.START_URL.rstrip("/") + "/catalogue/"
 
@@ -14,59 +43,273 @@ RATING_MAP = {
     "Five": 5,
 }
 
+# Rows of the product information table we extract, in a single pass
+PRODUCT_INFO_ROWS = ("Price (incl. tax)", "Price (excl. tax)", "Number of reviews")
 
-def parse_listing_page(html: str) -> Tuple[list[str], Optional[str]]:
-    """Extract all book URLs and the next page link from a listing page."""
-    soup = BeautifulSoup(html, "html.parser")
-    book_links = [urljoin(BASE_URL, a["href"]) for a in soup.select(".product_pod h3 a")]
-    next_page = soup.select_one("li.next a")
-    next_url = urljoin(BASE_URL, next_page["href"]) if next_page else None
-    return book_links, next_url
+# The same rows as <th>/<td> pairs anywhere in the source, for trees that dropped the cells
+INFO_ROW_PATTERN = re.compile(
+    r"<th(?:\s[^>]*)?>(%s)</th>\s*<td(?:\s[^>]*)?>(.*?)</td>" % "|".join(map(re.escape, PRODUCT_INFO_ROWS)),
+    re.S,
+)
+TAG_PATTERN = re.compile(r"<[^>]+>")
 
+# Listing pages only need the product cards and the pager
+LISTING_STRAINER = SoupStrainer(["article", "li"])
 
-def parse_book_page(html: str, url: str) -> Dict:
-    """Extract structured book information from a book details page."""
-    soup = BeautifulSoup(html, "html.parser")
 
-    title = soup.select_one("h1").get_text(strip=True)
-    description_el = soup.select_one("#product_description ~ p")
-    description = description_el.get_text(strip=True) if description_el else ""
+def available_engines() -> list[str]:
+    engines = ["html.parser"]
+    if lxml is not None:
+        engines.append("lxml")
+    if LexborHTMLParser is not None:
+        engines.append("selectolax")
+    return engines
 
-    category_el = soup.select_one("ul.breadcrumb li:nth-of-type(3) a")
-    category = category_el.get_text(strip=True) if category_el else ""
 
-    price_incl = soup.find("th", string="Price (incl. tax)")
-    price_excl = soup.find("th", string="Price (excl. tax)")
-    price_incl = float(price_incl.find_next("td").text.strip()[1:]) if price_incl else 0.0
-    price_excl = float(price_excl.find_next("td").text.strip()[1:]) if price_excl else 0.0
+def resolve_engine(engine: Optional[str] = None) -> str:
+    engine = engine or settings.PARSER_ENGINE
+    if engine == "auto":
+        return "lxml" if lxml is not None else "html.parser"
+    if engine not in available_engines():
+        raise ValueError(f"Parser engine {engine!r} is not available (installed: {available_engines()})")
+    return engine
 
-    availability = soup.select_one(".instock.availability").get_text(strip=True)
 
-    image_rel = soup.select_one(".item.active img")["src"]
-    image_url = urljoin(BASE_URL, image_rel)
+def _build_book(title, description, category, info, availability, image_rel, rating_classes, url) -> Dict:
+    """Assemble the book dict from raw extracted strings, shared by every engine."""
+    price_incl = info.get("Price (incl. tax)")
+    price_excl = info.get("Price (excl. tax)")
+    num_reviews = info.get("Number of reviews")
 
-    rating_class = soup.select_one(".star-rating")
     rating = None
-    if rating_class:
-        for cls in rating_class["class"]:
-            if cls in RATING_MAP:
-                rating = RATING_MAP[cls]
-                break
-
-    num_reviews_el = soup.find("th", string="Number of reviews")
-    num_reviews = int(num_reviews_el.find_next("td").text) if num_reviews_el else 0
+    for cls in rating_classes or ():
+        if cls in RATING_MAP:
+            rating = RATING_MAP[cls]
+            break
 
     return {
         "name": title,
         "description": description,
         "category": category,
         "price": {
-            "including_tax": price_incl,
-            "excluding_tax": price_excl,
+            "including_tax": float(price_incl.strip()[1:]) if price_incl is not None else 0.0,
+            "excluding_tax": float(price_excl.strip()[1:]) if price_excl is not None else 0.0,
         },
         "availability": availability,
-        "num_reviews": num_reviews,
-        "image_url": image_url,
+        "num_reviews": int(num_reviews) if num_reviews is not None else 0,
+        "image_url": urljoin(BASE_URL, image_rel),
         "rating": rating,
         "source_url": url,
     }
+
+
+# ----------------------------
+# BeautifulSoup (html.parser)
+# ----------------------------
+
+def _listing_soup(html: str) -> Tuple[list[str], Optional[str]]:
+    soup = BeautifulSoup(html, "html.parser", parse_only=LISTING_STRAINER)
+    book_links = [urljoin(BASE_URL, a["href"]) for a in soup.select(".product_pod h3 a")]
+    next_page = soup.select_one("li.next a")
+    next_url = urljoin(BASE_URL, next_page["href"]) if next_page else None
+    return book_links, next_url
+
+
+def _book_soup(html: str, url: str) -> Dict:
+    soup = BeautifulSoup(html, "html.parser")
+
+    title = soup.select_one("h1").get_text(strip=True)
+    description_el = soup.select_one("#product_description ~ p")
+    category_el = soup.select_one("ul.breadcrumb li:nth-of-type(3) a")
+
+    info = {}
+    for th in soup.find_all("th"):
+        key = th.string
+        if key in PRODUCT_INFO_ROWS and key not in info:
+            info[key] = th.find_next("td").text
+
+    rating_el = soup.select_one(".star-rating")
+    return _build_book(
+        title,
+        description_el.get_text(strip=True) if description_el else "",
+        category_el.get_text(strip=True) if category_el else "",
+        info,
+        soup.select_one(".instock.availability").get_text(strip=True),
+        soup.select_one(".item.active img")["src"],
+        rating_el["class"] if rating_el else None,
+        url,
+    )
+
+
+# ----------------------------
+# lxml
+# ----------------------------
+
+def _lxml_strings(el):
+    """Text nodes under `el` in document order, skipping script/style like BeautifulSoup."""
+    if el.tag not in ("script", "style") and el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_text(el, strip: bool = False) -> str:
+    if strip:
+        return "".join(s.strip() for s in _lxml_strings(el) if s.strip())
+    return "".join(_lxml_strings(el))
+
+
+def _lxml_string(el) -> Optional[str]:
+    """Equivalent of BeautifulSoup's `Tag.string`."""
+    if len(el) == 0:
+        return el.text
+    if len(el) == 1 and not el.text and not el[0].tail and isinstance(el[0].tag, str):
+        return _lxml_string(el[0])
+    return None
+
+
+@lru_cache(maxsize=None)
+def _css(selector: str):
+    """Compile a CSS selector once instead of on every `cssselect()` call."""
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(selector)
+
+
+def _first(root, selector: str):
+    found = _css(selector)(root)
+    return found[0] if found else None
+
+
+def _listing_lxml(html: str) -> Tuple[list[str], Optional[str]]:
+    root = lxml.html.fromstring(html)
+    book_links = [urljoin(BASE_URL, a.get("href")) for a in _css(".product_pod h3 a")(root)]
+    next_page = _first(root, "li.next a")
+    next_url = urljoin(BASE_URL, next_page.get("href")) if next_page is not None else None
+    return book_links, next_url
+
+
+def _book_lxml(html: str, url: str) -> Dict:
+    root = lxml.html.fromstring(html)
+
+    description_el = _first(root, "#product_description ~ p")
+    category_el = _first(root, "ul.breadcrumb li:nth-of-type(3) a")
+
+    info = {}
+    for th in root.iter("th"):
+        key = _lxml_string(th)
+        if key in PRODUCT_INFO_ROWS and key not in info:
+            info[key] = _lxml_text(th.xpath("following::td[1]")[0])
+
+    rating_el = _first(root, ".star-rating")
+    return _build_book(
+        _lxml_text(_first(root, "h1"), strip=True),
+        _lxml_text(description_el, strip=True) if description_el is not None else "",
+        _lxml_text(category_el, strip=True) if category_el is not None else "",
+        info,
+        _lxml_text(_first(root, ".instock.availability"), strip=True),
+        _first(root, ".item.active img").attrib["src"],
+        rating_el.get("class", "").split() if rating_el is not None else None,
+        url,
+    )
+
+
+# ----------------------------
+# selectolax (lexbor)
+# ----------------------------
+
+def _listing_selectolax(html: str) -> Tuple[list[str], Optional[str]]:
+    tree = LexborHTMLParser(html)
+    book_links = [urljoin(BASE_URL, a.attributes["href"]) for a in tree.css(".product_pod h3 a")]
+    next_page = tree.css_first("li.next a")
+    next_url = urljoin(BASE_URL, next_page.attributes["href"]) if next_page else None
+    return book_links, next_url
+
+
+def _selectolax_string(node) -> Optional[str]:
+    """Equivalent of BeautifulSoup's `Tag.string`."""
+    child = node.child
+    if child is None or child.next is not None:
+        return None
+    if child.tag == "-text":
+        return child.text()
+    return _selectolax_string(child)
+
+
+def _selectolax_next_td(th):
+    node = th.next
+    while node is not None:
+        if node.tag == "td":
+            return node
+        node = node.next
+    return None
+
+
+def _info_rows_from_source(html: str, info: dict) -> None:
+    """Add the product information rows `info` lacks, matched in the raw HTML."""
+    for match in INFO_ROW_PATTERN.finditer(html):
+        key = match.group(1)
+        if key not in info:
+            info[key] = html_lib.unescape(TAG_PATTERN.sub("", match.group(2)))
+
+
+def _book_selectolax(html: str, url: str) -> Dict:
+    tree = LexborHTMLParser(html)
+
+    description_el = tree.css_first("#product_description ~ p")
+    category_el = tree.css_first("ul.breadcrumb li:nth-of-type(3) a")
+
+    info = {}
+    for th in tree.css("th"):
+        key = _selectolax_string(th)
+        if key in PRODUCT_INFO_ROWS and key not in info:
+            info[key] = _selectolax_next_td(th).text()
+    if len(info) < len(PRODUCT_INFO_ROWS):
+        _info_rows_from_source(html, info)
+
+    rating_el = tree.css_first(".star-rating")
+    return _build_book(
+        tree.css_first("h1").text(strip=True),
+        description_el.text(strip=True) if description_el else "",
+        category_el.text(strip=True) if category_el else "",
+        info,
+        tree.css_first(".instock.availability").text(strip=True),
+        tree.css_first(".item.active img").attributes["src"],
+        (rating_el.attributes.get("class") or "").split() if rating_el else None,
+        url,
+    )
+
+
+_ENGINES = {
+    "html.parser": (_listing_soup, _book_soup),
+    "lxml": (_listing_lxml, _book_lxml),
+    "selectolax": (_listing_selectolax, _book_selectolax),
+}
+
+
+def parse_listing_page(html: str, engine: Optional[str] = None) -> Tuple[list[str], Optional[str]]:
+    """Extract all book URLs and the next page link from a listing page."""
+    return _ENGINES[resolve_engine(engine)][0](html)
+
+
+def parse_book_page(html: str, url: str, engine: Optional[str] = None) -> Dict:
+    """Extract structured book information from a book details page."""
+    return _ENGINES[resolve_engine(engine)][1](html, url)
+
+
+def parse_book_pages(pages: list[Tuple[str, str]], engine: Optional[str] = None) -> list[Optional[Dict]]:
+    """
+    Parse a batch of (html, url) book pages in one call, so a whole listing
+    page can be shipped to a worker process at once. Pages that fail to
+    parse come back as None.
+    """
+    results = []
+    for html, url in pages:
+        try:
+            results.append(parse_book_page(html, url, engine=engine))
+        except Exception as e:
+            logger.error(f"Failed to parse book {url}: {e}")
+            results.append(None)
+    return results
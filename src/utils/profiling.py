@@ -0,0 +1,219 @@
+"""
+Profiling for crawl runs (`daily_crawl --profile`, `POST /crawl/start?profile=`).
+
+Two modes, both writing into `reports/`:
+- "cprofile": deterministic cProfile of the event-loop thread, saved as
+  `<name>.pstats` (open with `python -m pstats` or snakeviz). Exact call
+  counts, but every Python call pays the tracing cost, and parsing in a
+  thread or process pool is not seen (only the wait for it).
+- "sample": a background thread snapshots every thread's stack each
+  PROFILE_SAMPLE_INTERVAL seconds, saved as `<name>.collapsed`, one
+  `frame;frame;... count` line per distinct stack (the input of
+  flamegraph.pl, speedscope or inferno). Low overhead and covers the parse
+  and MongoDB threads; worker processes are still out of reach.
+
+Either way the time is attributed to the crawl stages (fetch, parse,
+hash/gzip, db, waiting on the event loop, other) and written to
+`<name>.stages.json`. In the collapsed stacks the stage is the root frame,
+so a flame graph splits by stage first.
+"""
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.config import settings
+from src.utils.logger import logger
+
+PROFILE_MODES = ("cprofile", "sample")
+REPORT_DIR = Path("reports")
+
+STAGES = ("fetch", "parse", "hash/gzip", "db", "waiting", "other")
+# Substrings of a frame's file path (or of a C function's name in pstats),
+# in priority order: a stack belongs to the first stage any of its frames
+# matches, so MongoDB's socket reads count as db, not fetch
+STAGE_MARKERS = (
+    ("hash/gzip", ("/hashlib.py", "/gzip.py", "_hashlib.", "zlib.")),
+    ("parse", ("/src/utils/parser.py", "/bs4/", "/soupsieve/", "/lxml/", "/selectolax/",
+               "/html/parser.py", "/_markupbase.py")),
+    ("db", ("/motor/", "/pymongo/", "/bson/")),
+    ("fetch", ("/httpx/", "/httpcore/", "/h11/", "/h2/", "/hpack/", "/anyio/", "/ssl.py", "_ssl.")),
+    ("waiting", ("/selectors.py", "select.epoll", "select.kqueue", "select.poll", "select.select")),
+)
+# Crawler helpers that are a stage on their own
+STAGE_FUNCTIONS = {"compute_hash": "hash/gzip", "gzip_bytes": "hash/gzip"}
+
+
+def frame_stage(filename: str, name: str) -> Optional[str]:
+    """The stage of one frame, or None if it could be anything."""
+    path = filename.replace("\\", "/")
+    if name in STAGE_FUNCTIONS and path.endswith("/src/utils/helpers.py"):
+        return STAGE_FUNCTIONS[name]
+    for stage, markers in STAGE_MARKERS:
+        if any(marker in path or marker in name for marker in markers):
+            return stage
+    return None
+
+
+def stack_stage(frames: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """The stage of a stack of (filename, function) frames, by STAGE_MARKERS priority."""
+    found = {frame_stage(filename, name) for filename, name in frames}
+    return next((stage for stage, _ in STAGE_MARKERS if stage in found), None)
+
+
+def pstats_stages(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Seconds of own time per stage. A function that is not a stage itself
+    takes its callers' stages, split by the time spent under each caller
+    (so `len` called from the parser counts as parse).
+    """
+    raw = stats.stats
+    shares: Dict[tuple, Dict[str, float]] = {}
+
+    def stage_shares(func: tuple) -> Dict[str, float]:
+        stage = frame_stage(func[0], func[2])
+        if stage:
+            return {stage: 1.0}
+        if func in shares:
+            return shares[func]
+        shares[func] = {"other": 1.0}  # recursion guard
+        callers = raw[func][4] if func in raw else {}
+        total = sum(own for _, _, own, _ in callers.values())
+        if not callers or total <= 0:
+            return shares[func]
+        result: Dict[str, float] = defaultdict(float)
+        for caller, (_, _, own, _) in callers.items():
+            for stage, share in stage_shares(caller).items():
+                result[stage] += share * own / total
+        shares[func] = dict(result)
+        return shares[func]
+
+    seconds: Dict[str, float] = defaultdict(float)
+    for func, (_, _, own, _, _) in raw.items():
+        for stage, share in stage_shares(func).items():
+            seconds[stage] += own * share
+    return {stage: seconds.get(stage, 0.0) for stage in STAGES}
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace("\\", "/")
+    for root in ("/site-packages/", "/src/"):
+        if root in path:
+            path = ("src/" if root == "/src/" else "") + path.split(root, 1)[1]
+            break
+    else:
+        path = path.rsplit("/", 1)[-1]
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of every other thread, one snapshot per `interval`."""
+
+    def __init__(self, interval: float, loop_thread: int):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.loop_thread = loop_thread
+        # (stage, thread name, code objects outermost first) -> samples
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                stage = stack_stage((code.co_filename, code.co_name) for code in codes)
+                if ident != self.loop_thread and stage in (None, "waiting"):
+                    continue  # an idle thread; only the event loop's waits are crawl time
+                self.samples[(stage or "other", names.get(ident, str(ident)), tuple(reversed(codes)))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> List[str]:
+        return [
+            ";".join([stage, thread, *map(_frame_label, codes)]) + f" {count}"
+            for (stage, thread, codes), count in self.samples.most_common()
+        ]
+
+    def stages(self) -> Dict[str, float]:
+        seconds: Dict[str, float] = defaultdict(float)
+        for (stage, _, _), count in self.samples.items():
+            seconds[stage] += count * self.interval
+        return {stage: seconds.get(stage, 0.0) for stage in STAGES}
+
+
+class CrawlProfiler:
+    """
+    Context manager profiling what runs inside it, in the thread that
+    enters it (the event loop's):
+
+        with CrawlProfiler("sample", name="daily_crawl_20250101"):
+            await crawler.run()
+
+    The files are written on exit, even if the crawl raised; `paths` lists them.
+    """
+
+    def __init__(self, mode: str, out_dir: Path = REPORT_DIR, name: Optional[str] = None,
+                 interval: Optional[float] = None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.out_dir = Path(out_dir)
+        self.name = name or f"profile_{time.strftime('%Y%m%d_%H%M%S')}"
+        self.interval = interval or settings.PROFILE_SAMPLE_INTERVAL
+        self.paths: List[Path] = []
+        self.stages: Dict[str, float] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def __enter__(self):
+        if self.mode == "cprofile" and settings.PARSE_EXECUTOR != "inline":
+            logger.warning(f"⚠️ cProfile sees only the event loop; parsing in the {settings.PARSE_EXECUTOR} "
+                           f"pool shows up as waiting (use PARSE_EXECUTOR=inline or --profile sample)")
+        logger.info(f"🔬 Profiling the crawl ({self.mode})")
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = StackSampler(self.interval, threading.get_ident())
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._started
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if self._profile is not None:
+            self._profile.disable()
+            path = self.out_dir / f"{self.name}.pstats"
+            self._profile.dump_stats(path)
+            self.stages = pstats_stages(pstats.Stats(self._profile))
+        else:
+            self._sampler.stop()
+            path = self.out_dir / f"{self.name}.collapsed"
+            path.write_text("\n".join(self._sampler.collapsed()) + "\n", encoding="utf-8")
+            self.stages = self._sampler.stages()
+        stages_path = self.out_dir / f"{self.name}.stages.json"
+        stages_path.write_text(json.dumps(
+            {"mode": self.mode, "seconds": elapsed, "stages": self.stages}, indent=2,
+        ), encoding="utf-8")
+        self.paths = [path, stages_path]
+
+        total = sum(self.stages.values()) or 1.0
+        logger.info(f"🔬 Profile ({self.mode}, {elapsed:.1f}s) written to {path}; time by stage:")
+        for stage, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            logger.info(f"   {stage:<10}{seconds:>9.2f}s {seconds / total:>6.1%}")
+        return False
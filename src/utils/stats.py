@@ -0,0 +1,200 @@
+"""
+Materialised catalogue statistics.
+
+`book_stats` holds one document per category:
+
+    {"_id": category, "count": n, "price_cents_sum": n, "price_min": x,
+     "price_max": x, "ratings": {"1": n, ..., "5": n, "none": n}}
+
+The crawler keeps it current with `$inc` deltas for every book it inserts
+or whose category, price or rating changes (see `StatsDelta`), so reading
+the stats costs one document per category. Prices are summed in integer
+cents to keep repeated increments exact. `$min`/`$max` can only widen the
+price bounds; when a price leaves a category its bounds are re-read from
+the (category, price) index, and removed when no priced book is left (a
+null would sort below every price, so a later `$min` would keep it).
+`recompute_stats` rebuilds everything from `books` for repair.
+"""
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+from src.db import db
+from src.utils.logger import logger
+
+RATING_KEYS = ("1", "2", "3", "4", "5", "none")
+
+
+def _rating_key(doc: dict) -> str:
+    rating = doc.get("rating")
+    return str(rating) if rating else "none"
+
+
+def _price(doc: dict) -> Optional[float]:
+    return (doc.get("price") or {}).get("including_tax")
+
+
+def _key(doc: dict) -> tuple:
+    return doc.get("category"), _price(doc), _rating_key(doc)
+
+
+class StatsDelta:
+    """The effect of one batch of book writes on `book_stats`."""
+
+    def __init__(self):
+        self.inc: Dict[Optional[str], Counter] = defaultdict(Counter)
+        self.bounds: Dict[Optional[str], List[float]] = {}  # category -> [min, max] of added prices
+        self.shrunk = set()  # categories that lost a price, whose bounds need re-reading
+
+    def _count(self, doc: dict, sign: int):
+        counts = self.inc[doc.get("category")]
+        counts["count"] += sign
+        counts[f"ratings.{_rating_key(doc)}"] += sign
+        price = _price(doc)
+        if price is not None:
+            counts["price_cents_sum"] += sign * round(price * 100)
+            counts["priced"] += sign
+
+    def add(self, doc: dict):
+        self._count(doc, 1)
+        price = _price(doc)
+        if price is not None:
+            bounds = self.bounds.setdefault(doc.get("category"), [price, price])
+            bounds[0], bounds[1] = min(bounds[0], price), max(bounds[1], price)
+
+    def remove(self, doc: dict):
+        self._count(doc, -1)
+        if _price(doc) is not None:
+            self.shrunk.add(doc.get("category"))
+
+    def update(self, old: dict, new: dict):
+        if _key(old) == _key(new):
+            return
+        if old.get("category") == new.get("category") and _price(old) == _price(new):
+            # Only the rating moved
+            counts = self.inc[new.get("category")]
+            counts[f"ratings.{_rating_key(old)}"] -= 1
+            counts[f"ratings.{_rating_key(new)}"] += 1
+            return
+        self.remove(old)
+        self.add(new)
+
+    def ops(self) -> list:
+        ops = []
+        for category in set(self.inc) | set(self.bounds):
+            update = {}
+            counts = {k: v for k, v in self.inc.get(category, {}).items() if v}
+            if counts:
+                update["$inc"] = counts
+            if category in self.bounds:
+                update["$min"] = {"price_min": self.bounds[category][0]}
+                update["$max"] = {"price_max": self.bounds[category][1]}
+            if update:
+                ops.append(UpdateOne({"_id": category}, update, upsert=True))
+        return ops
+
+
+async def refresh_price_bounds(categories) -> None:
+    """Re-read the cheapest and dearest price of each category from the index."""
+    ops = []
+    for category in categories:
+        query = {"category": category, "price.including_tax": {"$type": "number"}}
+        bounds = {}
+        for name, direction in (("price_min", 1), ("price_max", -1)):
+            doc = await db.books.find_one(query, {"price.including_tax": 1}, sort=[("price.including_tax", direction)])
+            if doc:
+                bounds[name] = _price(doc)
+        if bounds:
+            ops.append(UpdateOne({"_id": category}, {"$set": bounds}))
+        else:
+            ops.append(UpdateOne({"_id": category}, {"$unset": {"price_min": "", "price_max": ""}}))
+    if ops:
+        await db.book_stats.bulk_write(ops, ordered=False)
+
+
+async def apply_stats(delta: StatsDelta) -> None:
+    """Write a batch's delta; call after the books themselves are written."""
+    ops = delta.ops()
+    if ops:
+        await db.book_stats.bulk_write(ops, ordered=False)
+    if delta.shrunk:
+        await refresh_price_bounds(delta.shrunk)
+
+
+def summarise(stats_docs: List[dict]) -> dict:
+    """API view of the `book_stats` documents: per category and overall."""
+
+    def view(name, doc):
+        priced = doc.get("priced", 0)
+        return {
+            "category": name,
+            "count": doc.get("count", 0),
+            "price": {
+                "min": doc.get("price_min"),
+                "avg": round(doc.get("price_cents_sum", 0) / priced / 100, 2) if priced else None,
+                "max": doc.get("price_max"),
+            },
+            "ratings": {k: (doc.get("ratings") or {}).get(k, 0) for k in RATING_KEYS},
+        }
+
+    docs = [d for d in stats_docs if d.get("count", 0) > 0]
+    total = {"count": 0, "priced": 0, "price_cents_sum": 0, "ratings": Counter()}
+    for doc in docs:
+        for field in ("count", "priced", "price_cents_sum"):
+            total[field] += doc.get(field, 0)
+        total["ratings"].update(doc.get("ratings") or {})
+    mins = [d["price_min"] for d in docs if d.get("price_min") is not None]
+    maxes = [d["price_max"] for d in docs if d.get("price_max") is not None]
+    total["price_min"] = min(mins) if mins else None
+    total["price_max"] = max(maxes) if maxes else None
+
+    overall = view(None, total)
+    del overall["category"]
+    return {
+        "total": overall,
+        "categories": sorted((view(d["_id"], d) for d in docs), key=lambda c: c["category"] or ""),
+    }
+
+
+def fold_groups(groups: List[dict]) -> Dict[Optional[str], dict]:
+    """`book_stats` documents from (category, rating) aggregation groups; unpriced categories get no bounds."""
+    stats: Dict[Optional[str], dict] = {}
+    for group in groups:
+        category = group["_id"].get("category")
+        doc = stats.setdefault(category, {
+            "_id": category, "count": 0, "priced": 0, "price_cents_sum": 0, "ratings": {},
+        })
+        doc["count"] += group["count"]
+        doc["priced"] += group["priced"]
+        doc["price_cents_sum"] += int(group["cents"] or 0)
+        rating = _rating_key({"rating": group["_id"].get("rating")})
+        doc["ratings"][rating] = doc["ratings"].get(rating, 0) + group["count"]
+        for field, pick in (("price_min", min), ("price_max", max)):
+            values = [v for v in (doc.get(field), group[field]) if v is not None]
+            if values:
+                doc[field] = pick(values)
+    return stats
+
+
+RECOMPUTE_PIPELINE = [
+    {"$group": {
+        "_id": {"category": "$category", "rating": "$rating"},
+        "count": {"$sum": 1},
+        "priced": {"$sum": {"$cond": [{"$isNumber": "$price.including_tax"}, 1, 0]}},
+        "cents": {"$sum": {"$round": [{"$multiply": ["$price.including_tax", 100]}, 0]}},
+        "price_min": {"$min": "$price.including_tax"},
+        "price_max": {"$max": "$price.including_tax"},
+    }},
+]
+
+
+async def recompute_stats() -> int:
+    """Rebuild `book_stats` from a full aggregation over `books`; returns the number of categories."""
+    groups = await db.books.aggregate(RECOMPUTE_PIPELINE, allowDiskUse=True).to_list(length=None)
+    stats = fold_groups(groups)
+    ops = [ReplaceOne({"_id": category}, doc, upsert=True) for category, doc in stats.items()]
+    ops.append(DeleteMany({"_id": {"$nin": list(stats)}}))
+    await db.book_stats.bulk_write(ops, ordered=False)
+    logger.info(f"📊 Recomputed catalogue stats for {len(stats)} categories")
+    return len(stats)
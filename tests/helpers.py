@@ -0,0 +1,17 @@
+class AsyncCursor:
+    """Minimal stand-in for a Motor cursor over a fixed list of documents."""
+
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
@@ -0,0 +1,60 @@
+import itertools
+import pytest
+from src.db import BOOK_SORTS, DEFAULT_BOOK_SORT, book_query_indexes
+from fastapi import HTTPException
+from src.api.book_queries import books_filter, books_hint, books_projection, plan_stages, explain_summary
+
+
+def _serves_without_sort(index: list, query: dict, sort: list) -> bool:
+    """Equality fields first, then the sort keys in index order or fully reversed."""
+    equality = [f for f, v in query.items() if not isinstance(v, dict)]
+    # Sorting on a field pinned by equality is free
+    sort = [(f, d) for f, d in sort if f not in equality]
+    keys = list(index)
+    while keys and keys[0][0] in equality:
+        keys.pop(0)
+    head = keys[:len(sort)]
+    return head == sort or head == [(f, -d) for f, d in sort]
+
+
+@pytest.mark.parametrize("category,rating,price_range,sort_by", itertools.product(
+    [None, "Poetry"], [None, 4], [None, (10.0, 30.0)], [None, *BOOK_SORTS],
+))
+def test_every_books_query_has_an_esr_index(category, rating, price_range, sort_by):
+    query = books_filter(category, rating, *(price_range or (None, None)))
+    field, direction = BOOK_SORTS.get(sort_by, DEFAULT_BOOK_SORT)
+    sort = [(field, direction)] + ([("_id", direction)] if field != "_id" else [])
+
+    hint = books_hint(query, field, direction)
+
+    assert hint == [("_id", 1)] or hint in book_query_indexes()
+    assert _serves_without_sort(hint, query, sort)
+    if price_range and hint != [("_id", 1)]:
+        # The range comes last, after the sort keys
+        assert hint[-1][0] == "price.including_tax" or field == "price.including_tax"
+
+
+def test_explain_summary_flags_collscan_and_sort():
+    plan = {
+        "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+        "executionStats": {"nReturned": 3, "totalKeysExamined": 0, "totalDocsExamined": 100},
+    }
+    summary = explain_summary(plan)
+    assert summary["stages"] == ["SORT", "COLLSCAN"]
+    assert summary["index_scan_only"] is False
+
+    indexed = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+    assert plan_stages(indexed) == ["FETCH", "IXSCAN"]
+    assert explain_summary(indexed)["index_scan_only"] is True
+
+
+def test_books_projection_defaults_to_compact_and_keeps_the_sort_key():
+    compact = books_projection(None, always=("num_reviews",))
+    assert "description" not in compact and compact["num_reviews"] == 1
+
+    assert books_projection("name", always=("price.including_tax",)) == {"name": 1, "price.including_tax": 1}
+    assert books_projection("price", always=("price.including_tax",)) == {"price": 1}
+    assert "crawl_timestamp" in books_projection("all")
+
+    with pytest.raises(HTTPException):
+        books_projection("name,raw_html_hash")
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import AsyncMock
+from starlette.requests import Request
+from src.api.responses import success
+from src.api.cache import MemoryBackend, ResponseCache
+from src.utils.cache_generation import BooksGeneration
+
+
+def make_request(path: str, query: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []})
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_lru_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.api.cache.time.monotonic", lambda: now[0])
+    backend = MemoryBackend(max_entries=2, ttl=10)
+
+    await backend.set("a", b"1")
+    await backend.set("b", b"2")
+    assert await backend.get("a") == b"1"  # a is now the most recently used
+    await backend.set("c", b"3")
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+
+    now[0] += 11
+    assert await backend.get("c") is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_hits_until_generation_bump(monkeypatch):
+    generation = BooksGeneration(poll_interval=float("inf"))
+    cache = ResponseCache(MemoryBackend(16, 60), generation=generation)
+    meta = AsyncMock()
+    meta.find_one_and_update.return_value = {"value": 1}
+    monkeypatch.setattr("src.utils.cache_generation.db.meta", meta)
+
+    request = make_request("/books", "sort_by=price&category=Poetry")
+    assert await cache.lookup(request) is None
+    await cache.store(request, success("ok", data=[{"name": "A"}]))
+
+    # Same parameters in another order hit the stored body
+    hit = await cache.lookup(make_request("/books", "category=Poetry&sort_by=price"))
+    assert hit is not None and b'"A"' in hit.body
+
+    await generation.bump()
+    assert await cache.lookup(make_request("/books", "category=Poetry&sort_by=price")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
@@ -0,0 +1,35 @@
+import csv
+import json
+import pytest
+from bson import ObjectId
+from src.scheduler.change_report import ChangeReport
+
+
+@pytest.mark.asyncio
+async def test_change_report_streams_ndjson_and_csv(tmp_path):
+    report = ChangeReport(tmp_path, "daily_changes_test")
+    book_id = ObjectId()
+
+    await report({"type": "new", "book": {"_id": book_id, "name": "A"}})
+    await report({"type": "updated", "book": {"_id": book_id, "name": "B"}, "changes": {"name": "A"}})
+    # Flushed per change, so a crash here would still leave these lines on disk
+    assert report.ndjson_path.read_bytes().count(b"\n") == 2
+    assert report.csv_path.read_text().count("\n") == 3
+
+    await report({"type": "new", "book": {"_id": ObjectId(), "name": "C"}})
+    report.close()
+
+    lines = [json.loads(line) for line in report.ndjson_path.read_text().splitlines()]
+    assert [line["type"] for line in lines] == ["new", "updated", "new"]
+    assert lines[0]["book"]["_id"] == str(book_id)
+
+    with open(report.csv_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert json.loads(rows[1]["changes"]) == {"name": "A"}
+    assert rows[0]["changes"] == ""
+
+
+def test_change_report_without_changes_writes_nothing(tmp_path):
+    report = ChangeReport(tmp_path, "empty")
+    report.close()
+    assert list(tmp_path.iterdir()) == []
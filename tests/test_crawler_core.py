@@ -1,29 +1,14 @@
 import pytest
 import asyncio
 from httpx import Response, RequestError
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from src.crawler.crawler import Crawler
+from src.crawler.throttle import HostThrottle, parse_retry_after
+from src.crawler.http_client import get_http_client, close_http_client
 from src.utils.helpers import compute_hash
 from types import SimpleNamespace
-
-
-@pytest.mark.asyncio
-async def test_checkpoint_save_and_load(monkeypatch):
-    c = Crawler()
-    fake_db = {}
-
-    async def fake_update_one(filter, data, upsert):
-        fake_db["listing_last"] = data["$set"]["value"]
-
-    async def fake_find_one(filter):
-        return {"key": "listing_last", "value": fake_db.get("listing_last")}
-
-    monkeypatch.setattr("src.crawler.crawler.db.checkpoints.update_one", fake_update_one)
-    monkeypatch.setattr("src.crawler.crawler.db.checkpoints.find_one", fake_find_one)
-
-    await c.save_checkpoint("page-1.html")
-    result = await c.load_checkpoint()
-    assert "catalogue" in result
+from bson import ObjectId
+from tests.helpers import AsyncCursor
 
 
 @pytest.mark.asyncio
@@ -31,7 +16,7 @@ async def test_fetch_with_retry(monkeypatch):
     c = Crawler()
     calls = {"count": 0}
 
-    async def fake_get(url):
+    async def fake_get(url, **kwargs):
         calls["count"] += 1
         if calls["count"] < 2:
             raise RequestError("network error", request=None)
@@ -52,19 +37,273 @@ async def test_upsert_book_new(monkeypatch):
 
     # Async mocks for db
     mock_books = AsyncMock()
-    mock_books.find_one.return_value = None
-    mock_books.insert_one.return_value = SimpleNamespace(inserted_id="abc")
+    mock_books.find = MagicMock(return_value=AsyncCursor([]))
+    book_id = ObjectId()
+    mock_books.bulk_write.return_value = SimpleNamespace(upserted_ids={0: book_id})
 
     mock_html_snapshots = AsyncMock()
-    mock_html_snapshots.insert_one.return_value = SimpleNamespace(inserted_id="snap123")
+    mock_meta = AsyncMock()
+    mock_meta.find_one_and_update.return_value = {"value": 1}
+    mock_stats = AsyncMock()
 
     # Patch the collections
     monkeypatch.setattr("src.crawler.crawler.db.books", mock_books)
     monkeypatch.setattr("src.crawler.crawler.db.html_snapshots", mock_html_snapshots)
+    monkeypatch.setattr("src.crawler.crawler.db.meta", mock_meta)
+    monkeypatch.setattr("src.crawler.crawler.db.book_stats", mock_stats)
 
     result = await c.upsert_book(book_item, html)
 
     assert result["type"] == "new"
     assert result["book"]["name"] == "Test Book"
-    mock_books.insert_one.assert_awaited_once()
-    mock_html_snapshots.insert_one.assert_awaited_once()
+    assert result["book"]["_id"] == book_id
+    assert c.known.get("http://example.com/test") == (compute_hash(html), book_id)
+    mock_books.bulk_write.assert_awaited_once()
+    mock_html_snapshots.bulk_write.assert_awaited_once()
+    # A new book invalidates cached API responses
+    mock_meta.find_one_and_update.assert_awaited_once()
+    # ...and is counted in its category's stats
+    stats_op = mock_stats.bulk_write.await_args.args[0][0]
+    assert stats_op._doc["$inc"] == {"count": 1, "ratings.none": 1}
+
+
+@pytest.mark.asyncio
+async def test_upsert_books_reads_back_a_book_another_writer_inserted_first(monkeypatch):
+    c = Crawler()
+    html = b"<html></html>"
+    theirs = ObjectId()
+    mock_books = AsyncMock()
+    # Not there when looked up, but inserted by another worker before our upsert
+    mock_books.find = MagicMock(side_effect=[
+        AsyncCursor([]), AsyncCursor([{"_id": theirs, "source_url": "http://example.com/a"}]),
+    ])
+    mock_books.bulk_write.return_value = SimpleNamespace(upserted_ids={1: ObjectId()})
+    mock_stats = AsyncMock()
+    monkeypatch.setattr("src.crawler.crawler.db.books", mock_books)
+    monkeypatch.setattr("src.crawler.crawler.db.html_snapshots", AsyncMock())
+    monkeypatch.setattr("src.crawler.crawler.db.meta", AsyncMock())
+    monkeypatch.setattr("src.crawler.crawler.db.book_stats", mock_stats)
+
+    changes = await c.upsert_books([
+        ({"name": "A", "source_url": "http://example.com/a"}, html, None),
+        ({"name": "B", "source_url": "http://example.com/b"}, html, None),
+    ])
+
+    assert [change["book"]["name"] for change in changes] == ["B"]
+    assert c.known.get("http://example.com/a") == (compute_hash(html), theirs)
+    # Only B counts as a new book
+    (stats_op,) = mock_stats.bulk_write.await_args_list[0].args[0]
+    assert stats_op._doc["$inc"] == {"count": 1, "ratings.none": 1}
+
+
+def test_page_tracker_ships_each_page_once_all_its_fetches_settle():
+    from src.crawler.crawler import _PageTracker
+
+    tracker = _PageTracker()
+    tracker.add_page(0, 2)
+    tracker.add_page(1, 1)
+
+    assert tracker.book_fetched(0, ("a", "res-a")) is None
+    assert tracker.book_fetched(1, None) == []  # nothing to parse, e.g. a 304
+    assert tracker.book_fetched(0, ("b", "res-b")) == [("a", "res-a"), ("b", "res-b")]
+
+
+@pytest.mark.asyncio
+async def test_book_workers_parse_each_listing_page_as_one_batch(monkeypatch):
+    from src.crawler.crawler import _PageTracker
+
+    c = Crawler()
+    c.frontier = SimpleNamespace(mark=AsyncMock())
+    monkeypatch.setattr(c, "upsert_book", AsyncMock(return_value=None))
+
+    async def fake_revalidate(url):
+        return Response(200, text=f"<html>{url}</html>")
+
+    batches = []
+
+    async def fake_parse_books(pages):
+        batches.append([url for _, url in pages])
+        return [{"source_url": url} for _, url in pages]
+
+    monkeypatch.setattr(c, "revalidate", fake_revalidate)
+    monkeypatch.setattr(c.parse_executor, "parse_books", fake_parse_books)
+
+    tracker = _PageTracker()
+    queue = asyncio.Queue()
+    pages = {0: ["p0-a", "p0-b", "p0-c"], 1: ["p1-a", "p1-b"]}
+    for index, urls in pages.items():
+        tracker.add_page(index, len(urls))
+        for url in urls:
+            queue.put_nowait((index, url))
+
+    workers = [asyncio.create_task(c.book_worker(queue, tracker)) for _ in range(3)]
+    await queue.join()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    assert sorted(map(sorted, batches)) == [sorted(pages[0]), sorted(pages[1])]
+    assert c.upsert_book.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_crawl_book_not_modified_skips_parse_and_write(monkeypatch):
+    c = Crawler()
+    url = "http://example.com/book_1.html"
+    c.validators[url] = {"etag": '"abc"', "last_modified": "Wed, 05 Nov 2025 21:49:38 GMT"}
+    sent = {}
+
+    async def fake_get(url, headers=None):
+        sent.update(headers or {})
+        return Response(304)
+
+    def fail_parse(html, url, **kwargs):
+        raise AssertionError("304 responses must not be parsed")
+
+    monkeypatch.setattr(c.client, "get", fake_get)
+    monkeypatch.setattr("src.utils.parser.parse_book_page", fail_parse)
+    monkeypatch.setattr(c, "upsert_book", AsyncMock())
+
+    await c.crawl_book(url)
+
+    assert sent["If-None-Match"] == '"abc"'
+    assert "If-Modified-Since" in sent
+    assert c.change_count == 0
+    c.upsert_book.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_upsert_book_unchanged_skips_snapshot(monkeypatch):
+    c = Crawler()
+    html = b"<html>same</html>"
+    existing = {"_id": "abc", "source_url": "http://example.com/test", "raw_html_hash": compute_hash(html)}
+
+    mock_books = AsyncMock()
+    mock_books.find = MagicMock(return_value=AsyncCursor([existing]))
+    mock_html_snapshots = AsyncMock()
+
+    monkeypatch.setattr("src.crawler.crawler.db.books", mock_books)
+    monkeypatch.setattr("src.crawler.crawler.db.html_snapshots", mock_html_snapshots)
+
+    result = await c.upsert_book({"name": "Test Book", "source_url": "http://example.com/test"}, html)
+
+    assert result is None
+    mock_html_snapshots.bulk_write.assert_not_awaited()
+    mock_books.bulk_write.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_write_batcher_flushes_on_size_and_close():
+    from src.crawler.batcher import WriteBatcher
+
+    flushed, written = [], []
+
+    async def flush_fn(entries):
+        flushed.append(list(entries))
+
+    async def on_written():
+        written.append(True)
+
+    batcher = WriteBatcher(flush_fn, max_items=2, max_delay=60)
+    await batcher.add("a", on_written)
+    assert flushed == [] and written == []
+    await batcher.add("b", on_written)
+    await batcher.add("c")
+    await batcher.close()
+
+    assert flushed == [["a", "b"], ["c"]]
+    assert len(written) == 2
+
+
+@pytest.mark.asyncio
+async def test_upsert_books_known_unchanged_skips_queries(monkeypatch):
+    c = Crawler()
+    html = b"<html>known</html>"
+    c.known.add("http://example.com/known", compute_hash(html), ObjectId())
+
+    mock_books = AsyncMock()
+    mock_books.find = MagicMock()
+    monkeypatch.setattr("src.crawler.crawler.db.books", mock_books)
+
+    changes = await c.upsert_books([({"name": "Known", "source_url": "http://example.com/known"}, html, None)])
+
+    assert changes == []
+    mock_books.find.assert_not_called()
+    mock_books.bulk_write.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_host_throttle_aimd_and_retry_after():
+    host = HostThrottle("example.com", limit=4, rate=10, max_limit=8)
+
+    await host.acquire()
+    host.release(0.1, 200)
+    assert host.limit == 4.25 and host.rate == 10.5
+
+    await host.acquire()
+    host.release(0.1, 429, retry_after=parse_retry_after("30"))
+    assert host.limit == 2.125 and host.rate == 5.25
+    assert host.snapshot()["paused_for"] > 29
+    assert host.in_flight == 0
+
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+@pytest.mark.asyncio
+async def test_host_throttle_backs_off_on_fast_server_errors():
+    host = HostThrottle("example.com", limit=4, rate=10, max_limit=8)
+
+    for status in (500, 502, 504):
+        await host.acquire()
+        host.release(0.01, status)
+    assert host.limit == 1 and host.rate == 1.25
+
+    # Client errors are the URL's problem, not the host's
+    await host.acquire()
+    host.release(0.01, 404)
+    assert host.limit == 2 and host.rate == 1.75
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_until_closed():
+    first = get_http_client()
+    assert Crawler().client is first and Crawler().client is first
+
+    await close_http_client()
+    assert first.is_closed
+    second = get_http_client()
+    assert second is not first
+    # Waiting for a pooled connection is bounded too
+    assert second.timeout.pool == second.timeout.connect is not None
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_upsert_books_writes_diffs_and_skips_markup_only_changes(monkeypatch):
+    c = Crawler()
+    book_id = ObjectId()
+    existing = {"_id": book_id, "name": "Book", "rating": 3, "source_url": "http://example.com/b", "raw_html_hash": "0" * 64}
+
+    mock_books = AsyncMock()
+    mock_books.find = MagicMock(side_effect=lambda *a, **k: AsyncCursor([existing]))
+    mock_books.bulk_write.return_value = SimpleNamespace(upserted_ids={})
+    mock_history = AsyncMock()
+    monkeypatch.setattr("src.crawler.crawler.db.books", mock_books)
+    monkeypatch.setattr("src.crawler.crawler.db.book_history", mock_history)
+    monkeypatch.setattr("src.crawler.crawler.db.html_snapshots", AsyncMock())
+    monkeypatch.setattr("src.crawler.crawler.db.meta", AsyncMock())
+    mock_stats = AsyncMock()
+    monkeypatch.setattr("src.crawler.crawler.db.book_stats", mock_stats)
+
+    # New markup, same parsed fields: no history, no change
+    changes = await c.upsert_books([({"name": "Book", "rating": 3, "source_url": existing["source_url"]}, b"<p>1</p>", None)])
+    assert changes == []
+    mock_history.bulk_write.assert_not_awaited()
+
+    changes = await c.upsert_books([({"name": "Book", "rating": 4, "source_url": existing["source_url"]}, b"<p>2</p>", None)])
+    assert changes[0]["changes"] == {"rating": {"old": 3, "new": 4}}
+    row = mock_history.bulk_write.await_args.args[0][0]._doc
+    assert row["changes"] == {"rating": {"old": 3, "new": 4}} and "previous" not in row
+    stats_op = mock_stats.bulk_write.await_args.args[0][0]._doc
+    assert stats_op == {"$inc": {"ratings.3": -1, "ratings.4": 1}}
@@ -1,34 +1,132 @@
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from src.crawler.crawler import Crawler
 
+
+def mock_frontier(monkeypatch):
+    """Mocked `crawl_runs` / `frontier` / `listing_pages` collections with no run to resume."""
+    async def no_rows():
+        return
+        yield
+
+    crawl_runs = AsyncMock()
+    crawl_runs.find_one.return_value = None
+    frontier = AsyncMock()
+    frontier.aggregate = MagicMock(side_effect=lambda pipeline: no_rows())
+    monkeypatch.setattr("src.crawler.crawler.db.crawl_runs", crawl_runs)
+    monkeypatch.setattr("src.crawler.crawler.db.frontier", frontier)
+    monkeypatch.setattr("src.crawler.crawler.db.listing_pages", AsyncMock())
+    return frontier
+
+
 @pytest.mark.asyncio
 async def test_full_run(monkeypatch):
     c = Crawler()
 
-    async def fake_fetch(url):
+    async def fake_fetch(url, **kwargs):
         class FakeResponse:
             status_code = 200
+            headers = {}
             text = "<html></html>"
             content = b"<html></html>"
         return FakeResponse()
 
     # Async mocks for db
-    mock_checkpoints = AsyncMock()
-    mock_checkpoints.find_one.return_value = None
     mock_books = AsyncMock()
     mock_books.insert_one.return_value = {"inserted_id": "xyz"}
     mock_html_snapshots = AsyncMock()
     mock_html_snapshots.insert_one.return_value = {"inserted_id": "snap"}
 
-    monkeypatch.setattr("src.crawler.crawler.db.checkpoints", mock_checkpoints)
+    mock_frontier(monkeypatch)
     monkeypatch.setattr("src.crawler.crawler.db.books", mock_books)
     monkeypatch.setattr("src.crawler.crawler.db.html_snapshots", mock_html_snapshots)
     monkeypatch.setattr("src.crawler.crawler.ensure_indexes", AsyncMock())
+    monkeypatch.setattr(c, "load_known_books", AsyncMock())
     monkeypatch.setattr(c, "fetch_with_retry", fake_fetch)
     monkeypatch.setattr("src.crawler.crawler.parse_listing_page", lambda html: (["url_1", "url_2"], None))
-    monkeypatch.setattr("src.crawler.crawler.parse_book_page", lambda html, url: {"name": "Book", "source_url": url})
-    monkeypatch.setattr(c, "upsert_book", AsyncMock(return_value={"type": "new", "book": {"name": "Book"}}))
+    monkeypatch.setattr("src.utils.parser.parse_book_page", lambda html, url, **kwargs: {"name": "Book", "source_url": url})
+    monkeypatch.setattr(c, "upsert_books", AsyncMock(
+        side_effect=lambda batch: [{"type": "new", "book": {"name": "Book"}} for _ in batch]
+    ))
 
     changes = await c.run()
+    assert len(changes) == 2
     assert all(c["type"] == "new" for c in changes)
+
+
+@pytest.mark.asyncio
+async def test_run_streams_changes_to_sink(monkeypatch):
+    c = Crawler()
+
+    async def fake_fetch(url, **kwargs):
+        class FakeResponse:
+            status_code = 200
+            headers = {}
+            text = "<html></html>"
+            content = b"<html></html>"
+        return FakeResponse()
+
+    frontier = mock_frontier(monkeypatch)
+    monkeypatch.setattr("src.crawler.crawler.ensure_indexes", AsyncMock())
+    monkeypatch.setattr(c, "load_known_books", AsyncMock())
+    monkeypatch.setattr(c, "fetch_with_retry", fake_fetch)
+    monkeypatch.setattr("src.crawler.crawler.parse_listing_page", lambda html: (["url_1", "url_2", "url_3"], None))
+    monkeypatch.setattr("src.utils.parser.parse_book_page", lambda html, url, **kwargs: {"name": "Book", "source_url": url})
+    monkeypatch.setattr(c, "upsert_books", AsyncMock(
+        side_effect=lambda batch: [{"type": "new", "book": item} for item, _, _ in batch]
+    ))
+
+    streamed = []
+
+    async def sink(change):
+        streamed.append(change["book"]["source_url"])
+
+    returned = await c.run(on_change=sink)
+
+    assert returned == []
+    assert sorted(streamed) == ["url_1", "url_2", "url_3"]
+    assert c.change_count == 3
+    # The completed run leaves nothing behind to resume
+    frontier.delete_many.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_incremental_run_on_an_empty_database_crawls_the_whole_catalogue(monkeypatch):
+    c = Crawler()
+    pages = {
+        "page-1.html": (["url_1", "url_2"], "page-2.html"),
+        "page-2.html": (["url_3", "url_4"], "page-3.html"),
+        "page-3.html": (["url_5"], None),
+    }
+
+    async def fake_fetch(url, **kwargs):
+        class FakeResponse:
+            status_code = 200
+            headers = {}
+            text = url.rsplit("/", 1)[-1]
+            content = text.encode()
+        return FakeResponse()
+
+    mock_frontier(monkeypatch)
+    recrawl_schedule = AsyncMock()
+    recrawl_schedule.estimated_document_count.return_value = 0
+    listing_pages = AsyncMock()
+    listing_pages.estimated_document_count.return_value = 0
+    monkeypatch.setattr("src.crawler.crawler.db.recrawl_schedule", recrawl_schedule)
+    monkeypatch.setattr("src.crawler.crawler.db.listing_pages", listing_pages)
+    monkeypatch.setattr(c, "planner", AsyncMock())
+    monkeypatch.setattr("src.crawler.crawler.ensure_indexes", AsyncMock())
+    monkeypatch.setattr(c, "load_known_books", AsyncMock())
+    monkeypatch.setattr(c, "fetch_with_retry", fake_fetch)
+    monkeypatch.setattr("src.crawler.crawler.parse_listing_page", lambda html: pages.get(html, ([], None)))
+    monkeypatch.setattr("src.utils.parser.parse_book_page", lambda html, url, **kwargs: {"name": "Book", "source_url": url})
+    monkeypatch.setattr(c, "upsert_books", AsyncMock(
+        side_effect=lambda batch: [{"type": "new", "book": item} for item, _, _ in batch]
+    ))
+
+    changes = await c.run(incremental=True)
+
+    assert sorted(change["book"]["source_url"] for change in changes) == [
+        "url_1", "url_2", "url_3", "url_4", "url_5",
+    ]
+    c.planner.due_urls.assert_not_awaited()
@@ -0,0 +1,77 @@
+import asyncio
+import csv
+import gzip
+import io
+import orjson
+from datetime import datetime
+from bson import ObjectId
+from src.api import export
+from src.api.export import csv_columns, export_stream
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+    async def close(self):
+        self.closed = True
+
+
+def _book(i):
+    return {
+        "_id": ObjectId(),
+        "name": f"Book, \"{i}\"",
+        "price": {"including_tax": 10.5 + i, "excluding_tax": 10.0 + i},
+        "rating": None if i % 2 else 4,
+        "crawl_timestamp": datetime(2025, 1, 2, 3, 4, 5),
+    }
+
+
+def _export(docs, fmt, fields=("name", "price", "rating", "crawl_timestamp"), **kwargs):
+    cursor = FakeCursor(docs)
+
+    async def collect():
+        return [chunk async for chunk in export_stream(cursor, fmt, csv_columns(fields), **kwargs)]
+
+    return asyncio.run(collect()), cursor
+
+
+def test_ndjson_export_streams_one_document_per_line(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_BYTES", 200)
+    docs = [_book(i) for i in range(20)]
+
+    chunks, cursor = _export(docs, "ndjson")
+
+    assert len(chunks) > 1  # rows are flushed as they accumulate, not at the end
+    lines = b"".join(chunks).splitlines()
+    assert [orjson.loads(line)["_id"] for line in lines] == [str(d["_id"]) for d in docs]
+    assert orjson.loads(lines[0])["crawl_timestamp"] == "2025-01-02T03:04:05"
+    assert cursor.closed
+
+
+def test_csv_export_flattens_price_and_quotes_values():
+    docs = [_book(i) for i in range(3)]
+
+    chunks, _ = _export(docs, "csv")
+
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["_id", "name", "price.including_tax", "price.excluding_tax", "rating", "crawl_timestamp"]
+    assert rows[1] == [str(docs[0]["_id"]), 'Book, "0"', "10.5", "10.0", "4", "2025-01-02T03:04:05"]
+    assert rows[2][4] == ""  # missing rating
+
+
+def test_gzip_export_is_one_valid_member():
+    docs = [_book(i) for i in range(50)]
+
+    plain, _ = _export(docs, "ndjson")
+    compressed, _ = _export(docs, "ndjson", gzip=True)
+
+    assert gzip.decompress(b"".join(compressed)) == b"".join(plain)
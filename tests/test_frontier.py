@@ -0,0 +1,291 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from httpx import Response
+from bson import ObjectId
+from src.crawler import frontier as frontier_module
+from src.crawler.crawler import Crawler
+from src.crawler.frontier import Frontier, LocalFrontier, BOOK, LISTING, PENDING, LEASED, DONE, FAILED
+from src.crawler.worker import CrawlWorker
+from src.utils.helpers import now_utc
+from tests.helpers import AsyncCursor
+
+
+class MemoryFrontier(Frontier):
+    """Frontier over a dict shared by several instances, with the same lease semantics."""
+
+    def __init__(self, entries: dict, owner: str, lease_seconds: float = 60, max_attempts: int = 2):
+        super().__init__(ObjectId(), owner=owner, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        self.entries = entries
+
+    async def add(self, urls, kind):
+        for url in urls:
+            self.entries.setdefault(url, {"_id": url, "url": url, "kind": kind, "status": PENDING, "attempts": 0})
+
+    async def claim(self):
+        now = now_utc()
+        expired = [e for e in self.entries.values() if e["status"] == LEASED and e["lease_expires"] < now]
+        for e in expired:
+            if e["attempts"] >= self.max_attempts:
+                e["status"] = FAILED
+        candidates = sorted(
+            (e for e in self.entries.values() if e["status"] == PENDING or e in expired and e["status"] == LEASED),
+            key=lambda e: e["kind"] != LISTING,
+        )
+        if not candidates:
+            return None
+        entry = candidates[0]
+        entry.update(status=LEASED, owner=self.owner, lease_expires=now + self.lease, attempts=entry["attempts"] + 1)
+        return dict(entry)
+
+    async def _settle(self, entry, update):
+        stored = self.entries[entry["url"]]
+        if stored["owner"] == self.owner and stored["status"] == LEASED:
+            stored.update(update)
+
+    async def remaining(self):
+        return sum(e["status"] in (PENDING, LEASED) for e in self.entries.values())
+
+    async def finish(self):
+        counts = {}
+        for e in self.entries.values():
+            counts[e["status"]] = counts.get(e["status"], 0) + 1
+        return counts
+
+
+class StubCrawler:
+    """The parts of Crawler a worker uses, over a two-page catalogue with one broken book."""
+
+    def __init__(self, fetched: list):
+        self.fetched = fetched
+        self.validators = {}
+        self.change_count = 0
+        self._on_change = None
+        self._stop = False
+        self.parse_executor = SimpleNamespace(shutdown=lambda: None)
+        self.planner = SimpleNamespace(flush=AsyncMock())
+
+    async def load_known_books(self):
+        pass
+
+    def open_writer(self):
+        pass
+
+    async def close_writer(self):
+        pass
+
+    async def fetch_listing(self, url):
+        self.fetched.append(url)
+        await asyncio.sleep(0)
+        if url == "page-1":
+            return [f"book-{i}" for i in range(5)], "page-2"
+        return [f"book-{i}" for i in range(3, 8)] + ["broken"], None
+
+    async def revalidate(self, url):
+        self.fetched.append(url)
+        await asyncio.sleep(0)
+        return None if url == "broken" else Response(200, text=url)
+
+    async def store_books(self, fetched, on_written=None):
+        for url, _ in fetched:
+            await on_written(url)
+
+
+@pytest.mark.asyncio
+async def test_workers_share_a_run_without_fetching_anything_twice():
+    entries, fetched = {}, []
+    first = MemoryFrontier(entries, owner="a")
+    await first.add(["page-1"], LISTING)
+    workers = [
+        CrawlWorker(MemoryFrontier(entries, owner=owner), StubCrawler(fetched), concurrency=3, poll_interval=0.01)
+        for owner in ("a", "b")
+    ]
+
+    counts = await asyncio.wait_for(asyncio.gather(*(w.run() for w in workers)), timeout=5)
+
+    good = [u for u in fetched if u != "broken"]
+    assert sorted(good) == sorted(set(good))  # books 3 and 4 are linked twice but fetched once
+    assert len(good) == 2 + 8
+    assert fetched.count("broken") == 2  # max_attempts claims, then given up
+    assert counts[0] == {DONE: 10, FAILED: 1}
+    assert sum(w.processed for w in workers) == 12
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_reclaimed_by_another_worker():
+    entries = {}
+    dead = MemoryFrontier(entries, owner="dead", lease_seconds=60)
+    await dead.add(["book-1"], BOOK)
+    entry = await dead.claim()
+    alive = MemoryFrontier(entries, owner="alive")
+
+    assert await alive.claim() is None
+    entries["book-1"]["lease_expires"] = now_utc() - timedelta(seconds=1)
+    reclaimed = await alive.claim()
+    assert reclaimed["owner"] == "alive" and reclaimed["attempts"] == 2
+
+    # The dead worker's late completion no longer counts
+    await dead.complete(entry)
+    assert entries["book-1"]["status"] == LEASED
+    await alive.complete(reclaimed)
+    assert entries["book-1"]["status"] == DONE
+
+
+@pytest.mark.asyncio
+async def test_claim_prefers_pending_listings_before_expired_leases(monkeypatch):
+    collection = AsyncMock()
+    collection.find_one_and_update.side_effect = [None, {"url": "u", "_id": 1}]
+    collection.update_many.return_value = SimpleNamespace(modified_count=0)
+    monkeypatch.setattr(frontier_module, "db", SimpleNamespace(frontier=collection))
+    frontier = Frontier(ObjectId(), owner="w", lease_seconds=30, max_attempts=3)
+
+    entry = await frontier.claim()
+
+    assert entry["url"] == "u"
+    pending, expired = collection.find_one_and_update.await_args_list
+    assert pending.args[0] == {"run": frontier.run_id, "status": PENDING}
+    assert pending.kwargs["sort"] == [("priority", 1)]
+    assert expired.args[0]["status"] == LEASED and "$lt" in expired.args[0]["lease_expires"]
+    assert pending.args[1]["$set"]["owner"] == "w" and pending.args[1]["$inc"] == {"attempts": 1}
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_reclaimed_only_below_max_attempts(monkeypatch):
+    collection = AsyncMock()
+    collection.find_one_and_update.return_value = None
+    collection.update_many.return_value = SimpleNamespace(modified_count=1)
+    monkeypatch.setattr(frontier_module, "db", SimpleNamespace(frontier=collection))
+    frontier = Frontier(ObjectId(), owner="w", lease_seconds=30, max_attempts=3)
+
+    assert await frontier.claim() is None
+
+    given_up = collection.update_many.await_args
+    assert given_up.args[0]["status"] == LEASED and given_up.args[0]["attempts"] == {"$gte": 3}
+    assert given_up.args[1]["$set"]["status"] == FAILED
+    _, reclaim = collection.find_one_and_update.await_args_list
+    assert reclaim.args[0]["attempts"] == {"$lt": 3}
+
+
+class RecordingFrontier(LocalFrontier):
+    """LocalFrontier whose batches are kept in `statuses` instead of MongoDB."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statuses = {}
+        self.finish = AsyncMock(return_value={})
+
+    async def _write(self, entries):
+        for url, insert, update in entries:
+            self.statuses[url] = update.get("status", insert.get("status"))
+
+
+@pytest.mark.asyncio
+async def test_local_frontier_writes_one_upsert_per_url_per_batch(monkeypatch):
+    collection = AsyncMock()
+    monkeypatch.setattr(frontier_module, "db", SimpleNamespace(frontier=collection))
+    frontier = LocalFrontier(ObjectId(), seen=["old"])
+
+    assert await frontier.add(["old", "new", "new"], BOOK) == ["new"]
+    await frontier.mark("new", LEASED)
+    await frontier.mark("new", DONE)
+    await frontier.close()
+
+    (op,) = collection.bulk_write.await_args.args[0]
+    assert op._filter == {"run": frontier.run_id, "url": "new"}
+    assert op._doc["$set"] == {"status": DONE}
+    assert op._doc["$setOnInsert"]["kind"] == BOOK and "status" not in op._doc["$setOnInsert"]
+
+
+@pytest.mark.asyncio
+async def test_local_frontier_resumes_what_was_left(monkeypatch):
+    run_id = ObjectId()
+    ids = [ObjectId() for _ in range(5)]
+    entries = [
+        {"_id": ids[0], "url": "page-1", "kind": LISTING, "status": DONE},
+        {"_id": ids[3], "url": "book-2", "kind": BOOK, "status": PENDING},
+        {"_id": ids[1], "url": "book-1", "kind": BOOK, "status": LEASED},
+        {"_id": ids[2], "url": "book-0", "kind": BOOK, "status": DONE},
+        {"_id": ids[4], "url": "page-2", "kind": LISTING, "status": PENDING},
+    ]
+    runs = AsyncMock()
+    runs.find_one.return_value = {"_id": run_id}
+    collection = MagicMock()
+    collection.find.return_value.batch_size.return_value = AsyncCursor(entries)
+    monkeypatch.setattr(frontier_module, "db", SimpleNamespace(crawl_runs=runs, frontier=collection))
+
+    frontier = await LocalFrontier.open(["page-1"])
+    await frontier.close()
+
+    assert frontier.run_id == run_id
+    assert frontier.pending == {LISTING: ["page-2"], BOOK: ["book-1", "book-2"]}  # in discovery order
+    assert await frontier.add(["book-0", "book-3"], BOOK) == ["book-3"]
+    runs.insert_one.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_crawl_resumes_without_refetching_done_urls(monkeypatch):
+    crawler = Crawler()
+    frontier = RecordingFrontier(
+        ObjectId(), seen=["page-1", "page-2", "book-1", "book-2", "book-3"],
+        pending={LISTING: ["page-2"], BOOK: ["book-3"]},
+    )
+    fetched = []
+
+    async def fetch_listing(url):
+        fetched.append(url)
+        return ["book-2", "book-4"], None
+
+    async def revalidate(url):
+        fetched.append(url)
+        return Response(304) if url == "book-3" else Response(200, text=url)
+
+    async def store_books(batch, on_written=None):
+        for url, _ in batch:
+            await on_written(url)
+
+    monkeypatch.setattr("src.crawler.crawler.LocalFrontier.open", AsyncMock(return_value=frontier))
+    monkeypatch.setattr(crawler, "fetch_listing", fetch_listing)
+    monkeypatch.setattr(crawler, "revalidate", revalidate)
+    monkeypatch.setattr(crawler, "store_books", store_books)
+
+    await crawler.crawl_listing(crawler.start_url)
+
+    assert sorted(fetched) == ["book-3", "book-4", "page-2"]
+    assert frontier.statuses == {"page-2": DONE, "book-3": DONE, "book-4": DONE}
+    frontier.finish.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_a_failed_listing_page_leaves_the_run_open(monkeypatch):
+    crawler = Crawler()
+    frontier = RecordingFrontier(ObjectId(), seen=["page-1"], pending={LISTING: ["page-1"], BOOK: []})
+    monkeypatch.setattr("src.crawler.crawler.LocalFrontier.open", AsyncMock(return_value=frontier))
+    monkeypatch.setattr(crawler, "fetch_listing", AsyncMock(return_value=(None, None)))
+
+    await crawler.crawl_listing(crawler.start_url)
+
+    assert frontier.statuses == {"page-1": PENDING}  # retried by the resumed run
+    assert frontier.unsettled == {"page-1"}
+    frontier.finish.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_books_whose_batch_failed_to_store_leave_the_run_open(monkeypatch):
+    crawler = Crawler()
+    frontier = RecordingFrontier(ObjectId(), seen=["page-1"], pending={LISTING: ["page-1"], BOOK: []})
+
+    async def store_books(batch, on_written=None):
+        raise RuntimeError("bulk write failed")
+
+    monkeypatch.setattr("src.crawler.crawler.LocalFrontier.open", AsyncMock(return_value=frontier))
+    monkeypatch.setattr(crawler, "fetch_listing", AsyncMock(return_value=(["book-1", "book-2"], None)))
+    monkeypatch.setattr(crawler, "revalidate", AsyncMock(side_effect=lambda url: Response(200, text=url)))
+    monkeypatch.setattr(crawler, "store_books", store_books)
+
+    await crawler.crawl_listing(crawler.start_url)
+
+    assert frontier.statuses == {"page-1": DONE, "book-1": LEASED, "book-2": LEASED}
+    assert frontier.unsettled == {"book-1", "book-2"}
+    frontier.finish.assert_not_awaited()
@@ -0,0 +1,137 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from bson import ObjectId
+from pymongo import DeleteOne
+from src.utils.history import diff, apply, state_at, complete_changes
+from src.scripts.migrate_history import _migrate_book
+from tests.helpers import AsyncCursor
+
+
+def test_diff_reports_changed_leaves_only():
+    old = {"name": "A", "price": {"including_tax": 10.0, "excluding_tax": 9.0}, "rating": 3}
+    new = {"name": "A", "price": {"including_tax": 12.0, "excluding_tax": 9.0}, "rating": 3, "num_reviews": 1}
+
+    assert diff(old, new) == {
+        "num_reviews": {"old": None, "new": 1},
+        "price.including_tax": {"old": 10.0, "new": 12.0},
+    }
+    assert diff(old, old) == {}
+    # Crawl metadata is not part of the history
+    assert diff({**old, "crawl_timestamp": 1}, {**old, "crawl_timestamp": 2}) == {}
+
+
+def test_apply_and_state_at_walk_history_backwards():
+    t0 = datetime(2025, 1, 1)
+    v1 = {"name": "A", "price": {"including_tax": 10.0, "excluding_tax": 9.0}, "rating": 3}
+    v2 = {**v1, "price": {"including_tax": 12.0, "excluding_tax": 9.0}}
+    v3 = {**v2, "name": "B", "num_reviews": 4}
+    rows = [  # newest first
+        {"ts": t0 + timedelta(days=2), "changes": diff(v2, v3)},
+        {"ts": t0 + timedelta(days=1), "changes": diff(v1, v2)},
+    ]
+
+    assert apply(v1, diff(v1, v3)) == v3
+    assert apply(v3, diff(v1, v3), side="old") == v1
+    assert state_at(v3, rows, t0) == v1
+    assert state_at(v3, rows, t0 + timedelta(days=1, hours=1)) == v2
+    assert state_at(v3, rows, t0 + timedelta(days=3)) == v3
+
+
+@pytest.mark.asyncio
+async def test_legacy_rows_get_diffs_against_the_following_version(monkeypatch):
+    book_id = ObjectId()
+    t0 = datetime(2025, 1, 1)
+    v1, v2, v3 = {"name": "v1", "rating": 1}, {"name": "v2", "rating": 1}, {"name": "v2", "rating": 5}
+    legacy = {"_id": ObjectId(), "book_id": book_id, "ts": t0, "previous": v1}
+    newer = {"_id": ObjectId(), "book_id": book_id, "ts": t0 + timedelta(days=1), "changes": diff(v2, v3)}
+    history = MagicMock()
+    books = MagicMock()
+    books.find = MagicMock(return_value=AsyncCursor([{"_id": book_id, **v3}]))
+    monkeypatch.setattr("src.utils.history.db.book_history", history)
+    monkeypatch.setattr("src.utils.history.db.books", books)
+
+    changes = [dict(newer), dict(legacy)]
+    await complete_changes(changes, latest=True)
+
+    assert changes[0]["changes"] == {"rating": {"old": 1, "new": 5}}
+    assert changes[1]["changes"] == {"name": {"old": "v1", "new": "v2"}}
+    assert "previous" not in changes[1]
+    # The first page holds every newer row already
+    history.find.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_legacy_diffs_on_a_later_page_read_only_the_rows_after_it(monkeypatch):
+    book_id = ObjectId()
+    t0 = datetime(2025, 1, 1)
+    v1, v2, v3, v4 = ({"name": "v1", "rating": 1}, {"name": "v2", "rating": 1},
+                      {"name": "v2", "rating": 5}, {"name": "v4", "rating": 5})
+    page = [  # newest first
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0 + timedelta(days=1), "previous": v2},
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0, "previous": v1},
+    ]
+    # On the previous page, oldest first: a legacy row, then a diff
+    after_page = [
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0 + timedelta(days=2), "previous": v3},
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0 + timedelta(days=3), "changes": diff(v3, v4)},
+    ]
+    history = MagicMock()
+    history.find = MagicMock(return_value=AsyncCursor(after_page))
+    books = MagicMock()
+    books.find = MagicMock(return_value=AsyncCursor([{"_id": book_id, **v4}]))
+    monkeypatch.setattr("src.utils.history.db.book_history", history)
+    monkeypatch.setattr("src.utils.history.db.books", books)
+
+    await complete_changes(page)
+
+    assert page[0]["changes"] == {"rating": {"old": 1, "new": 5}}
+    assert page[1]["changes"] == {"name": {"old": "v1", "new": "v2"}}
+    # One lookup for the book, starting after its newest row in the page
+    history.find.assert_called_once()
+    assert history.find.call_args[0][0]["$or"][0] == {"ts": {"$gt": t0 + timedelta(days=1)}}
+
+
+@pytest.mark.asyncio
+async def test_full_mode_embeds_the_version_before_each_change(monkeypatch):
+    book_id = ObjectId()
+    t0 = datetime(2025, 1, 1)
+    v1, v2, v3 = {"name": "v1", "rating": 1}, {"name": "v2", "rating": 1}, {"name": "v2", "rating": 5}
+    page = [
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0 + timedelta(days=1), "changes": diff(v2, v3)},
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0, "previous": {**v1, "crawl_timestamp": t0}},
+    ]
+    books = MagicMock()
+    books.find = MagicMock(return_value=AsyncCursor([{"_id": book_id, **v3}]))
+    monkeypatch.setattr("src.utils.history.db.books", books)
+
+    await complete_changes(page, previous=True, latest=True)
+
+    assert [row["previous"] for row in page] == [v2, v1]
+    assert page[1]["changes"] == {"name": {"old": "v1", "new": "v2"}}
+
+
+@pytest.mark.asyncio
+async def test_migration_rewrites_legacy_rows_and_keeps_their_snapshot_link(monkeypatch):
+    book_id = ObjectId()
+    t0 = datetime(2025, 1, 1)
+    v1, v2 = {"name": "v1", "rating": 1}, {"name": "v2", "rating": 1}
+    rows = [  # newest first
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0 + timedelta(days=1),
+         "previous": {**v2, "raw_html_snapshot_id": "hash-2"}},  # markup only
+        {"_id": ObjectId(), "book_id": book_id, "ts": t0, "previous": {**v1, "raw_html_snapshot_id": "hash-1"}},
+    ]
+    history = MagicMock()
+    history.find = MagicMock(return_value=AsyncCursor(rows))
+    books = MagicMock()
+    books.find_one = AsyncMock(return_value={"_id": book_id, **v2})
+    monkeypatch.setattr("src.scripts.migrate_history.db.book_history", history)
+    monkeypatch.setattr("src.scripts.migrate_history.db.books", books)
+
+    markup_only, rewritten = await _migrate_book(book_id)
+
+    assert isinstance(markup_only, DeleteOne) and markup_only._filter == {"_id": rows[0]["_id"]}
+    assert rewritten._doc == {
+        "$set": {"changes": {"name": {"old": "v1", "new": "v2"}}, "raw_html_snapshot_id": "hash-1"},
+        "$unset": {"previous": ""},
+    }
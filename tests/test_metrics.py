@@ -0,0 +1,71 @@
+import pytest
+from httpx import Response
+from src.crawler.crawler import Crawler
+from src.utils import metrics as metrics_module
+from src.utils.metrics import Metric, Registry
+
+
+def test_histogram_renders_cumulative_buckets_and_estimates_quantiles():
+    registry = Registry()
+    latency = registry.histogram("fetch_seconds", "Fetch time", ["op"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 5.0):
+        latency.observe(value, ("get",))
+
+    assert registry.render().splitlines()[2:] == [
+        'fetch_seconds_bucket{op="get",le="0.1"} 2',
+        'fetch_seconds_bucket{op="get",le="1"} 3',
+        'fetch_seconds_bucket{op="get",le="+Inf"} 4',
+        'fetch_seconds_sum{op="get"} 5.6',
+        'fetch_seconds_count{op="get"} 4',
+    ]
+    assert latency.quantile(0.5, ("get",)) == pytest.approx(0.1)
+    assert latency.quantile(0.75, ("get",)) == pytest.approx(1.0)
+
+
+def test_counters_gauges_and_disabled_registry():
+    registry = Registry()
+    responses = registry.counter("responses_total", "Responses", ["status"])
+    depth = registry.gauge("queue_depth", "Depth", ["queue"])
+    responses.inc(1, ("200",))
+    responses.inc(2, ("200",))
+    depth.set_function(lambda: 7, ("books",))
+
+    text = registry.render()
+    assert "# TYPE responses_total counter" in text
+    assert 'responses_total{status="200"} 3' in text
+    assert 'queue_depth{queue="books"} 7' in text
+    assert any("responses_total" in line and "/s" in line for line in registry.summary())
+
+    registry.reset()
+    registry.enabled = False
+    responses.inc(1, ("200",))
+    depth.set(3, ("books",))
+    depth.set_function(lambda: 7, ("books",))
+    assert responses.values == {} and depth.current() == {}
+
+    with pytest.raises(TypeError):
+        Metric(registry, "untyped", "Not a counter, gauge or histogram")
+
+
+@pytest.mark.asyncio
+async def test_fetch_with_retry_records_latency_bytes_and_retries(monkeypatch):
+    c = Crawler()
+    replies = iter([Response(503, text="busy"), Response(200, text="hello")])
+
+    async def fake_get(url, **kwargs):
+        return next(replies)
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(c.client, "get", fake_get)
+    monkeypatch.setattr("src.crawler.crawler.async_sleep", no_sleep)
+    metrics_module.metrics.reset()
+
+    await c.fetch_with_retry("http://example.com/book", attempts=3)
+
+    assert metrics_module.FETCH_RESPONSES.values == {("503",): 1, ("200",): 1}
+    assert metrics_module.FETCH_RETRIES.values == {("503",): 1}
+    assert metrics_module.FETCHED_BYTES.values == {(): len("busy") + len("hello")}
+    assert sum(metrics_module.FETCH_SECONDS.values[()][0]) == 2
+    assert sum(metrics_module.SLOT_WAIT_SECONDS.values[()][0]) == 2
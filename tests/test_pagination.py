@@ -0,0 +1,46 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from src.api.pagination import encode_cursor, decode_cursor, paginate, next_cursor
+from src.db import BOOK_SORTS, DEFAULT_BOOK_SORT
+
+
+def test_cursor_round_trip_and_scope():
+    oid = ObjectId()
+    token = encode_cursor("books:price.including_tax", {"_id": oid, "price": {"including_tax": 12.5}}, "price.including_tax")
+    assert decode_cursor(token, "books:price.including_tax") == [12.5, oid]
+
+    with pytest.raises(HTTPException):
+        decode_cursor(token, "books:rating")
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", "books:rating")
+
+
+@pytest.mark.parametrize("sort_by", [None, "rating", "price", "reviews"])
+def test_keyset_pages_cover_every_book_once(sort_by):
+    mongomock = pytest.importorskip("mongomock")
+    books = mongomock.MongoClient().db.books
+    # Lots of ties and some missing/null sort keys
+    for i in range(57):
+        doc = {"price": {"including_tax": float(i % 7)}, "num_reviews": i % 3}
+        if i % 5:
+            doc["rating"] = i % 4
+        elif i % 10:
+            doc["rating"] = None
+        books.insert_one(doc)
+
+    field, direction = BOOK_SORTS.get(sort_by, DEFAULT_BOOK_SORT)
+    scope = f"books:{field}"
+    _, sort = paginate({}, field, direction, None, scope)
+    expected = [d["_id"] for d in books.find({}).sort(sort)]
+
+    seen, token = [], None
+    while True:
+        query, sort = paginate({"num_reviews": {"$gte": 0}}, field, direction, token, scope)
+        page = list(books.find(query).sort(sort).limit(11))
+        token = next_cursor(page, 10, scope, field)
+        seen += [d["_id"] for d in page]
+        if token is None:
+            break
+
+    assert seen == expected
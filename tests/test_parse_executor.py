@@ -0,0 +1,86 @@
+import os
+import threading
+
+import pytest
+from src.crawler.parse_executor import ParseExecutor
+from src.utils.config import settings
+
+BOOK_HTML = """
+<html>
+    <h1>Sample Book</h1>
+    <ul class="breadcrumb"><li></li><li></li><li><a>Fiction</a></li></ul>
+    <th>Price (incl. tax)</th><td>£20.00</td>
+    <th>Price (excl. tax)</th><td>£18.00</td>
+    <p id="product_description"></p>
+    <p>Description of the book.</p>
+    <div class="instock availability">In stock</div>
+    <div class="item active"><img src="images/sample.jpg" /></div>
+    <p class="star-rating Three"></p>
+    <th>Number of reviews</th><td>5</td>
+</html>
+"""
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+async def test_each_mode_parses_a_batch_in_order_and_reports_failures_as_none(mode):
+    executor = ParseExecutor(mode, workers=1)
+    try:
+        items = await executor.parse_books([
+            (BOOK_HTML, "http://example.com/a.html"),
+            (None, "http://example.com/broken.html"),
+            (BOOK_HTML.replace("Sample Book", "Other Book"), "http://example.com/b.html"),
+        ])
+    finally:
+        executor.shutdown()
+
+    assert [item and item["name"] for item in items] == ["Sample Book", None, "Other Book"]
+    assert items[0]["source_url"] == "http://example.com/a.html"
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_parses_off_the_event_loop(monkeypatch):
+    executor = ParseExecutor("thread", workers=2)
+    seen = []
+
+    def record(pages):
+        seen.append(threading.current_thread().name)
+        return [None] * len(pages)
+
+    monkeypatch.setattr("src.crawler.parse_executor.parser.parse_book_pages", record)
+    try:
+        await executor.parse_books([(BOOK_HTML, "http://example.com/a.html")])
+    finally:
+        executor.shutdown()
+
+    assert seen and seen[0].startswith("parse")
+    assert seen[0] != threading.current_thread().name
+
+
+def test_worker_count_comes_from_parse_workers_or_the_cpu_count(monkeypatch):
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 3)
+    assert ParseExecutor("thread").workers == 3
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 0)
+    assert ParseExecutor("thread").workers == (os.cpu_count() or 1)
+    assert ParseExecutor("thread", workers=2).workers == 2
+
+    with pytest.raises(ValueError):
+        ParseExecutor("fork")
+
+
+@pytest.mark.asyncio
+async def test_shutdown_releases_the_pool_and_the_next_batch_starts_a_new_one():
+    executor = ParseExecutor("thread", workers=1)
+    await executor.parse_books([(BOOK_HTML, "http://example.com/a.html")])
+    pool = executor._executor
+
+    executor.shutdown()
+    assert executor._executor is None
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
+    executor.shutdown()  # idempotent
+
+    items = await executor.parse_books([(BOOK_HTML, "http://example.com/a.html")])
+    assert items[0]["name"] == "Sample Book"
+    assert executor._executor is not None and executor._executor is not pool
+    executor.shutdown()
@@ -1,6 +1,7 @@
 import pytest
 from src.utils.config import settings
 from src.utils.parser import parse_listing_page, parse_book_page
+from src.utils.parser import available_engines
 
 def test_parse_listing_page():
     html = """
@@ -49,3 +50,85 @@ def test_parse_book_page():
     assert data["rating"] == 3
     assert data["availability"] == "In stock"
     assert data["num_reviews"] == 5
+
+
+# The engines are compared on the markup of the tests above (loose, with
+# cells outside any <table>) and on a real page
+LISTING_HTML = """
+<html><body><section>
+    <article class="product_pod"><h3><a href="book_1.html">Book One</a></h3></article>
+    <article class="product_pod"><h3><a href="book_2.html">Book Two</a></h3></article>
+</section><li class="next"><a href="page-2.html">next</a></li></body></html>
+"""
+
+BOOK_HTML = """
+<html>
+    <h1>Sample Book</h1>
+    <ul class="breadcrumb"><li></li><li></li><li><a>Fiction</a></li></ul>
+    <th>Price (incl. tax)</th><td>£20.00</td>
+    <th>Price (excl. tax)</th><td>£18.00</td>
+    <p id="product_description"></p>
+    <p>Description of the book.</p>
+    <div class="instock availability">In stock</div>
+    <div class="item active"><img src="images/sample.jpg" /></div>
+    <p class="star-rating Three"></p>
+    <th>Number of reviews</th><td>5</td>
+</html>
+"""
+
+# Trimmed, well-formed copy of a real catalogue page
+REAL_BOOK_HTML = """<!DOCTYPE html>
+<html lang="en-us"><head><meta charset="utf-8"><title>A Light in the Attic | Books to Scrape - Sandbox</title></head>
+<body>
+<ul class="breadcrumb">
+    <li><a href="../../index.html">Home</a></li>
+    <li><a href="../category/books_1/index.html">Books</a></li>
+    <li><a href="../category/books/poetry_23/index.html">Poetry</a></li>
+    <li class="active">A Light in the Attic</li>
+</ul>
+<article class="product_page">
+<div class="row">
+    <div class="col-sm-6"><div id="product_gallery" class="carousel"><div class="thumbnail"><div class="carousel-inner">
+        <div class="item active"><img src="../../media/cache/fe/72/fe72f0532301ec28892ae79a629a293c.jpg" alt="A Light in the Attic" /></div>
+    </div></div></div></div>
+    <div class="col-sm-6 product_main">
+        <h1>A Light in the Attic</h1>
+        <p class="price_color">£51.77</p>
+        <p class="instock availability">
+            <i class="icon-ok"></i>
+            In stock (22 available)
+        </p>
+        <p class="star-rating Three">
+            <i class="icon-star"></i>
+        </p>
+    </div>
+</div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+<p>It's hard to imagine a world without A Light in the Attic. ...more</p>
+<div class="sub-header"><h2>Product Information</h2></div>
+<table class="table table-striped">
+    <tr><th>UPC</th><td>a897fe39b1053632</td></tr>
+    <tr><th>Product Type</th><td>Books</td></tr>
+    <tr><th>Price (excl. tax)</th><td>£51.77</td></tr>
+    <tr><th>Price (incl. tax)</th><td>£51.77</td></tr>
+    <tr><th>Tax</th><td>£0.00</td></tr>
+    <tr><th>Availability</th><td>In stock (22 available)</td></tr>
+    <tr><th>Number of reviews</th><td>0</td></tr>
+</table>
+</article>
+</body></html>"""
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_engines_match_on_real_page(engine):
+    url = "http://example.com/a-light-in-the-attic_1000/index.html"
+    expected = parse_book_page(REAL_BOOK_HTML, url, engine="html.parser")
+    assert expected["rating"] == 3 and expected["price"]["including_tax"] == 51.77
+    assert parse_book_page(REAL_BOOK_HTML, url, engine=engine) == expected
+
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_engines_match_on_fixtures(engine):
+    url = "http://example.com/book_1.html"
+    assert parse_book_page(BOOK_HTML, url, engine=engine) == parse_book_page(BOOK_HTML, url, engine="html.parser")
+    assert parse_listing_page(LISTING_HTML, engine=engine) == parse_listing_page(LISTING_HTML, engine="html.parser")
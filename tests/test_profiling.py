@@ -0,0 +1,66 @@
+import json
+import pstats
+import time
+from types import SimpleNamespace
+
+import pytest
+from src.utils.helpers import gzip_bytes
+from src.utils.profiling import CrawlProfiler, frame_stage, pstats_stages, stack_stage
+
+
+def test_frames_and_stacks_map_to_crawl_stages():
+    assert frame_stage("/app/src/utils/helpers.py", "gzip_bytes") == "hash/gzip"
+    assert frame_stage("/app/src/utils/helpers.py", "now_utc") is None
+    assert frame_stage("~", "<built-in method _hashlib.openssl_sha256>") == "hash/gzip"
+    assert frame_stage("/venv/site-packages/httpx/_client.py", "get") == "fetch"
+
+    # MongoDB reading its socket is db time, not fetch time
+    assert stack_stage([
+        ("/usr/lib/python3.11/threading.py", "run"),
+        ("/venv/site-packages/pymongo/pool.py", "receive_message"),
+        ("/usr/lib/python3.11/ssl.py", "recv_into"),
+    ]) == "db"
+    assert stack_stage([("/usr/lib/python3.11/asyncio/base_events.py", "_run_once"),
+                        ("/usr/lib/python3.11/selectors.py", "select")]) == "waiting"
+    assert stack_stage([("/app/src/crawler/crawler.py", "run")]) is None
+
+
+def test_pstats_time_follows_callers_into_their_stage():
+    store = ("/app/src/crawler/crawler.py", 10, "store_books")
+    parse = ("/app/src/utils/parser.py", 20, "parse_book")
+    length = ("~", 0, "<built-in method builtins.len>")
+    stats = SimpleNamespace(stats={
+        store: (1, 1, 0.5, 3.0, {}),
+        parse: (1, 1, 1.0, 1.75, {store: (1, 1, 1.0, 1.75)}),
+        # len's own time: 0.75s under the parser, 0.25s under the crawler
+        length: (2, 2, 1.0, 1.0, {parse: (1, 1, 0.75, 0.75), store: (1, 1, 0.25, 0.25)}),
+    })
+
+    stages = pstats_stages(stats)
+
+    assert stages["parse"] == pytest.approx(1.75)
+    assert stages["other"] == pytest.approx(0.75)
+    assert stages["fetch"] == 0.0
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_profiler_writes_profile_and_stage_times(tmp_path, mode):
+    page = b"<html>" + bytes(range(256)) * 2000 + b"</html>"
+    with CrawlProfiler(mode, tmp_path, "crawl", interval=0.001) as profiler:
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            gzip_bytes(page)
+
+    profile, stages_path = profiler.paths
+    if mode == "cprofile":
+        assert profile.name == "crawl.pstats"
+        assert pstats.Stats(str(profile)).total_calls > 0
+    else:
+        assert profile.name == "crawl.collapsed"
+        lines = profile.read_text().splitlines()
+        assert lines and all(line.split(";", 1)[0] in profiler.stages for line in lines)
+        assert any(line.startswith("hash/gzip;MainThread;") for line in lines)
+
+    report = json.loads(stages_path.read_text())
+    assert report["mode"] == mode
+    assert max(report["stages"], key=report["stages"].get) == "hash/gzip"
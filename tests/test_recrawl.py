@@ -0,0 +1,73 @@
+import math
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from httpx import Response
+from src.crawler import recrawl
+from src.crawler.crawler import Crawler
+from src.crawler.recrawl import RecrawlPlanner, estimate_rate, next_interval
+from tests.helpers import AsyncCursor
+
+
+def test_next_interval_keeps_the_change_probability_under_the_bound():
+    rate = 0.05  # a change every 20 days
+    interval = next_interval(rate, 0.1, 1, 30)
+    assert interval == pytest.approx(-math.log(0.9) / rate)
+    assert 1 - math.exp(-rate * interval) == pytest.approx(0.1)
+
+    assert next_interval(10.0, 0.1, 1, 30) == 1
+    assert next_interval(0.0001, 0.1, 1, 30) == 30
+
+
+def test_plan_backs_off_stable_books_and_keeps_hot_books_close():
+    planner = RecrawlPlanner(bound=0.1, min_days=1, max_days=30)
+    start = datetime(2025, 1, 1)
+
+    stable = hot = None
+    for day in range(200):
+        when = start + timedelta(days=day)
+        if stable is None or stable["next_due"] <= when:
+            stable = planner.plan(stable, False, when)
+        hot = planner.plan(hot, True, when)
+
+    assert stable["changes"] == 0 and stable["checks"] < 25  # vs 200 daily fetches
+    assert stable["next_due"] - stable["last_checked"] == timedelta(days=30)
+    assert hot["next_due"] - hot["last_checked"] == timedelta(days=1)
+    assert hot["rate"] == pytest.approx(estimate_rate(200, 199))
+
+
+@pytest.mark.asyncio
+async def test_record_merges_checks_and_flushes_in_batches(monkeypatch):
+    schedule = AsyncMock()
+    schedule.find = MagicMock(return_value=AsyncCursor([]))
+    monkeypatch.setattr(recrawl.db, "recrawl_schedule", schedule)
+    planner = RecrawlPlanner(bound=0.1, min_days=1, max_days=30, batch_size=2)
+    when = datetime(2025, 1, 1)
+
+    await planner.record("a", True, when)
+    await planner.record("a", False, when)  # a change seen earlier in the batch is kept
+    schedule.bulk_write.assert_not_awaited()
+    await planner.record("b", False, when)
+
+    ops = {op._filter["_id"]: op._doc["$set"] for op in schedule.bulk_write.await_args.args[0]}
+    assert ops["a"]["changes"] == 1 and ops["b"]["changes"] == 0
+    assert ops["b"]["next_due"] == when + timedelta(days=1)  # new books start out daily
+
+
+@pytest.mark.asyncio
+async def test_listing_pages_without_validators_are_still_sampled(monkeypatch):
+    crawler = Crawler()
+    crawler.validators = {}
+    page = "https://books.toscrape.com/catalogue/page-2.html"
+    listing_pages = AsyncMock()
+    monkeypatch.setattr("src.crawler.crawler.db.listing_pages", listing_pages)
+    monkeypatch.setattr(crawler, "fetch_with_retry", AsyncMock(return_value=Response(200, text="<html></html>")))
+
+    await crawler.fetch_listing(page)
+
+    (query, update), kwargs = listing_pages.update_one.await_args
+    assert query == {"url": page} and "$setOnInsert" in update and kwargs["upsert"]
+
+    listing_pages.find = MagicMock(return_value=AsyncCursor([{"url": page}]))
+    monkeypatch.setattr(recrawl.settings, "RECRAWL_LISTING_SAMPLE", 5)
+    assert await crawler.listing_sample() == ["https://books.toscrape.com/catalogue/page-1.html", page]
@@ -0,0 +1,18 @@
+import orjson
+from datetime import datetime
+from bson import ObjectId
+from src.api.responses import success
+
+
+def test_success_serialises_mongo_documents_in_one_pass():
+    oid = ObjectId()
+    doc = {"_id": oid, "crawl_timestamp": datetime(2025, 1, 2, 3, 4, 5, 678), "previous": {"book_id": oid}}
+
+    body = orjson.loads(success("ok", data=[doc], next_cursor="abc").body)
+
+    assert body["data"][0]["_id"] == str(oid)
+    assert body["data"][0]["previous"]["book_id"] == str(oid)
+    assert body["data"][0]["crawl_timestamp"] == doc["crawl_timestamp"].isoformat()
+    assert body["next_cursor"] == "abc"
+    # The stored document itself is left untouched
+    assert doc["_id"] is oid
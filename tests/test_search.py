@@ -0,0 +1,88 @@
+import pytest
+from types import SimpleNamespace
+from bson import ObjectId
+from src.api import search
+from src.api.search import InvertedIndex, MemorySearch, mongo_search, tokenize
+
+
+class FakeBooks:
+    """`find` over a list of documents, honouring `{"_id": {"$in": ...}}` and the projection."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipeline = None
+
+    def find(self, query, projection):
+        ids = query.get("_id", {}).get("$in")
+        docs = [d for d in self.docs if ids is None or d["_id"] in ids]
+        return self._cursor([{k: v for k, v in d.items() if k == "_id" or k in projection} for d in docs])
+
+    def aggregate(self, pipeline):
+        self.pipeline = pipeline
+        return SimpleNamespace(to_list=self._to_list)
+
+    async def _to_list(self, length=None):
+        return []
+
+    async def _cursor(self, docs):
+        for doc in docs:
+            yield doc
+
+
+def _book(name, description="", category="Poetry", price=10.0):
+    return {"_id": ObjectId(), "name": name, "description": description, "category": category,
+            "price": {"including_tax": price, "excluding_tax": price}, "rating": 3}
+
+
+def test_tokenize_drops_stop_words_and_plurals():
+    assert tokenize("The Secrets of the Dragons, and a Glass") == ["secret", "dragon", "glass"]
+
+
+def test_inverted_index_ranks_name_matches_first_and_applies_filters():
+    in_name = _book("Dragon Tales")
+    in_description = _book("Stories", "a dragon appears", category="Fantasy", price=30.0)
+    index = InvertedIndex()
+    for doc in (in_name, in_description, _book("Unrelated")):
+        index.add(doc)
+
+    assert [i for _, i in index.search("dragons", {})] == [in_name["_id"], in_description["_id"]]
+    assert [i for _, i in index.search("dragon", {"category": "Fantasy"})] == [in_description["_id"]]
+    assert index.search("dragon", {"price.including_tax": {"$gte": 20.0, "$lte": 40.0}})[0][1] == in_description["_id"]
+
+
+@pytest.mark.asyncio
+async def test_memory_search_pages_with_cursors(monkeypatch):
+    docs = [_book(f"Dragon {i}", "dragon " * i) for i in range(5)]
+    monkeypatch.setattr(search, "db", SimpleNamespace(books=FakeBooks(docs)))
+
+    async def no_poll():
+        return 0
+    monkeypatch.setattr(search.books_generation, "refresh", no_poll)
+
+    backend = MemorySearch()
+    seen, cursor = [], None
+    while True:
+        page, cursor = await backend("dragon", {}, {"name": 1}, 2, cursor)
+        assert len(page) <= 2 and all("score" in d and "description" not in d for d in page)
+        seen += page
+        if not cursor:
+            break
+
+    assert sorted(d["_id"] for d in seen) == sorted(d["_id"] for d in docs)
+    scores = [d["score"] for d in seen]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_mongo_search_prefilters_and_sorts_by_text_score(monkeypatch):
+    books = FakeBooks([])
+    monkeypatch.setattr(search, "db", SimpleNamespace(books=books))
+
+    await mongo_search("dragon", {"category": "Poetry"}, {"name": 1}, 20, None)
+
+    match, add_score, sort, limit, project = books.pipeline
+    assert match == {"$match": {"$text": {"$search": "dragon"}, "category": "Poetry"}}
+    assert add_score == {"$addFields": {"score": {"$meta": "textScore"}}}
+    assert sort == {"$sort": {"score": -1, "_id": -1}}
+    assert limit == {"$limit": 21}
+    assert project == {"$project": {"name": 1, "score": 1}}
@@ -0,0 +1,110 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from src.utils.stats import StatsDelta, apply_stats, fold_groups, summarise
+
+
+def _book(category, price, rating):
+    return {"category": category, "price": {"including_tax": price, "excluding_tax": price}, "rating": rating}
+
+
+def _ops(delta):
+    return {op._filter["_id"]: op._doc for op in delta.ops()}
+
+
+def test_stats_delta_counts_new_books_and_widens_bounds():
+    delta = StatsDelta()
+    delta.add(_book("Poetry", 10.10, 3))
+    delta.add(_book("Poetry", 20.25, 5))
+    delta.add(_book("Travel", 5.0, None))
+
+    ops = _ops(delta)
+
+    assert ops["Poetry"]["$inc"] == {"count": 2, "ratings.3": 1, "ratings.5": 1, "price_cents_sum": 3035, "priced": 2}
+    assert ops["Poetry"]["$min"] == {"price_min": 10.10} and ops["Poetry"]["$max"] == {"price_max": 20.25}
+    assert ops["Travel"]["$inc"]["ratings.none"] == 1
+    assert not delta.shrunk
+
+
+def test_stats_delta_moves_updated_books_between_categories():
+    delta = StatsDelta()
+    delta.update(_book("Poetry", 10.0, 3), _book("Poetry", 10.0, 3))
+    assert delta.ops() == []
+
+    delta.update(_book("Poetry", 10.0, 3), _book("Travel", 12.0, 3))
+    ops = _ops(delta)
+
+    assert ops["Poetry"] == {"$inc": {"count": -1, "ratings.3": -1, "price_cents_sum": -1000, "priced": -1}}
+    assert ops["Travel"]["$inc"]["price_cents_sum"] == 1200
+    # Poetry may have lost its cheapest or dearest book
+    assert delta.shrunk == {"Poetry"}
+
+
+def test_summarise_drops_empty_categories_and_totals_the_rest():
+    docs = [
+        {"_id": "Travel", "count": 2, "priced": 2, "price_cents_sum": 3000, "price_min": 10.0, "price_max": 20.0,
+         "ratings": {"5": 2}},
+        {"_id": "Poetry", "count": 1, "priced": 1, "price_cents_sum": 4000, "price_min": 40.0, "price_max": 40.0,
+         "ratings": {"1": 1}},
+        {"_id": "Gone", "count": 0, "priced": 0, "price_cents_sum": 0, "price_min": None, "price_max": None},
+    ]
+
+    stats = summarise(docs)
+
+    assert [c["category"] for c in stats["categories"]] == ["Poetry", "Travel"]
+    assert stats["categories"][1]["price"] == {"min": 10.0, "avg": 15.0, "max": 20.0}
+    assert stats["total"]["count"] == 3
+    assert stats["total"]["price"] == {"min": 10.0, "avg": 23.33, "max": 40.0}
+    assert stats["total"]["ratings"] == {"1": 1, "2": 0, "3": 0, "4": 0, "5": 2, "none": 0}
+
+
+def test_fold_groups_matches_incremental_maintenance():
+    books = [_book("Poetry", 10.10, 3), _book("Poetry", 20.25, 5), _book("Poetry", 7.0, 3)]
+    groups = [
+        {"_id": {"category": "Poetry", "rating": 3}, "count": 2, "priced": 2, "cents": 1710.0,
+         "price_min": 7.0, "price_max": 10.10},
+        {"_id": {"category": "Poetry", "rating": 5}, "count": 1, "priced": 1, "cents": 2025.0,
+         "price_min": 20.25, "price_max": 20.25},
+    ]
+    delta = StatsDelta()
+    for book in books:
+        delta.add(book)
+    incremental = _ops(delta)["Poetry"]
+
+    rebuilt = fold_groups(groups)["Poetry"]
+
+    assert rebuilt["count"] == incremental["$inc"]["count"]
+    assert rebuilt["price_cents_sum"] == incremental["$inc"]["price_cents_sum"]
+    assert rebuilt["ratings"] == {"3": 2, "5": 1}
+    assert (rebuilt["price_min"], rebuilt["price_max"]) == (7.0, 20.25)
+
+    unpriced = fold_groups([{"_id": {"category": "Maps", "rating": None}, "count": 1, "priced": 0, "cents": 0,
+                             "price_min": None, "price_max": None}])["Maps"]
+    assert "price_min" not in unpriced and "price_max" not in unpriced
+
+
+@pytest.mark.asyncio
+async def test_bounds_of_an_emptied_category_come_back_with_the_next_book(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    stats = mongomock.MongoClient().db.book_stats
+    stats.insert_one({"_id": "Poetry", "count": 1, "priced": 1, "price_cents_sum": 1000,
+                      "price_min": 10.0, "price_max": 10.0})
+
+    async def bulk_write(ops, ordered=True):
+        for op in ops:
+            stats.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    books = SimpleNamespace(find_one=AsyncMock(return_value=None))  # no priced book left
+    monkeypatch.setattr("src.utils.stats.db", SimpleNamespace(books=books, book_stats=SimpleNamespace(bulk_write=bulk_write)))
+
+    emptied = StatsDelta()
+    emptied.remove(_book("Poetry", 10.0, 3))
+    await apply_stats(emptied)
+    doc = stats.find_one({"_id": "Poetry"})
+    assert doc["count"] == 0 and "price_min" not in doc and "price_max" not in doc
+
+    added = StatsDelta()
+    added.add(_book("Poetry", 12.0, 4))
+    await apply_stats(added)
+    doc = stats.find_one({"_id": "Poetry"})
+    assert (doc["price_min"], doc["price_max"]) == (12.0, 12.0)